@@ -0,0 +1,96 @@
+"""
+Benchmark: loaders antigos do SIDRA (legacy_sidra.py) x motor único parse_sidra.
+
+Gera CSVs sintéticos num diretório temporário, confere que os dois
+caminhos devolvem o mesmo DataFrame e imprime o melhor tempo de cada um.
+
+Uso:
+    python benchmarks/bench_sidra_parser.py [--repeticoes N] [--escala K]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import legacy_sidra  # noqa: E402
+import sidra_sintetico  # noqa: E402
+from etl_neuropulse import SPEC_PNS_IDADE, SidraSpec, parse_sidra  # noqa: E402
+
+
+def _melhor_tempo(fn, repeticoes: int):
+    melhor, resultado = float("inf"), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def _mesmo_resultado(antigo: pd.DataFrame, novo: pd.DataFrame) -> bool:
+    antigo = antigo.reset_index(drop=True)
+    novo = novo[antigo.columns].reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(antigo, novo, check_dtype=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def casos(pasta: Path, escala: int) -> list:
+    """(nome, loader antigo, loader novo) sobre arquivos sintéticos."""
+    largo = sidra_sintetico.escreve_transposto(
+        pasta / "transposto_largo.csv", n_linhas=20 * escala, n_entidades=5570
+    )
+    grupo = sidra_sintetico.escreve_transposto(
+        pasta / "transposto_grupo.csv", n_linhas=2000 * escala
+    )
+    longo = sidra_sintetico.escreve_longo(
+        pasta / "longo.csv", n_grupos=5000 * escala
+    )
+
+    spec_largo = SidraSpec(layout="transposto", skiprows=6)
+    spec_grupo = SidraSpec(layout="transposto", skiprows=6, coluna_grupo="grupo")
+
+    return [
+        (
+            "transposto (5570 colunas)",
+            lambda: legacy_sidra._load_sidra_transposto(largo),
+            lambda: parse_sidra(largo, spec_largo),
+        ),
+        (
+            "transposto com grupo",
+            lambda: legacy_sidra._load_sidra_transposto_com_grupo(grupo, "grupo"),
+            lambda: parse_sidra(grupo, spec_grupo),
+        ),
+        (
+            "longo (idade)",
+            lambda: legacy_sidra.load_pns_depressao_idade(longo),
+            lambda: parse_sidra(longo, SPEC_PNS_IDADE),
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--escala", type=int, default=1, help="multiplica o número de linhas")
+    cli = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'caso':<28}{'antigo (s)':>12}{'novo (s)':>12}{'ganho':>9}  mesmo resultado")
+        for nome, antigo, novo in casos(Path(tmp), cli.escala):
+            t_antigo, df_antigo = _melhor_tempo(antigo, cli.repeticoes)
+            t_novo, df_novo = _melhor_tempo(novo, cli.repeticoes)
+            print(
+                f"{nome:<28}{t_antigo:>12.3f}{t_novo:>12.3f}{t_antigo / t_novo:>8.1f}x"
+                f"  {_mesmo_resultado(df_antigo, df_novo)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Suíte de benchmarks do ETL e do caminho de dados do dashboard.
+
+Gera as quatro tabelas do SIDRA (sidra_sintetico.escreve_fontes_pns) em
+1×, 100× e 10.000× o tamanho atual e mede, por estágio, o melhor tempo e o
+pico de memória. O resultado pode ser gravado como baseline (JSON) e cada
+execução seguinte é comparada com ela: estágios mais lentos ou mais
+pesados que a tolerância são marcados como REGRESSÃO (código de saída 1).
+
+Uso:
+    python benchmarks/bench_suite.py                      # compara com a baseline
+    python benchmarks/bench_suite.py --grava-baseline     # grava/atualiza a baseline
+    python benchmarks/bench_suite.py --escalas 1 100 --repeticoes 5
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import etl_neuropulse as etl  # noqa: E402
+import sidra_sintetico  # noqa: E402
+from cubo_neuropulse import monta_cubo  # noqa: E402
+from dim_uf import canonicaliza_uf  # noqa: E402
+from particoes_neuropulse import le_particoes  # noqa: E402
+from store_neuropulse import NeuroPulseStore  # noqa: E402
+
+BASELINE_PADRAO = Path(__file__).resolve().parent / "baseline.json"
+ESCALAS_PADRAO = [1, 100, 10_000]
+
+# Diferenças abaixo disso são ruído de medição, não regressão
+MIN_DIFERENCA_S = 0.005
+MIN_DIFERENCA_MB = 1.0
+
+
+# ===============================
+# MEDIÇÃO
+# ===============================
+
+def _mede(fn, repeticoes: int) -> dict:
+    """
+    Melhor tempo em `repeticoes` execuções e pico de memória (tracemalloc)
+    numa execução à parte, para o rastreamento não distorcer o tempo.
+    """
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"segundos": round(melhor, 6), "pico_mb": round(pico / 1024**2, 3)}
+
+
+@contextlib.contextmanager
+def _etl_em(pasta: Path, processed: Path = None):
+    """
+    Aponta data/raw do ETL para pasta/raw e data/processed para
+    pasta/processed (ou `processed`).
+    """
+    nomes = [
+        "DATA_RAW", "DATA_PROCESSED", "OUT_DATASET", "OUT_CSV", "QUARENTENA_CSV", "SNAPSHOT_PATH",
+        "CARIMBO_PATH", "MANIFEST_PATH", "CACHE_DIR", "RELATORIO_PATH",
+    ]
+    originais = {nome: getattr(etl, nome) for nome in nomes}
+
+    raw, processed = pasta / "raw", processed or pasta / "processed"
+    processed.mkdir(parents=True, exist_ok=True)
+    novos = {
+        "DATA_RAW": raw,
+        "DATA_PROCESSED": processed,
+        "OUT_DATASET": processed / originais["OUT_DATASET"].name,
+        "OUT_CSV": processed / originais["OUT_CSV"].name,
+        "QUARENTENA_CSV": processed / originais["QUARENTENA_CSV"].name,
+        "SNAPSHOT_PATH": processed / originais["SNAPSHOT_PATH"].name,
+        "CARIMBO_PATH": processed / originais["CARIMBO_PATH"].name,
+        "MANIFEST_PATH": processed / originais["MANIFEST_PATH"].name,
+        "CACHE_DIR": processed / originais["CACHE_DIR"].name,
+        "RELATORIO_PATH": processed / originais["RELATORIO_PATH"].name,
+    }
+    try:
+        for nome, valor in novos.items():
+            setattr(etl, nome, valor)
+        yield
+    finally:
+        for nome, valor in originais.items():
+            setattr(etl, nome, valor)
+
+
+def _silencioso(fn):
+    """Executa fn sem os prints de progresso do ETL."""
+    def executa():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return executa
+
+
+# ===============================
+# ESTÁGIOS
+# ===============================
+
+def estagios(pasta: Path, nivel: str = "uf") -> list:
+    """
+    (nome, função) de cada estágio medido, sobre os arquivos em pasta/raw,
+    com as tabelas de sexo no `nivel` geográfico dado.
+    Os estágios do dashboard usam a base gerada pelo próprio ETL.
+    """
+    raw = pasta / "raw"
+    csv_sexo = raw / "pns_depressao_sexo_total.csv"
+    csv_idade = raw / "pns_depressao_uf_idade.csv"
+
+    with _etl_em(pasta):
+        etl.build_neuropulse_base(usar_cache=False, nivel=nivel)
+        base = le_particoes(etl.OUT_DATASET).to_pandas()
+
+    ufs_brutas = pd.read_csv(
+        csv_idade, sep=";", encoding="latin1", skiprows=4, usecols=[1], dtype=str
+    ).iloc[:, 0]
+
+    store = NeuroPulseStore(base)
+    ufs = store.opcoes("UF")
+
+    def build_base():
+        with _etl_em(pasta):
+            etl.build_neuropulse_base(usar_cache=False, nivel=nivel)
+
+    def build_stream():
+        # Pasta própria e sem carimbo a cada repetição: com a versão das mesmas
+        # entradas já publicada, o stream só conferiria os hashes e sairia
+        with _etl_em(pasta, pasta / "processed_stream"):
+            etl.CARIMBO_PATH.unlink(missing_ok=True)
+            etl.build_neuropulse_stream(nivel=nivel)
+
+    return [
+        (
+            "parse_transposto",
+            lambda: etl.parse_sidra(csv_sexo, etl.spec_pns_sexo("Total", nivel=nivel)),
+        ),
+        ("parse_longo", lambda: etl.parse_sidra(csv_idade, etl.SPEC_PNS_IDADE)),
+        ("padroniza_uf", lambda: canonicaliza_uf(ufs_brutas)),
+        ("build_base", build_base),
+        ("build_stream", build_stream),
+        ("cubo", lambda: monta_cubo(base)),
+        ("store_init", lambda: NeuroPulseStore(base)),
+        ("dash_filter", lambda: store.filter(ufs=ufs, sexo="Total", faixa_idade="Total")),
+        ("dash_aggregate", lambda: store.aggregate(ufs=ufs, sexo="Total", faixa_idade="Total")),
+        (
+            "dash_aggregate_sexo",
+            lambda: store.aggregate(
+                ufs=ufs, sexo=["Masculino", "Feminino"], faixa_idade="Total", by="sexo"
+            ),
+        ),
+    ]
+
+
+def roda_escala(escala: int, repeticoes: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        sidra_sintetico.escreve_fontes_pns(pasta / "raw", escala=escala)
+
+        resultado = {}
+        nivel = sidra_sintetico.nivel_sexo(escala)
+        for nome, fn in _silencioso(lambda: estagios(pasta, nivel))():
+            resultado[nome] = _mede(_silencioso(fn), repeticoes)
+            print(
+                f"  {nome:<22}{resultado[nome]['segundos']:>11.4f} s"
+                f"{resultado[nome]['pico_mb']:>11.1f} MB"
+            )
+        return resultado
+
+
+# ===============================
+# BASELINE E REGRESSÕES
+# ===============================
+
+def _metadados() -> dict:
+    return {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+    }
+
+
+def compara(atual: dict, baseline: dict, tolerancia: float) -> list:
+    """
+    Lista de regressões (escala, estágio, métrica, baseline, atual).
+    Só conta o que passou da tolerância relativa E do mínimo absoluto.
+    """
+    regressoes = []
+    for escala, estagios_atuais in atual.items():
+        estagios_base = baseline.get("escalas", {}).get(escala, {})
+        for estagio, medidas in estagios_atuais.items():
+            ref = estagios_base.get(estagio)
+            if ref is None:
+                continue
+            for metrica, minimo in (("segundos", MIN_DIFERENCA_S), ("pico_mb", MIN_DIFERENCA_MB)):
+                antes, agora = ref[metrica], medidas[metrica]
+                if agora > antes * (1 + tolerancia) and agora - antes > minimo:
+                    regressoes.append((escala, estagio, metrica, antes, agora))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS_PADRAO)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PADRAO)
+    parser.add_argument(
+        "--grava-baseline", action="store_true",
+        help="grava o resultado como nova baseline (mantém as escalas não medidas)",
+    )
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.25,
+        help="aumento relativo tolerado antes de marcar regressão (padrão 0.25)",
+    )
+    parser.add_argument("--saida", type=Path, help="grava também o resultado desta execução em JSON")
+    cli = parser.parse_args()
+
+    atual = {}
+    for escala in cli.escalas:
+        print(f"\n▶ Escala {escala}×")
+        atual[str(escala)] = roda_escala(escala, cli.repeticoes)
+
+    if cli.saida:
+        cli.saida.write_text(
+            json.dumps({"meta": _metadados(), "escalas": atual}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+    if cli.grava_baseline:
+        anterior = {}
+        if cli.baseline.exists():
+            anterior = json.loads(cli.baseline.read_text(encoding="utf-8")).get("escalas", {})
+        baseline = {"meta": _metadados(), "escalas": {**anterior, **atual}}
+        cli.baseline.write_text(json.dumps(baseline, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✅ Baseline gravada em {cli.baseline}")
+        return
+
+    if not cli.baseline.exists():
+        print(f"\n⚠️ Sem baseline em {cli.baseline}; use --grava-baseline para criar.")
+        return
+
+    baseline = json.loads(cli.baseline.read_text(encoding="utf-8"))
+    regressoes = compara(atual, baseline, cli.tolerancia)
+    if not regressoes:
+        print(f"\n✅ Nenhuma regressão acima de {cli.tolerancia:.0%} em relação à baseline.")
+        return
+
+    print(f"\n❌ {len(regressoes)} regressão(ões) acima de {cli.tolerancia:.0%}:")
+    for escala, estagio, metrica, antes, agora in regressoes:
+        print(f"  REGRESSÃO {escala}× {estagio:<22}{metrica:<9}{antes:>10.4f} -> {agora:.4f}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
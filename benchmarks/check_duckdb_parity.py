@@ -0,0 +1,162 @@
+"""
+Paridade entre os backends do dashboard: pandas x DuckDB.
+
+Roda src/dashboard_streamlit.py headless (AppTest) uma vez com cada backend
+(NEUROPULSE_BACKEND, em processos separados, porque config é lido na
+importação), percorrendo as mesmas combinações de filtro em cada seleção
+de anos (cada edição sozinha e todas juntas), e compara:
+KPIs (texto exibido), dados de cada gráfico e a tabela detalhada.
+Sai com código 1 se algum estado divergir.
+
+Uso:
+    python benchmarks/check_duckdb_parity.py
+"""
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+APP = RAIZ / "src" / "dashboard_streamlit.py"
+
+TOLERANCIA = 1e-9  # somas em ordem diferente (numpy x DuckDB)
+
+
+# ===============================
+# DUMP DE UM BACKEND (processo filho)
+# ===============================
+
+def _decodifica(valor):
+    """Arrays do Plotly 6 vêm em base64 ({"dtype", "bdata"})."""
+    if isinstance(valor, dict) and "bdata" in valor:
+        valor = np.frombuffer(base64.b64decode(valor["bdata"]), dtype=valor["dtype"]).tolist()
+    return valor
+
+
+def _estados(ufs: list, sexos: list, faixas: list) -> list:
+    """Todas as combinações sexo × faixa, com todas as UFs e com subconjuntos."""
+    rng = random.Random(42)
+    estados = []
+    for sexo in sexos:
+        for faixa in faixas:
+            estados.append((ufs, sexo, faixa))
+            estados.append((rng.sample(ufs, rng.randint(1, len(ufs))), sexo, faixa))
+    return estados
+
+
+def _selecoes_anos(anos: list) -> list:
+    """Cada edição sozinha e, havendo mais de uma, todas juntas."""
+    return [[ano] for ano in anos] + ([anos] if len(anos) > 1 else [])
+
+
+def dump() -> list:
+    sys.path.insert(0, str(RAIZ / "src"))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+
+    def widget(lista, rotulo):
+        return next(w for w in lista if w.label == rotulo)
+
+    anos = list(widget(at.multiselect, "Ano").options)
+
+    saida = []
+    for anos_sel in _selecoes_anos(anos):
+        widget(at.multiselect, "Ano").set_value(anos_sel)
+        at.run()
+        ufs = list(widget(at.multiselect, "Estados (UF)").options)
+        sexos = list(widget(at.selectbox, "Sexo").options)
+        faixas = list(widget(at.selectbox, "Faixa de idade").options)
+        saida += _dump_estados(at, widget, anos_sel, _estados(ufs, sexos, faixas))
+    return saida
+
+
+def _dump_estados(at, widget, anos_sel: list, estados: list) -> list:
+    saida = []
+    for ufs_sel, sexo, faixa in estados:
+        widget(at.multiselect, "Estados (UF)").set_value(ufs_sel)
+        widget(at.selectbox, "Sexo").set_value(sexo)
+        widget(at.selectbox, "Faixa de idade").set_value(faixa)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+        graficos = []
+        for grafico in at.get("plotly_chart"):
+            dados = json.loads(grafico.proto.spec)["data"]
+            graficos.append([(_decodifica(t.get("x")), _decodifica(t.get("y"))) for t in dados])
+
+        # A tabela fica no fragmento de detalhe, atrás do seletor de visão
+        tabela = None
+        if at.radio:
+            at.radio(key="visao_detalhe").set_value("📋 Tabela")
+            at.run()
+            tabela = at.dataframe[0].value if at.dataframe else None
+            at.radio(key="visao_detalhe").set_value("🗺️ Mapa")
+        saida.append(
+            {
+                "estado": [sorted(ufs_sel), sexo, faixa, anos_sel],
+                "kpis": [(m.label, m.value) for m in at.metric],
+                "graficos": graficos,
+                "tabela": None if tabela is None else json.loads(tabela.to_json(orient="split")),
+                "avisos": [i.value for i in at.info] + [w.value for w in at.warning],
+            }
+        )
+    return saida
+
+
+# ===============================
+# COMPARAÇÃO
+# ===============================
+
+def _iguais(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) <= TOLERANCIA * max(1.0, abs(a), abs(b))
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_iguais(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_iguais(a[k], b[k]) for k in a)
+    return a == b
+
+
+def _roda_backend(backend: str) -> list:
+    env = {**os.environ, "NEUROPULSE_BACKEND": backend}
+    proc = subprocess.run(
+        [sys.executable, __file__, "--dump"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    pandas_ = _roda_backend("pandas")
+    duck = _roda_backend("duckdb")
+
+    divergencias = 0
+    for a, b in zip(pandas_, duck):
+        for parte in ("kpis", "graficos", "tabela", "avisos"):
+            if not _iguais(a[parte], b[parte]):
+                divergencias += 1
+                ufs_sel, sexo, faixa, anos_sel = a["estado"]
+                print(f"❌ {parte} diverge em {anos_sel} {sexo} / {faixa} ({len(ufs_sel)} UFs)")
+
+    if len(pandas_) != len(duck):
+        divergencias += 1
+        print(f"❌ número de estados diferente: {len(pandas_)} x {len(duck)}")
+
+    if divergencias:
+        sys.exit(1)
+    print(f"✅ pandas e DuckDB iguais em {len(pandas_)} combinações de filtro (KPIs, gráficos e tabela).")
+
+
+if __name__ == "__main__":
+    if "--dump" in sys.argv:
+        print(json.dumps(dump(), ensure_ascii=False, default=str))
+    else:
+        main()
@@ -0,0 +1,255 @@
+"""
+Loaders do SIDRA (e _padroniza_uf) como estavam antes do motor único
+(SidraSpec) e da dimensão de UFs (dim_uf.py).
+
+Mantidos aqui, sem alterações, só como referência para os benchmarks:
+bench_sidra_parser.py compara tempo e resultado com parse_sidra.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+
+# ===============================
+# HELPER: PADRONIZA UFs
+# ===============================
+
+def _padroniza_uf(serie_uf: pd.Series) -> pd.Series:
+    """
+    Padroniza nomes de UF para evitar duplicação:
+    - remove espaços extras
+    - remove acentos para comparar
+    - mapeia para um nome canônico (com acento correto)
+    """
+    s = serie_uf.astype(str).str.strip()
+
+    # remove acentos e deixa maiúsculo para chave do dicionário
+    chave = (
+        s.str.normalize("NFKD")
+         .str.encode("ascii", "ignore")
+         .str.decode("ascii")
+         .str.upper()
+    )
+
+    mapa_uf = {
+        "ACRE": "Acre",
+        "ALAGOAS": "Alagoas",
+        "AMAPA": "Amapá",
+        "AMAZONAS": "Amazonas",
+        "BAHIA": "Bahia",
+        "CEARA": "Ceará",
+        "DISTRITO FEDERAL": "Distrito Federal",
+        "ESPIRITO SANTO": "Espírito Santo",
+        "GOIAS": "Goiás",
+        "MARANHAO": "Maranhão",
+        "MATO GROSSO": "Mato Grosso",
+        "MATO GROSSO DO SUL": "Mato Grosso do Sul",
+        "MINAS GERAIS": "Minas Gerais",
+        "PARA": "Pará",
+        "PARAIBA": "Paraíba",
+        "PARANA": "Paraná",
+        "PERNAMBUCO": "Pernambuco",
+        "PIAUI": "Piauí",
+        "RIO DE JANEIRO": "Rio de Janeiro",
+        "RIO GRANDE DO NORTE": "Rio Grande do Norte",
+        "RIO GRANDE DO SUL": "Rio Grande do Sul",
+        "RONDONIA": "Rondônia",
+        "RORAIMA": "Roraima",
+        "SANTA CATARINA": "Santa Catarina",
+        "SAO PAULO": "São Paulo",
+        "SERGIPE": "Sergipe",
+        "TOCANTINS": "Tocantins",
+        "BRASIL": "Brasil",
+    }
+
+    return chave.map(mapa_uf).fillna(s)
+
+
+# ===============================
+# FUNÇÃO BASE PARA CSV DO SIDRA (TRANSPOSTO)
+# ===============================
+
+def _load_sidra_transposto(csv_path: Path) -> pd.DataFrame:
+    """
+    Lê CSV exportado do SIDRA no formato 'transposto':
+    - primeiras linhas = metadados
+    - cabeçalho com UFs nas colunas
+    - última linha (Fonte) removida
+
+    Retorna um DataFrame longo com colunas:
+    UF | valor
+    """
+
+    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=6)
+
+    # Remove linha da fonte (geralmente começa com "Fonte:")
+    primeira_col = df.columns[0]
+    df = df[~df[primeira_col].astype(str).str.contains("Fonte:", na=False)]
+
+    # Remove colunas indesejadas, como "Notas" ou vazias
+    colunas_remover = [
+        c for c in df.columns
+        if isinstance(c, str) and ("Notas" in c or c.strip() == "")
+    ]
+    if colunas_remover:
+        print("Removendo colunas extras:", colunas_remover)
+        df = df.drop(columns=colunas_remover, errors="ignore")
+
+    # Remove qualquer linha que contenha "Notas"
+    df = df[~df.apply(lambda row: row.astype(str).str.contains("Notas").any(), axis=1)]
+
+    # Derrete colunas de UF em linhas
+    long_df = df.melt(var_name="UF", value_name="valor")
+
+    # PADRONIZA UFs
+    long_df["UF"] = _padroniza_uf(long_df["UF"])
+
+    # Limpa vírgula decimal → ponto, espaços, etc.
+    long_df["valor"] = (
+        long_df["valor"]
+        .astype(str)
+        .str.replace(",", ".", regex=False)
+        .str.replace(" ", "")
+    )
+
+    # Converte para número, ignorando erros
+    long_df["valor"] = pd.to_numeric(long_df["valor"], errors="coerce")
+
+    # Remove linhas sem valor numérico
+    long_df = long_df.dropna(subset=["valor"])
+
+    return long_df
+
+
+# ===============================
+# VARIAÇÃO: COM GRUPO (NÃO USADA EM IDADE AGORA, MAS MANTIDA)
+# ===============================
+
+def _load_sidra_transposto_com_grupo(csv_path: Path, nome_col_grupo: str) -> pd.DataFrame:
+    """
+    Versão do loader que preserva a 1ª coluna como um 'grupo'
+    (ex: faixa de idade).
+
+    Retorna um DataFrame longo com colunas:
+    nome_col_grupo | UF | valor
+    """
+
+    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=6)
+
+    # Remove linha da fonte (geralmente começa com "Fonte:")
+    primeira_col = df.columns[0]
+    df = df[~df[primeira_col].astype(str).str.contains("Fonte:", na=False)]
+
+    # Remove colunas indesejadas, como "Notas" ou vazias
+    colunas_remover = [
+        c for c in df.columns
+        if isinstance(c, str) and ("Notas" in c or c.strip() == "")
+    ]
+    if colunas_remover:
+        print("Removendo colunas extras:", colunas_remover)
+        df = df.drop(columns=colunas_remover, errors="ignore")
+
+    # Remove qualquer linha que contenha "Notas"
+    df = df[~df.apply(lambda row: row.astype(str).str.contains("Notas").any(), axis=1)]
+
+    # Renomeia a 1ª coluna para o nome do grupo (ex.: "faixa_idade")
+    df = df.rename(columns={primeira_col: nome_col_grupo})
+
+    # Derrete as UFs em linhas, preservando o grupo
+    long_df = df.melt(
+        id_vars=[nome_col_grupo],
+        var_name="UF",
+        value_name="valor"
+    )
+
+    # PADRONIZA UFs
+    long_df["UF"] = _padroniza_uf(long_df["UF"])
+
+    # Limpa vírgula decimal → ponto, espaços, etc.
+    long_df["valor"] = (
+        long_df["valor"]
+        .astype(str)
+        .str.replace(",", ".", regex=False)
+        .str.replace(" ", "")
+    )
+
+    # Converte para número, ignorando erros
+    long_df["valor"] = pd.to_numeric(long_df["valor"], errors="coerce")
+
+    # Remove linhas sem valor numérico
+    long_df = long_df.dropna(subset=["valor"])
+
+    return long_df
+
+# ===============================
+# TABELA 4695 — IDADE × UF (FORMATO LONGO)
+# ===============================
+
+def load_pns_depressao_idade(csv_path: Path) -> pd.DataFrame:
+    """
+    Lê o CSV da tabela 4695 NO FORMATO LONGO, como você mostrou:
+    "Grupo de idade";"Unidade da Federação";""
+    "18 a 29 anos";"Rondônia";"7,2"
+    ...
+
+    Converte para o padrão do projeto.
+    """
+    # pula as 4 primeiras linhas de metadados e usa a 5ª como cabeçalho
+    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=4, header=0)
+
+    # Garante nomes de colunas (independe do nome exato da terceira)
+    cols = df.columns.tolist()
+    # Esperado: [ "Grupo de idade", "Unidade da Federação", <valor> ]
+    if len(cols) < 3:
+        raise ValueError(f"CSV de idade tem menos de 3 colunas: {cols}")
+
+    df = df.rename(
+        columns={
+            cols[0]: "faixa_idade",
+            cols[1]: "UF",
+            cols[2]: "valor",
+        }
+    )
+
+    # Remove linha de Fonte, se existir
+    df = df[~df["faixa_idade"].astype(str).str.contains("Fonte", na=False)]
+
+    # Tira espaços e padroniza
+    df["faixa_idade"] = df["faixa_idade"].astype(str).str.strip()
+    df["UF"] = _padroniza_uf(df["UF"])
+
+    # Limpa valor (vírgula → ponto)
+    df["valor"] = (
+        df["valor"]
+        .astype(str)
+        .str.replace(",", ".", regex=False)
+        .str.replace(" ", "")
+    )
+    df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
+    df = df.dropna(subset=["valor"])
+
+    # Remove linha agregada "Brasil", se tiver
+    df = df[df["UF"] != "Brasil"]
+
+    # Adiciona colunas fixas
+    df["year"] = 2019
+    df["sexo"] = "Total"      # tabela já é agregada (Total)
+    df["domicilio"] = "Total"
+    df["indicador"] = "depressao_diagnosticada_percentual"
+    df["transtorno"] = "Depressão"
+
+    df = df[
+        [
+            "year",
+            "UF",
+            "sexo",
+            "faixa_idade",
+            "domicilio",
+            "transtorno",
+            "indicador",
+            "valor",
+        ]
+    ]
+
+    return df
+
@@ -0,0 +1,332 @@
+"""
+Teste de carga headless do dashboard (src/dashboard_streamlit.py).
+
+Simula N sessões simultâneas com a API de testes do Streamlit (AppTest):
+cada sessão abre o painel e faz uma sequência aleatória de trocas de filtro
+(UFs, sexo, faixa de idade), como um usuário real.
+
+Relata:
+- latência de rerun (p50/p95/p99/máx) e vazão (reruns por segundo), com
+  as N sessões disputando a CPU ao mesmo tempo. O AppTest não roda em
+  várias threads de um mesmo processo, então cada sessão tem o seu
+  processo (com caches já aquecidos); todas começam juntas numa barreira.
+- memória por sessão aberta e memória que sobra depois que as sessões
+  são descartadas: N sessões em sequência num só processo, compartilhando
+  st.cache_data/st.cache_resource como no servidor (tracemalloc, numa
+  fase à parte para não distorcer a latência)
+- partida a frio: um processo Python novo por medida, do início do
+  interpretador até a primeira tela pronta, com o snapshot Arrow do ETL
+  e lendo as partições (NEUROPULSE_SNAPSHOT=0); é o tempo que um worker
+  novo leva para atender
+
+Uso:
+    python benchmarks/load_dashboard.py [--sessoes N] [--passos K] [--seed S]
+        [--partidas P] [--saida resultado.json]
+"""
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "src"))  # o `streamlit run` faz isso sozinho
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PADRAO = RAIZ / "src" / "dashboard_streamlit.py"
+
+
+# ===============================
+# UMA SESSÃO
+# ===============================
+
+def _widget(lista, rotulo: str):
+    return next(w for w in lista if w.label == rotulo)
+
+
+def abre_sessao(app: Path) -> AppTest:
+    at = AppTest.from_file(str(app), default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+
+def troca_filtro(at: AppTest, rng: random.Random) -> None:
+    """Muda um filtro da sidebar ao acaso (sem rodar o script)."""
+    ufs = _widget(at.multiselect, "Estados (UF)")
+    sexo = _widget(at.selectbox, "Sexo")
+    faixa = _widget(at.selectbox, "Faixa de idade")
+
+    acao = rng.choice(["ufs", "sexo", "faixa"])
+    if acao == "ufs":
+        # Quase sempre um subconjunto; às vezes volta para "todas"
+        if rng.random() < 0.3:
+            ufs.set_value(list(ufs.options))
+        else:
+            ufs.set_value(rng.sample(list(ufs.options), rng.randint(1, len(ufs.options))))
+    elif acao == "sexo":
+        sexo.set_value(rng.choice(sexo.options))
+    else:
+        faixa.set_value(rng.choice(faixa.options))
+
+
+def roda_sessao(app: Path, passos: int, seed: int) -> list:
+    """Abre uma sessão e devolve a latência (s) de cada rerun."""
+    rng = random.Random(seed)
+    latencias = []
+
+    inicio = time.perf_counter()
+    at = abre_sessao(app)
+    latencias.append(time.perf_counter() - inicio)
+
+    for _ in range(passos):
+        troca_filtro(at, rng)
+        inicio = time.perf_counter()
+        at.run()
+        latencias.append(time.perf_counter() - inicio)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    return latencias
+
+
+# ===============================
+# FASES DO TESTE
+# ===============================
+
+def _trabalhador(app: Path, passos: int, seed: int, barreira, fila) -> None:
+    """Processo de uma sessão: aquece os caches, espera as outras e mede."""
+    try:
+        roda_sessao(app, passos=0, seed=seed)
+        barreira.wait()
+        inicio = time.time()
+        latencias = roda_sessao(app, passos, seed)
+        fila.put((inicio, time.time(), latencias, None))
+    except Exception as erro:  # noqa: BLE001 - repassa para o processo principal
+        barreira.abort()
+        fila.put((None, None, None, repr(erro)))
+
+
+def fase_latencia(app: Path, sessoes: int, passos: int, seed: int) -> dict:
+    """Todas as sessões ao mesmo tempo, um processo por sessão."""
+    barreira = mp.Barrier(sessoes)
+    fila = mp.Queue()
+    processos = [
+        mp.Process(target=_trabalhador, args=(app, passos, seed + i, barreira, fila))
+        for i in range(sessoes)
+    ]
+    for proc in processos:
+        proc.start()
+    resultados = [fila.get() for _ in processos]
+    for proc in processos:
+        proc.join()
+
+    erros = [erro for *_, erro in resultados if erro]
+    if erros:
+        raise RuntimeError(f"{len(erros)} sessão(ões) falharam: {erros[0]}")
+
+    duracao = max(fim for _, fim, _, _ in resultados) - min(ini for ini, _, _, _ in resultados)
+    latencias = np.array([lat for *_, sessao, _ in resultados for lat in sessao]) * 1000
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {
+        "reruns": int(latencias.size),
+        "duracao_s": round(duracao, 3),
+        "vazao_reruns_s": round(latencias.size / duracao, 2),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(latencias.max()), 1),
+    }
+
+
+def fase_memoria(app: Path, sessoes: int, passos: int, seed: int) -> dict:
+    """
+    Memória alocada (tracemalloc) por sessão aberta e a que fica retida
+    depois que todas as sessões são descartadas (vazamento entre sessões
+    ou caches compartilhados crescendo).
+
+    A curva guarda a memória após cada sessão aberta: com o dataset
+    compartilhado pelo processo (st.cache_resource) os incrementos devem
+    ficar planos, sem uma cópia dos dados por sessão.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+
+        abertas = []
+        curva = []
+        rng = random.Random(seed)
+        for _ in range(sessoes):
+            at = abre_sessao(app)
+            for _ in range(passos):
+                troca_filtro(at, rng)
+                at.run()
+            abertas.append(at)
+            gc.collect()
+            curva.append(tracemalloc.get_traced_memory()[0] - base)
+
+        gc.collect()
+        com_sessoes, pico = tracemalloc.get_traced_memory()
+
+        abertas.clear()
+        gc.collect()
+        depois, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mb = 1024**2
+    incrementos = np.diff([0] + curva) / mb
+    # 1ª sessão fora: ela ainda pode aquecer caches de figura/consulta
+    seguintes = incrementos[1:] if len(incrementos) > 1 else incrementos
+    return {
+        "por_sessao_mb": round((com_sessoes - base) / sessoes / mb, 3),
+        "curva_mb": [round(v / mb, 3) for v in curva],
+        "incremento_mediano_mb": round(float(np.median(seguintes)), 3),
+        "incremento_max_mb": round(float(seguintes.max()), 3),
+        "pico_mb": round((pico - base) / mb, 3),
+        "retido_apos_fechar_mb": round((depois - base) / mb, 3),
+    }
+
+
+# Roda num processo novo: mede o import do Streamlit e o 1º run do painel
+# e lista quais módulos pesados já foram importados depois dele
+_PARTIDA = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[2])
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+pesados = ["plotly.express", "duckdb", "pyarrow.dataset", "pandas"]
+print(json.dumps({
+    "import_s": t1 - t0,
+    "primeiro_run_s": t2 - t1,
+    "erro": at.exception[0].message if at.exception else None,
+    "modulos": [m for m in pesados if m in sys.modules],
+}), flush=True)
+"""
+
+MODOS_PARTIDA = {"snapshot": {"NEUROPULSE_SNAPSHOT": "1"}, "particoes": {"NEUROPULSE_SNAPSHOT": "0"}}
+
+
+def _mediana_ms(medidas: list, campo: str) -> float:
+    return round(float(np.median([m[campo] for m in medidas])) * 1000, 1)
+
+
+def fase_partida(app: Path, repeticoes: int) -> dict:
+    """
+    Partida a frio por modo (mediana de `repeticoes` processos novos):
+    total = do spawn do interpretador ao fim do 1º run (sem o encerramento).
+    """
+    resultado = {}
+    for modo, env in MODOS_PARTIDA.items():
+        medidas = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, "-c", _PARTIDA, str(app), str(RAIZ / "src")],
+                env={**os.environ, **env},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            # Até a linha do resultado: o encerramento do processo não conta
+            linha = proc.stdout.readline()
+            total = time.perf_counter() - inicio
+            proc.wait()
+            if not linha:
+                raise RuntimeError(f"partida ({modo}) terminou sem resultado (código {proc.returncode})")
+            medida = json.loads(linha)
+            if medida["erro"]:
+                raise RuntimeError(f"partida ({modo}) falhou: {medida['erro']}")
+            medidas.append({**medida, "total_s": total})
+
+        resultado[modo] = {
+            "total_ms": _mediana_ms(medidas, "total_s"),
+            "import_streamlit_ms": _mediana_ms(medidas, "import_s"),
+            "primeiro_run_ms": _mediana_ms(medidas, "primeiro_run_s"),
+            "modulos_pesados": medidas[-1]["modulos"],
+        }
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", type=Path, default=APP_PADRAO)
+    parser.add_argument("--sessoes", type=int, default=20, help="sessões simultâneas")
+    parser.add_argument("--passos", type=int, default=15, help="trocas de filtro por sessão")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--partidas", type=int, default=5, help="processos novos por modo na partida a frio (0 = pula)"
+    )
+    parser.add_argument("--saida", type=Path, help="grava o resultado em JSON")
+    cli = parser.parse_args()
+
+    partida = None
+    if cli.partidas:
+        print(f"▶ Partida a frio ({cli.partidas} processos novos por modo)")
+        partida = fase_partida(cli.app, cli.partidas)
+        for modo, medida in partida.items():
+            print(
+                f"  {modo:<10} total {medida['total_ms']:.0f} ms · import streamlit "
+                f"{medida['import_streamlit_ms']:.0f} ms · 1º run {medida['primeiro_run_ms']:.0f} ms "
+                f"· carregados: {', '.join(medida['modulos_pesados']) or '-'}"
+            )
+
+    print(f"▶ {cli.sessoes} sessões simultâneas × {cli.passos} trocas de filtro")
+    latencia = fase_latencia(cli.app, cli.sessoes, cli.passos, cli.seed)
+    print(
+        f"  reruns: {latencia['reruns']} em {latencia['duracao_s']:.1f} s "
+        f"({latencia['vazao_reruns_s']:.1f} reruns/s)"
+    )
+    print(
+        f"  latência p50 {latencia['p50_ms']:.0f} ms · p95 {latencia['p95_ms']:.0f} ms · "
+        f"p99 {latencia['p99_ms']:.0f} ms · máx {latencia['max_ms']:.0f} ms"
+    )
+
+    print("▶ Memória (tracemalloc, sessões em sequência)")
+    roda_sessao(cli.app, passos=0, seed=cli.seed)  # caches aquecidos antes de medir
+    memoria = fase_memoria(cli.app, cli.sessoes, cli.passos, cli.seed)
+    print(
+        f"  por sessão {memoria['por_sessao_mb']:.2f} MB · pico {memoria['pico_mb']:.1f} MB · "
+        f"retido após fechar {memoria['retido_apos_fechar_mb']:.2f} MB"
+    )
+    print(
+        f"  incremento por sessão adicionada: mediana {memoria['incremento_mediano_mb']:.2f} MB · "
+        f"máx {memoria['incremento_max_mb']:.2f} MB"
+    )
+    print("  curva (MB após cada sessão): " + " ".join(f"{v:.1f}" for v in memoria["curva_mb"]))
+
+    if cli.saida:
+        cli.saida.write_text(
+            json.dumps(
+                {
+                    "sessoes": cli.sessoes,
+                    "passos": cli.passos,
+                    "seed": cli.seed,
+                    "partida": partida,
+                    "latencia": latencia,
+                    "memoria": memoria,
+                },
+                indent=2,
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Relatório de memória da base em memória: layout antigo x layout compacto.
+
+Gera as tabelas do SIDRA (sidra_sintetico) em cada escala, roda o ETL e
+compara, coluna a coluna (DataFrame.memory_usage(deep=True)):
+
+- antigo: o CSV lido pelo pandas como era no dashboard (texto como object,
+  year/cod_uf int64, uf_iso object), deduplicado
+  (cod_uf com nulos, de UFs fora da dimensão, fica float64 nos dois)
+- compacto: o dataset particionado lido pelo store (texto como categoria,
+  year int16, cod_uf int8, dimensões constantes só nos metadados), mais os
+  arrays auxiliares do NeuroPulseStore
+
+Uso:
+    python benchmarks/memoria_layout.py [--escalas 1 100] [--saida memoria.json]
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import etl_neuropulse as etl  # noqa: E402
+import sidra_sintetico  # noqa: E402
+from bench_suite import _etl_em, _silencioso  # noqa: E402
+from dim_uf import ISO_POR_CODIGO  # noqa: E402
+from particoes_neuropulse import le_constantes, le_particoes  # noqa: E402
+from store_neuropulse import NeuroPulseStore  # noqa: E402
+
+pd.set_option("mode.copy_on_write", True)
+
+CHAVE_LINHA = ["year", "UF", "sexo", "faixa_idade", "domicilio", "indicador"]
+MB = 1024**2
+
+
+def layout_antigo(csv_path: Path) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    df["uf_iso"] = df["cod_uf"].map(ISO_POR_CODIGO)
+    return df.drop_duplicates(subset=CHAVE_LINHA)
+
+
+def layout_compacto(dataset: Path) -> NeuroPulseStore:
+    # Como o dashboard carrega hoje: o ETL já entrega chave única
+    return NeuroPulseStore(le_particoes(dataset).to_pandas(), le_constantes(dataset))
+
+
+def por_coluna(df: pd.DataFrame) -> dict:
+    uso = df.memory_usage(deep=True, index=False)
+    return {
+        col: {"dtype": str(df[col].dtype), "mb": round(uso[col] / MB, 4)}
+        for col in df.columns
+    }
+
+
+def roda_escala(escala: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        sidra_sintetico.escreve_fontes_pns(pasta / "raw", escala=escala)
+        with _etl_em(pasta):
+            nivel = sidra_sintetico.nivel_sexo(escala)
+            _silencioso(lambda: etl.build_neuropulse_base(usar_cache=False, nivel=nivel))()
+            antigo = layout_antigo(etl.OUT_CSV)
+            store = layout_compacto(etl.OUT_DATASET)
+
+    total_antigo = antigo.memory_usage(deep=True, index=True).sum()
+    total_compacto = store.bytes_memoria()
+    return {
+        "linhas": len(antigo),
+        "antigo_mb": round(total_antigo / MB, 3),
+        "compacto_mb": round(total_compacto / MB, 3),
+        "reducao": round(total_antigo / total_compacto, 2) if total_compacto else None,
+        "constantes": store.constantes,
+        "colunas_antigo": por_coluna(antigo),
+        "colunas_compacto": por_coluna(store.df),
+    }
+
+
+def imprime(escala: int, r: dict) -> None:
+    print(f"▶ Escala {escala}× ({r['linhas']} linhas)")
+    print(f"  {'coluna':<14}{'antigo':>22}{'compacto':>24}")
+    for col, info in r["colunas_antigo"].items():
+        novo = r["colunas_compacto"].get(col)
+        if novo:
+            compacto = f"{novo['dtype']:>12} {novo['mb']:>9.3f} MB"
+        else:
+            # constante (vai para os metadados) ou coluna que não existe mais
+            destino = "metadado" if col in r["constantes"] else "removida"
+            compacto = f"{destino:>12} {0:>9.3f} MB"
+        print(f"  {col:<14}{info['dtype']:>10} {info['mb']:>9.3f} MB{compacto}")
+    print(
+        f"  total: {r['antigo_mb']:.3f} MB → {r['compacto_mb']:.3f} MB "
+        f"(store inteiro, {r['reducao']}× menor)"
+    )
+    if r["constantes"]:
+        print(f"  constantes: {', '.join(f'{k}={v}' for k, v in r['constantes'].items())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--saida", type=Path, help="grava o resultado em JSON")
+    cli = parser.parse_args()
+
+    resultado = {}
+    for escala in cli.escalas:
+        resultado[str(escala)] = roda_escala(escala)
+        imprime(escala, resultado[str(escala)])
+
+    if cli.saida:
+        cli.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
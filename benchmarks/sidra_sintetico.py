@@ -0,0 +1,146 @@
+"""
+Gerador de CSVs sintéticos no formato exportado pelo SIDRA.
+
+Reproduz o que os loaders do ETL precisam tratar:
+- encoding latin1 e separador ";"
+- linhas de metadados antes do cabeçalho
+- vírgula decimal e símbolos do SIDRA ("-", "..", "...", "X")
+- coluna "Notas" e rodapé com "Fonte:" e "Notas"
+"""
+import random
+from pathlib import Path
+
+UFS = [
+    "Rondônia", "Acre", "Amazonas", "Roraima", "Pará", "Amapá", "Tocantins",
+    "Maranhão", "Piauí", "Ceará", "Rio Grande do Norte", "Paraíba",
+    "Pernambuco", "Alagoas", "Sergipe", "Bahia", "Minas Gerais",
+    "Espírito Santo", "Rio de Janeiro", "São Paulo", "Paraná",
+    "Santa Catarina", "Rio Grande do Sul", "Mato Grosso do Sul",
+    "Mato Grosso", "Goiás", "Distrito Federal",
+]
+
+SIMBOLOS = ["-", "..", "...", "X"]
+
+FAIXAS_IDADE = [
+    "18 a 29 anos", "30 a 59 anos", "60 a 64 anos", "65 a 74 anos", "75 anos ou mais",
+]
+
+
+def nomes_entidades(n: int) -> list:
+    """As 27 UFs e, acima disso, municípios fictícios (escala municipal)."""
+    nomes = UFS[:n]
+    nomes += [f"Município {i:05d}" for i in range(n - len(nomes))]
+    return nomes
+
+
+def nomes_grupos(n: int) -> list:
+    """As 5 faixas de idade da PNS e, acima disso, grupos fictícios."""
+    nomes = FAIXAS_IDADE[:n]
+    nomes += [f"Grupo {i:06d}" for i in range(n - len(nomes))]
+    return nomes
+
+
+def _valor(rng: random.Random, prop_simbolos: float) -> str:
+    if rng.random() < prop_simbolos:
+        return rng.choice(SIMBOLOS)
+    return f"{rng.uniform(0, 30):.1f}".replace(".", ",")
+
+
+def escreve_transposto(
+    path: Path,
+    n_linhas: int,
+    n_entidades: int = 27,
+    prop_simbolos: float = 0.02,
+    seed: int = 42,
+    sexo: str = "Total",
+) -> Path:
+    """
+    Tabela "transposta" (como a 4694): 6 linhas de metadados, cabeçalho com
+    as entidades nas colunas e `n_linhas` linhas de valores.
+    """
+    rng = random.Random(seed)
+    entidades = nomes_entidades(n_entidades)
+
+    with open(path, "w", encoding="latin1", newline="") as f:
+        f.write("Tabela 4694 - Pessoas de 18 anos ou mais de idade que referem diagnóstico de depressão\n")
+        f.write("Variável - Percentual de pessoas (%)\n")
+        f.write(f"Sexo - {sexo}\n")
+        f.write("Ano - 2019\n")
+        f.write("Situação do domicílio - Total\n")
+        f.write("\n")
+
+        cabecalho = ['"Brasil e Unidade da Federação"'] + [f'"{e}"' for e in entidades] + ['"Notas"']
+        f.write(";".join(cabecalho) + "\n")
+
+        for i in range(n_linhas):
+            linha = [f'"Grupo {i:06d}"'] + [f'"{_valor(rng, prop_simbolos)}"' for _ in entidades] + ['""']
+            f.write(";".join(linha) + "\n")
+
+        f.write('"Fonte: IBGE - Pesquisa Nacional de Saúde"\n')
+        f.write('"Notas"\n')
+        f.write('"1 - Os dados da última coluna são preliminares"\n')
+
+    return path
+
+
+def escreve_longo(
+    path: Path,
+    n_grupos: int,
+    n_entidades: int = 27,
+    prop_simbolos: float = 0.02,
+    seed: int = 42,
+) -> Path:
+    """
+    Tabela em formato longo (como a 4695): 4 linhas de metadados,
+    cabeçalho "Grupo de idade";"Unidade da Federação";"" e uma linha por
+    grupo × entidade, incluindo o agregado "Brasil".
+    """
+    rng = random.Random(seed)
+    entidades = nomes_entidades(n_entidades) + ["Brasil"]
+    grupos = nomes_grupos(n_grupos)
+
+    with open(path, "w", encoding="latin1", newline="") as f:
+        f.write("Tabela 4695 - Pessoas de 18 anos ou mais de idade que referem diagnóstico de depressão\n")
+        f.write("Variável - Percentual de pessoas (%)\n")
+        f.write("Ano - 2019\n")
+        f.write("\n")
+        f.write('"Grupo de idade";"Unidade da Federação";""\n')
+
+        for g in grupos:
+            for e in entidades:
+                f.write(f'"{g}";"{e}";"{_valor(rng, prop_simbolos)}"\n')
+
+        f.write('"Fonte: IBGE - Pesquisa Nacional de Saúde";"";""\n')
+
+    return path
+
+
+def nivel_sexo(escala: int) -> str:
+    """
+    Nível geográfico (SidraSpec.nivel) das tabelas de sexo na `escala`:
+    acima de 1×, com municípios, elas são exportações municipais.
+    """
+    return "uf" if escala <= 1 else "municipio"
+
+
+def escreve_fontes_pns(pasta: Path, escala: int = 1, seed: int = 42) -> Path:
+    """
+    Os quatro arquivos que o ETL espera em data/raw, com o layout real e
+    `escala` vezes o tamanho atual:
+    - tabelas de sexo (4694): 27 × escala entidades (acima de 27, municípios)
+    - tabela de idade (4695): 5 × escala grupos de idade, 27 UFs + Brasil
+    """
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    for i, sexo in enumerate(["Total", "Masculino", "Feminino"]):
+        escreve_transposto(
+            pasta / f"pns_depressao_sexo_{sexo.lower()}.csv",
+            n_linhas=1,
+            n_entidades=27 * escala,
+            seed=seed + i,
+            sexo=sexo,
+        )
+
+    escreve_longo(pasta / "pns_depressao_uf_idade.csv", n_grupos=5 * escala, seed=seed + 3)
+    return pasta
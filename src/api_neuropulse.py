@@ -0,0 +1,393 @@
+import argparse
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pyarrow as pa
+
+from particoes_neuropulse import (
+    CARIMBO_FILE,
+    SCHEMA_NEUROPULSE,
+    anos_disponiveis,
+    le_constantes,
+    le_particoes,
+    pasta_versao,
+    versao_publicada,
+)
+from store_neuropulse import NeuroPulseStore
+
+# ===============================
+# API HTTP DE CONSULTA (SÓ LEITURA)
+# ===============================
+# Serviço local, só com a biblioteca padrão (http.server) + pandas/pyarrow
+# do próprio projeto, para quem hoje raspa o Streamlit ou copia o CSV:
+#
+#   GET /opcoes                 valores de cada filtro (anos, UFs, sexos...)
+#   GET /dados?filtros          linhas filtradas
+#   GET /agregado?filtros&por=  média, n, mín e máx (por grupo, opcional)
+#   GET /versao                 versão do dataset publicado
+#
+# Filtros: UF, sexo, faixa_idade, year, indicador (repetidos ou separados
+# por vírgula). Formato: ?formato=json|csv|arrow ou cabeçalho Accept.
+#
+# Os stores (um por seleção de anos) ficam num pool compartilhado pelas
+# threads, as respostas num cache LRU, e cada resposta leva um ETag ligado à
+# versão do dataset: com If-None-Match igual, a resposta é 304 sem consulta.
+#
+# Uso:
+#     python src/api_neuropulse.py [--host 127.0.0.1] [--porta 8765]
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATASET_PATH = BASE_DIR / "data" / "processed" / "neuropulse_pns_depressao"
+
+FILTROS_API = ["UF", "sexo", "faixa_idade", "year", "indicador"]
+AGRUPAVEIS = FILTROS_API
+
+FORMATOS = {
+    "json": "application/json; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+POOL_STORES = 8                # seleções de anos com store carregado
+LIMITE_CACHE_MB = 64           # orçamento do cache de respostas
+INTERVALO_VERSAO = 1.0         # segundos entre verificações da versão
+
+
+class ErroConsulta(ValueError):
+    """Parâmetro inválido na consulta (vira HTTP 400)."""
+
+
+# ===============================
+# POOL DE STORES E CACHE DE RESPOSTAS
+# ===============================
+
+class PoolStores:
+    """
+    Um NeuroPulseStore por (versão do dataset, anos), compartilhado entre as
+    threads do servidor. Guarda os `limite` usados mais recentemente; uma
+    versão nova do dataset simplesmente gera chaves novas.
+    """
+
+    def __init__(self, pasta: Path, limite: int = POOL_STORES):
+        self.pasta = Path(pasta)
+        self.limite = limite
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+        self._carregando = {}  # chave -> Lock (duas threads não leem a mesma seleção)
+
+    def obtem(self, versao: str, anos: tuple) -> NeuroPulseStore:
+        chave = (versao, anos)
+        with self._lock:
+            if chave in self._stores:
+                self._stores.move_to_end(chave)
+                return self._stores[chave]
+            trava = self._carregando.setdefault(chave, threading.Lock())
+
+        with trava:
+            with self._lock:
+                if chave in self._stores:
+                    return self._stores[chave]
+            store = self._carrega(versao, anos)
+            with self._lock:
+                self._stores[chave] = store
+                self._carregando.pop(chave, None)
+                while len(self._stores) > self.limite:
+                    self._stores.popitem(last=False)
+            return store
+
+    def _carrega(self, versao: str, anos: tuple) -> NeuroPulseStore:
+        # A pasta da versão da chave, não o link (trocado depois do carimbo)
+        pasta = pasta_versao(self.pasta, versao)
+        # O dataset sai validado do ETL (chave única): sem dedup na carga
+        df = le_particoes(pasta, anos=anos).to_pandas()
+        return NeuroPulseStore(df, le_constantes(pasta))
+
+
+class CacheRespostas:
+    """Cache LRU de respostas prontas (bytes) com orçamento de memória."""
+
+    def __init__(self, limite_bytes: int = LIMITE_CACHE_MB * 1024 * 1024):
+        self.limite_bytes = int(limite_bytes)
+        self._entradas = OrderedDict()  # chave -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obtem(self, chave, constroi):
+        with self._lock:
+            corpo = self._entradas.get(chave)
+            if corpo is not None:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return corpo
+            self.misses += 1
+
+        corpo = constroi()
+        if len(corpo) <= self.limite_bytes:
+            with self._lock:
+                if chave not in self._entradas:
+                    self._entradas[chave] = corpo
+                    self._bytes += len(corpo)
+                while self._bytes > self.limite_bytes:
+                    _, antigo = self._entradas.popitem(last=False)
+                    self._bytes -= len(antigo)
+        return corpo
+
+
+# ===============================
+# CONSULTAS
+# ===============================
+
+def _valores(params: dict, nome: str) -> list:
+    """?x=a&x=b ou ?x=a,b -> ["a", "b"] (vazio: sem filtro)."""
+    valores = []
+    for bruto in params.get(nome, []):
+        valores += [v.strip() for v in bruto.split(",") if v.strip()]
+    return valores
+
+
+def normaliza_consulta(params: dict) -> dict:
+    """Filtros validados e ordenados (a mesma consulta sempre vira a mesma chave)."""
+    conhecidos = set(FILTROS_API) | {"por", "formato"}
+    desconhecidos = sorted(set(params) - conhecidos)
+    if desconhecidos:
+        raise ErroConsulta(f"Parâmetros desconhecidos: {', '.join(desconhecidos)}")
+
+    consulta = {nome: tuple(sorted(set(_valores(params, nome)))) for nome in FILTROS_API}
+    try:
+        consulta["year"] = tuple(sorted({int(a) for a in consulta["year"]}))
+    except ValueError:
+        raise ErroConsulta("year deve ser inteiro (ex.: year=2019)") from None
+
+    por = _valores(params, "por")
+    invalidos = [p for p in por if p not in AGRUPAVEIS]
+    if invalidos:
+        raise ErroConsulta(f"Não dá para agrupar por {', '.join(invalidos)}")
+    consulta["por"] = tuple(dict.fromkeys(por))
+    return consulta
+
+
+class ConsultasNeuroPulse:
+    """Responde as rotas da API a partir do pool de stores."""
+
+    def __init__(self, pasta: Path = DATASET_PATH, pool: PoolStores = None,
+                 cache: CacheRespostas = None):
+        self.pasta = Path(pasta)
+        self.pool = pool or PoolStores(self.pasta)
+        self.cache = cache or CacheRespostas()
+        self._versao = None
+        self._versao_em = 0.0
+        self._lock = threading.Lock()
+
+    def versao(self) -> str:
+        """Versão do dataset, revista no máximo a cada INTERVALO_VERSAO segundos."""
+        with self._lock:
+            agora = time.monotonic()
+            if self._versao is None or agora - self._versao_em > INTERVALO_VERSAO:
+                # Carimbo do ETL, gravado ao lado do dataset antes da troca do link
+                self._versao = versao_publicada(self.pasta.parent / CARIMBO_FILE, self.pasta)
+                self._versao_em = agora
+            return self._versao
+
+    def etag(self, versao: str, rota: str, consulta: dict, formato: str) -> str:
+        chave = json.dumps([versao, rota, consulta, formato], sort_keys=True)
+        return '"' + hashlib.sha1(chave.encode()).hexdigest()[:20] + '"'
+
+    def _filtra(self, versao: str, consulta: dict) -> pd.DataFrame:
+        disponiveis = tuple(anos_disponiveis(pasta_versao(self.pasta, versao)))
+        anos = tuple(a for a in consulta["year"] if a in disponiveis) or disponiveis
+        store = self.pool.obtem(versao, anos)
+        if consulta["year"] and not set(consulta["year"]) & set(disponiveis):
+            df = store.df.iloc[:0]  # só anos que não existem: resultado vazio
+        else:
+            df = store.filter(
+                ufs=list(consulta["UF"]) or None,
+                sexo=list(consulta["sexo"]) or None,
+                faixa_idade=list(consulta["faixa_idade"]) or None,
+            )
+        # Dimensões constantes (fora das colunas do store) voltam para a resposta
+        df = store.com_constantes(df)[SCHEMA_NEUROPULSE.names]
+        if consulta["indicador"]:
+            df = df[df["indicador"].astype(str).isin(consulta["indicador"])]
+        return df
+
+    def opcoes(self, versao: str) -> dict:
+        anos = tuple(anos_disponiveis(pasta_versao(self.pasta, versao)))
+        store = self.pool.obtem(versao, anos)
+        df = store.com_constantes(store.df)
+        return {
+            "year": list(anos),
+            **{
+                col: sorted(df[col].astype(str).unique().tolist())
+                for col in ["UF", "sexo", "faixa_idade", "indicador"]
+            },
+        }
+
+    def dados(self, versao: str, consulta: dict) -> pd.DataFrame:
+        df = self._filtra(versao, consulta)
+        return df.reset_index(drop=True)
+
+    def agregado(self, versao: str, consulta: dict) -> pd.DataFrame:
+        df = self._filtra(versao, consulta)
+        por = list(consulta["por"])
+        if not por:
+            return pd.DataFrame(
+                [{
+                    "n": len(df),
+                    "media": df["valor"].mean(),
+                    "minimo": df["valor"].min(),
+                    "maximo": df["valor"].max(),
+                }]
+            )
+        return (
+            df.groupby(por, observed=True)["valor"]
+            .agg(n="count", media="mean", minimo="min", maximo="max")
+            .reset_index()
+        )
+
+
+# ===============================
+# SERIALIZAÇÃO
+# ===============================
+
+def serializa(df: pd.DataFrame, formato: str, versao: str) -> bytes:
+    if formato == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if formato == "arrow":
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        tabela = tabela.replace_schema_metadata(
+            {**(tabela.schema.metadata or {}), b"neuropulse_versao": versao.encode()}
+        )
+        saida = io.BytesIO()
+        with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return saida.getvalue()
+    linhas = json.loads(df.to_json(orient="records", force_ascii=False))
+    return json.dumps(
+        {"versao": versao, "n": len(linhas), "dados": linhas}, ensure_ascii=False
+    ).encode("utf-8")
+
+
+def escolhe_formato(params: dict, accept: str) -> str:
+    pedido = _valores(params, "formato")
+    if pedido:
+        if pedido[0] not in FORMATOS:
+            raise ErroConsulta(f"formato deve ser um de: {', '.join(FORMATOS)}")
+        return pedido[0]
+    accept = accept or ""
+    if "arrow" in accept:
+        return "arrow"
+    if "text/csv" in accept:
+        return "csv"
+    return "json"
+
+
+# ===============================
+# SERVIDOR HTTP
+# ===============================
+
+class HandlerNeuroPulse(BaseHTTPRequestHandler):
+    server_version = "NeuroPulseAPI/1.0"
+    consultas: ConsultasNeuroPulse = None  # definido em cria_servidor
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        rota = url.path.rstrip("/") or "/"
+        params = parse_qs(url.query)
+        try:
+            if rota == "/versao":
+                self._responde_json({"versao": self.consultas.versao()})
+            elif rota == "/opcoes":
+                versao = self._versao_ou_503()
+                if versao is not None:
+                    self._responde_cacheado(versao, rota, {}, "json")
+            elif rota in ("/dados", "/agregado"):
+                versao = self._versao_ou_503()
+                if versao is not None:
+                    consulta = normaliza_consulta(params)
+                    if rota == "/dados" and consulta["por"]:
+                        raise ErroConsulta("'por' só vale em /agregado")
+                    formato = escolhe_formato(params, self.headers.get("Accept"))
+                    self._responde_cacheado(versao, rota, consulta, formato)
+            else:
+                self._responde_json({"erro": f"rota desconhecida: {rota}"}, HTTPStatus.NOT_FOUND)
+        except ErroConsulta as erro:
+            self._responde_json({"erro": str(erro)}, HTTPStatus.BAD_REQUEST)
+
+    def _versao_ou_503(self):
+        versao = self.consultas.versao()
+        if not versao:
+            self._responde_json(
+                {"erro": "dataset ainda não foi gerado (rode o ETL)"},
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+            return None
+        return versao
+
+    def _responde_cacheado(self, versao, rota, consulta, formato):
+        etag = self.consultas.etag(versao, rota, consulta, formato)
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        def constroi():
+            if rota == "/opcoes":
+                opcoes = {"versao": versao, **self.consultas.opcoes(versao)}
+                return json.dumps(opcoes, ensure_ascii=False).encode("utf-8")
+            consulta_fn = self.consultas.dados if rota == "/dados" else self.consultas.agregado
+            return serializa(consulta_fn(versao, consulta), formato, versao)
+
+        corpo = self.consultas.cache.obtem(etag, constroi)
+        self._envia(corpo, FORMATOS[formato], HTTPStatus.OK, etag)
+
+    def _responde_json(self, dados: dict, status=HTTPStatus.OK):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self._envia(corpo, FORMATOS["json"], status)
+
+    def _envia(self, corpo: bytes, tipo: str, status, etag: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            # pode guardar, mas revalida (If-None-Match) a cada uso
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def cria_servidor(host: str = "127.0.0.1", porta: int = 8765,
+                  pasta: Path = DATASET_PATH) -> ThreadingHTTPServer:
+    handler = type(
+        "HandlerNeuroPulseLocal", (HandlerNeuroPulse,), {"consultas": ConsultasNeuroPulse(pasta)}
+    )
+    return ThreadingHTTPServer((host, porta), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP de consulta do NeuroPulse")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--dataset", type=Path, default=DATASET_PATH)
+    cli = parser.parse_args()
+
+    servidor = cria_servidor(cli.host, cli.porta, cli.dataset)
+    print(f"🚀 API NeuroPulse em http://{cli.host}:{cli.porta} (dataset: {cli.dataset})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Encerrando.")
+    finally:
+        servidor.server_close()
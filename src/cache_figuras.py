@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+# ===============================
+# CACHE DE FIGURAS DO DASHBOARD
+# ===============================
+# Guarda a especificação serializada (JSON do Plotly) de cada gráfico,
+# indexada pelo estado normalizado dos filtros. Reconstruir a figura a
+# partir do JSON custa bem menos que refazer px.bar/px.scatter_geo com o
+# estilo, e o JSON é imutável: duas sessões nunca mexem na mesma figura.
+
+LIMITE_PADRAO_MB = 64
+
+
+def chave_filtros(grafico: str, ufs=(), sexo=None, faixa_idade=None, *extras) -> tuple:
+    """
+    Chave do cache para um gráfico: UFs viram um conjunto ordenado, então a
+    ordem em que o usuário marcou os estados não cria entradas diferentes.
+    """
+    return (grafico, tuple(sorted(set(ufs))), sexo, faixa_idade) + tuple(extras)
+
+
+class CacheFiguras:
+    """
+    Cache LRU de figuras com orçamento de memória em bytes.
+
+    O tamanho de cada entrada é o do JSON em UTF-8; ao passar do limite, as
+    entradas usadas há mais tempo saem primeiro. Uma figura maior que o
+    orçamento inteiro é devolvida mas não é guardada.
+    """
+
+    def __init__(self, limite_bytes: int = LIMITE_PADRAO_MB * 1024 * 1024):
+        self.limite_bytes = int(limite_bytes)
+        self._entradas = OrderedDict()  # chave -> (json, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()  # sessões do Streamlit rodam em threads
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtem(self, chave, constroi):
+        """
+        Figura para `chave`. Em miss, chama `constroi()` (que devolve uma
+        go.Figure já estilizada), guarda o JSON e devolve a figura.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entrada is not None:
+            return pio.from_json(entrada[0])
+
+        fig = constroi()
+        spec = fig.to_json()
+        self._guarda(chave, spec, len(spec.encode("utf-8")))
+        return fig
+
+    def _guarda(self, chave, spec: str, tamanho: int) -> None:
+        if tamanho > self.limite_bytes:
+            return
+
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+
+            self._entradas[chave] = (spec, tamanho)
+            self._bytes += tamanho
+
+            while self._bytes > self.limite_bytes:
+                _, (_, tamanho_antigo) = self._entradas.popitem(last=False)
+                self._bytes -= tamanho_antigo
+                self.evictions += 1
+
+    def limpa(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        """Contadores para diagnóstico (hits, misses, evictions, ocupação)."""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "taxa_hit": self.hits / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "limite_bytes": self.limite_bytes,
+            }
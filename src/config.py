@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Caminho do diretório base do projeto
@@ -21,3 +22,30 @@ STANDARD_COLUMNS = [
     "disorder_type",
     "value",
 ]
+
+# Quebras opcionais (fontes sem a quebra usam "Total")
+OPTIONAL_COLUMNS = [
+    "sex",
+    "age_group",
+]
+
+# Store processado com todas as fontes, particionado por fonte (source=...)
+SOURCES_STORE = DATA_PROCESSED / "fontes"
+
+# Backend de consulta do dashboard: "pandas" (base em memória) ou "duckdb"
+# (SQL direto no Parquet, memória constante). Pode vir da variável de ambiente.
+DASHBOARD_BACKEND = os.environ.get("NEUROPULSE_BACKEND", "pandas")
+
+# Modo diagnóstico do dashboard (tempos por fase e hits de cache na sidebar
+# e no log). Também pode ser ligado por sessão com ?diagnostico=1 na URL.
+DASHBOARD_DIAGNOSTICO = os.environ.get("NEUROPULSE_DIAGNOSTICO", "").lower() in ("1", "true", "sim")
+
+# Partida rápida do dashboard: lê o snapshot Arrow IPC gravado pelo ETL
+# (memory map) em vez das partições Parquet. Ligado por padrão; com
+# NEUROPULSE_SNAPSHOT=0 o dashboard lê sempre as partições.
+DASHBOARD_SNAPSHOT = os.environ.get("NEUROPULSE_SNAPSHOT", "1").lower() in ("1", "true", "sim")
+
+# Troca de versão sem reiniciar: a cada N segundos cada sessão aberta confere
+# o carimbo de versão do ETL e, se mudou, reexecuta com os dados novos.
+# NEUROPULSE_RECARGA_S=0 desliga (a versão nova entra no próximo rerun).
+DASHBOARD_RECARGA_S = float(os.environ.get("NEUROPULSE_RECARGA_S", "30"))
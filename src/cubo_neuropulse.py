@@ -0,0 +1,212 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ===============================
+# CUBO PRÉ-AGREGADO (MATERIALIZADO PELO ETL)
+# ===============================
+# Para cada combinação de filtros do painel guarda:
+# - cubo_uf: o valor de cada UF já com a posição no ranking (1 = maior)
+# - cubo_resumo: agregados nacionais (média, UF de maior/menor valor)
+# Assim os KPIs e os gráficos de comparação viram consultas, sem groupby
+# a cada rerun do Streamlit.
+#
+# No modo streaming do ETL a base não cabe em memória: o cubo sai do dataset
+# já gravado, em lotes (escreve_cubo_lotes). Cada linha vai para um lote
+# pelo hash do seu grupo, então um grupo cai inteiro num lote só e o rank e
+# os agregados de cada lote são os do cubo completo.
+
+DIMENSOES_CUBO = ["year", "sexo", "faixa_idade", "domicilio", "indicador"]
+
+# Colunas da base que o cubo usa
+COLUNAS_CUBO = DIMENSOES_CUBO + ["cod_uf", "UF", "valor"]
+
+# Teto de lotes do cubo em streaming (um arquivo aberto por lote ao espalhar)
+MAX_LOTES = 256
+
+CUBO_UF_FILE = "neuropulse_cubo_uf.parquet"
+CUBO_RESUMO_FILE = "neuropulse_cubo_resumo.parquet"
+_CHAVE_VERSAO = b"neuropulse.versao"  # metadado do Parquet: versão do dataset do cubo
+
+
+def monta_cubo(base: pd.DataFrame):
+    """
+    Devolve (cubo_uf, cubo_resumo) a partir da base longa.
+
+    A base já vem validada pelo ETL (chave única). Segue as mesmas regras do
+    dashboard: em empate de maior/menor valor, vale a primeira UF na ordem
+    da base.
+    """
+    base = base.reset_index(drop=True)
+
+    # Dimensões como texto simples: ordem alfabética, independente da ordem
+    # das categorias de um DataFrame vindo do Parquet
+    texto = [d for d in DIMENSOES_CUBO + ["UF"] if d != "year"]
+    base[texto] = base[texto].astype(str)
+    grupos = base.groupby(DIMENSOES_CUBO, sort=True)
+
+    cubo_uf = base[DIMENSOES_CUBO + ["cod_uf", "UF", "valor"]].copy()
+    cubo_uf["rank"] = grupos["valor"].rank(method="first", ascending=False).astype("int32")
+    cubo_uf = cubo_uf.sort_values(DIMENSOES_CUBO + ["rank"]).reset_index(drop=True)
+
+    idx_max = grupos["valor"].idxmax()
+    idx_min = grupos["valor"].idxmin()
+
+    cubo_resumo = grupos["valor"].agg(n_ufs="count", media="mean")
+    cubo_resumo["uf_max"] = base.loc[idx_max, "UF"].to_numpy()
+    cubo_resumo["valor_max"] = base.loc[idx_max, "valor"].to_numpy()
+    cubo_resumo["uf_min"] = base.loc[idx_min, "UF"].to_numpy()
+    cubo_resumo["valor_min"] = base.loc[idx_min, "valor"].to_numpy()
+    cubo_resumo = cubo_resumo.reset_index()
+
+    return cubo_uf, cubo_resumo
+
+
+def _tabela_cubo(cubo: pd.DataFrame, versao: str = None) -> pa.Table:
+    """Cubo como tabela Arrow, com a versão do dataset nos metadados."""
+    tabela = pa.Table.from_pandas(cubo, preserve_index=False)
+    if versao:
+        metadados = {**(tabela.schema.metadata or {}), _CHAVE_VERSAO: versao.encode()}
+        tabela = tabela.replace_schema_metadata(metadados)
+    return tabela
+
+
+def escreve_cubo(base: pd.DataFrame, pasta: Path, versao: str = None) -> None:
+    """
+    Materializa o cubo em Parquet ao lado do dataset processado, com a
+    versão do dataset de onde saiu nos metadados.
+    """
+    cubo_uf, cubo_resumo = monta_cubo(base)
+    # tmp + os.replace: quem lê nunca vê um Parquet pela metade
+    for cubo, nome in ((cubo_uf, CUBO_UF_FILE), (cubo_resumo, CUBO_RESUMO_FILE)):
+        tmp = pasta / f"{nome}.tmp"
+        pq.write_table(_tabela_cubo(cubo, versao), tmp, compression="zstd")
+        os.replace(tmp, pasta / nome)
+
+
+def _espalha_em_lotes(batches, pasta: Path, n_lotes: int) -> list:
+    """
+    Grava cada linha de `batches` no lote do hash do seu grupo
+    (DIMENSOES_CUBO, módulo n_lotes): um arquivo Arrow IPC por lote em
+    `pasta`, com as linhas na ordem em que chegaram. Texto vai sem
+    dicionário (o de cada batch tem os valores do batch inteiro, não os do
+    lote). Devolve os arquivos gravados.
+    """
+    pasta.mkdir(parents=True)
+    escritores = {}
+    try:
+        for batch in batches:
+            schema = pa.schema(
+                [
+                    pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+                    for f in batch.schema
+                ]
+            )
+            batch = batch.cast(schema)
+            grupos = batch.select(DIMENSOES_CUBO).to_pandas()
+            lote = pd.util.hash_pandas_object(grupos, index=False).to_numpy() % n_lotes
+
+            # Ordena o batch por lote (estável: a ordem da base fica dentro de
+            # cada lote) e grava cada fatia no arquivo do seu lote
+            ordem = np.argsort(lote, kind="stable")
+            batch, lote = batch.take(pa.array(ordem)), lote[ordem]
+            quebras = np.flatnonzero(np.diff(lote)) + 1
+            for inicio, fim in zip(np.r_[0, quebras], np.r_[quebras, len(lote)]):
+                k = int(lote[inicio])
+                if k not in escritores:
+                    escritores[k] = pa.ipc.new_stream(str(pasta / f"lote-{k:05d}.arrow"), schema)
+                escritores[k].write_batch(batch.slice(inicio, fim - inicio))
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return [pasta / f"lote-{k:05d}.arrow" for k in sorted(escritores)]
+
+
+def escreve_cubo_lotes(batches, pasta: Path, versao: str = None, n_lotes: int = 1) -> None:
+    """
+    escreve_cubo para uma base que não cabe em memória (modo streaming).
+
+    `batches` são record batches com as COLUNAS_CUBO, na ordem da base (ex.:
+    itera_particoes). Uma passada espalha as linhas em até `n_lotes` lotes
+    (no máximo MAX_LOTES) numa pasta temporária, preservando a ordem (mesmos
+    desempates de monta_cubo); depois cada lote passa por monta_cubo e é
+    anexado aos Parquets do cubo. Só um batch ou um lote fica em memória.
+    As linhas são as mesmas de escreve_cubo, agrupadas por lote em vez de
+    ordenadas (le_cubo ordena).
+    """
+    pasta = Path(pasta)
+    tmp_lotes = pasta / "neuropulse_cubo_lotes.tmp"
+    shutil.rmtree(tmp_lotes, ignore_errors=True)
+
+    escritores = {}
+    try:
+        arquivos = _espalha_em_lotes(batches, tmp_lotes, max(1, min(n_lotes, MAX_LOTES)))
+        if not arquivos:
+            vazia = pa.schema([pa.field(c, pa.string()) for c in COLUNAS_CUBO]).empty_table()
+            escreve_cubo(vazia.to_pandas(), pasta, versao)
+            return
+
+        for arquivo in arquivos:
+            # cod_uf como Int8: nulo não vira float, o tipo é o mesmo em todos os lotes
+            with pa.ipc.open_stream(str(arquivo)) as leitor:
+                base = leitor.read_all().to_pandas(types_mapper={pa.int8(): pd.Int8Dtype()}.get)
+            for cubo, nome in zip(monta_cubo(base), (CUBO_UF_FILE, CUBO_RESUMO_FILE)):
+                tabela = _tabela_cubo(cubo, versao)
+                if nome not in escritores:
+                    escritores[nome] = pq.ParquetWriter(
+                        pasta / f"{nome}.tmp", tabela.schema, compression="zstd"
+                    )
+                escritores[nome].write_table(tabela.cast(escritores[nome].schema))
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+        shutil.rmtree(tmp_lotes, ignore_errors=True)
+
+    # tmp + os.replace, como em escreve_cubo
+    for nome in escritores:
+        os.replace(pasta / f"{nome}.tmp", pasta / nome)
+
+
+def _versao_cubo(path: Path):
+    metadados = pq.read_schema(path).metadata or {}
+    versao = metadados.get(_CHAVE_VERSAO)
+    return None if versao is None else versao.decode()
+
+
+def le_cubo(pasta: Path, versao: str = None):
+    """
+    Lê o cubo indexado pelas dimensões (consulta direta com .loc/.xs).
+    Devolve None se o ETL ainda não gerou o cubo ou se, com `versao`, o
+    cubo saiu de outra versão do dataset (cubos antigos, sem versão, valem).
+    """
+    uf_path = pasta / CUBO_UF_FILE
+    resumo_path = pasta / CUBO_RESUMO_FILE
+    if not (uf_path.exists() and resumo_path.exists()):
+        return None
+    if versao and any(
+        _versao_cubo(path) not in (None, versao) for path in (uf_path, resumo_path)
+    ):
+        return None
+
+    cubo_uf = pd.read_parquet(uf_path).set_index(DIMENSOES_CUBO).sort_index()
+    cubo_resumo = pd.read_parquet(resumo_path).set_index(DIMENSOES_CUBO).sort_index()
+    return cubo_uf, cubo_resumo
+
+
+def consulta_cubo(tabela: pd.DataFrame, **filtros) -> pd.DataFrame:
+    """
+    Linhas do cubo para os valores de dimensão informados
+    (ex.: sexo="Total", faixa_idade="Total"). Dimensões omitidas não filtram.
+    """
+    niveis = [d for d in DIMENSOES_CUBO if d in filtros]
+    if not niveis:
+        return tabela
+    try:
+        return tabela.xs(tuple(filtros[d] for d in niveis), level=niveis, drop_level=False)
+    except KeyError:
+        return tabela.iloc[0:0]
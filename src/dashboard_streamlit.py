@@ -1,7 +1,38 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from pathlib import Path
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from cache_figuras import LIMITE_PADRAO_MB, CacheFiguras, chave_filtros
+from config import (
+    DASHBOARD_BACKEND,
+    DASHBOARD_DIAGNOSTICO,
+    DASHBOARD_RECARGA_S,
+    DASHBOARD_SNAPSHOT,
+)
+from cubo_neuropulse import consulta_cubo, le_cubo
+from diagnostico_dashboard import Diagnostico, registra_execucao
+from dim_uf import DIM_UF, canonicaliza_uf
+from geometria_uf import carrega_malha
+from particoes_neuropulse import (
+    CARIMBO_FILE,
+    SNAPSHOT_FILE,
+    anos_disponiveis,
+    anos_snapshot,
+    le_constantes,
+    le_particoes,
+    le_snapshot,
+    pasta_versao,
+    versao_publicada,
+)
+from store_neuropulse import NeuroPulseStore, tipos_compactos
+
+# Partida rápida: o que só algumas seções ou caminhos usam é importado onde
+# é usado, não aqui (plotly.express só em miss do cache de figuras, duckdb
+# só com o backend duckdb, a validação só no fallback do CSV). Um processo
+# novo chega à primeira tela sem pagar esses imports.
 
 # ================================
 # CAMINHO DO DATASET PROCESSADO
@@ -9,52 +40,114 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # pasta raiz do projeto
 DATA_PROCESSED = BASE_DIR / "data" / "processed"
-
-
-@st.cache_data
-def load_data():
-    path = DATA_PROCESSED / "neuropulse_pns_depressao.csv"
-    df = pd.read_csv(path)
-
-    # Mapeia o nome do estado -> sigla ISO (para o mapa)
-    mapa_uf = {
-        "Rondonia": "BR-RO",
-        "Acre": "BR-AC",
-        "Amazonas": "BR-AM",
-        "Roraima": "BR-RR",
-        "Para": "BR-PA",
-        "Amapa": "BR-AP",
-        "Tocantins": "BR-TO",
-        "Maranhao": "BR-MA",
-        "Piaui": "BR-PI",
-        "Ceara": "BR-CE",
-        "Rio Grande do Norte": "BR-RN",
-        "Paraiba": "BR-PB",
-        "Pernambuco": "BR-PE",
-        "Alagoas": "BR-AL",
-        "Sergipe": "BR-SE",
-        "Bahia": "BR-BA",
-        "Minas Gerais": "BR-MG",
-        "Espirito Santo": "BR-ES",
-        "Rio de Janeiro": "BR-RJ",
-        "Sao Paulo": "BR-SP",
-        "Parana": "BR-PR",
-        "Santa Catarina": "BR-SC",
-        "Rio Grande do Sul": "BR-RS",
-        "Mato Grosso do Sul": "BR-MS",
-        "Mato Grosso": "BR-MT",
-        "Goias": "BR-GO",
-        "Distrito Federal": "BR-DF",
-    }
-
-    df["uf_iso"] = df["UF"].map(mapa_uf)
-
-    # Garante que não tem linhas duplicadas
-    df = df.drop_duplicates(
-        subset=["year", "UF", "sexo", "faixa_idade", "domicilio", "indicador"]
-    )
-
-    return df
+DATASET_PATH = DATA_PROCESSED / "neuropulse_pns_depressao"  # year=AAAA/indicador=X/
+CSV_PATH = DATA_PROCESSED / "neuropulse_pns_depressao.csv"
+SNAPSHOT_PATH = DATA_PROCESSED / SNAPSHOT_FILE  # Arrow IPC gravado pelo ETL
+CARIMBO_PATH = DATA_PROCESSED / CARIMBO_FILE  # versão publicada (gravada antes da troca do link)
+
+
+@st.cache_data(max_entries=2)
+def load_anos(versao: str):
+    registra_execucao("load_anos")  # só roda em miss do cache (modo diagnóstico)
+    # Edições disponíveis: rodapé do snapshot, nomes das partições (sem abrir
+    # arquivo) ou, em bases antigas, o CSV
+    usa_snapshot = DASHBOARD_SNAPSHOT and versao
+    anos = anos_snapshot(SNAPSHOT_PATH, versao) if usa_snapshot else []
+    if not anos:
+        anos = anos_disponiveis(pasta_versao(DATASET_PATH, versao))
+    if not anos:
+        anos = sorted(pd.read_csv(CSV_PATH, usecols=["year"])["year"].unique().tolist())
+    return anos
+
+
+@st.cache_resource(max_entries=8)
+def load_data(anos: tuple, versao: str):
+    registra_execucao("load_data")
+    # Um store por processo, versão e seleção de anos, compartilhado entre as
+    # sessões (st.cache_resource não copia: cada sessão consulta o mesmo
+    # objeto, que é só leitura; com cache_data cada chamada desserializava
+    # uma cópia).
+    # Preferência: snapshot Arrow IPC do ETL (memory map, batches de um ano só,
+    # mesmas linhas e ordem das partições); sem ele, ou se é de outra versão
+    # do dataset, o store colunar particionado, lendo só as partições dos
+    # anos escolhidos (sem parse de texto). O CSV fica só como fallback para
+    # bases antigas, sem o dataset particionado.
+    # Texto vem como categoria (dicionário) e números estreitos (year int16,
+    # cod_uf int8); dimensões constantes saem das colunas (metadados do ETL).
+    # O dataset já sai validado do ETL (chave única): não há dedup aqui.
+    # Partições: a pasta da versão da chave, não o link (o ETL só troca o
+    # link depois do carimbo; uma chave não pode guardar outra versão).
+    usa_snapshot = DASHBOARD_SNAPSHOT and versao
+    snapshot = le_snapshot(SNAPSHOT_PATH, anos=anos, versao=versao) if usa_snapshot else None
+    pasta = pasta_versao(DATASET_PATH, versao)
+    if snapshot is not None:
+        tabela, constantes = snapshot
+        df = tabela.to_pandas()
+    elif anos_disponiveis(pasta):
+        df = le_particoes(pasta, anos=anos).to_pandas()
+        constantes = le_constantes(pasta)
+    else:
+        from validacao_neuropulse import valida
+
+        df = pd.read_csv(CSV_PATH)
+        df = df[df["year"].isin(anos)].reset_index(drop=True)
+        constantes = None
+
+        # Bases antigas (CSV sem cod_uf): padroniza UF pela dimensão compartilhada
+        if "cod_uf" not in df.columns:
+            df["UF"], df["cod_uf"] = canonicaliza_uf(df["UF"])
+        # CSV de base antiga pode ser anterior à validação do ETL: passa por ela
+        df = tipos_compactos(valida(df).validas.reset_index(drop=True))
+
+    # Store de consulta: linhas ordenadas + índice de offsets por filtro
+    return NeuroPulseStore(df, constantes)
+
+
+@st.cache_resource(max_entries=8)
+def load_duckdb_store(anos: tuple, versao: str):
+    registra_execucao("load_duckdb_store")
+    # Uma conexão por processo, versão e seleção de anos, compartilhada
+    # entre as sessões (sem cópia da base)
+    from store_duckdb import DuckDBStore
+
+    return DuckDBStore(pasta_versao(DATASET_PATH, versao), anos=anos)
+
+
+def load_store(anos: tuple, versao: str, diag: Diagnostico):
+    # Backend escolhido em config.DASHBOARD_BACKEND (env NEUROPULSE_BACKEND).
+    # DuckDB precisa do dataset do ETL e do pacote duckdb; sem eles, usa pandas.
+    if DASHBOARD_BACKEND == "duckdb":
+        from store_duckdb import duckdb
+
+        if duckdb is not None and anos_disponiveis(pasta_versao(DATASET_PATH, versao)):
+            return diag.cacheada("load_duckdb_store", load_duckdb_store, anos, versao)
+        st.warning("Backend DuckDB indisponível (pacote ou dataset ausente); usando pandas.")
+    return diag.cacheada("load_data", load_data, anos, versao)
+
+
+@st.cache_data(max_entries=2)
+def load_cubo(versao: str):
+    registra_execucao("load_cubo")
+    # Cubo pré-agregado pelo ETL (None se ainda não foi gerado ou se é de
+    # outra versão do dataset)
+    return le_cubo(DATA_PROCESSED, versao)
+
+
+@st.cache_resource
+def load_malha():
+    registra_execucao("load_malha")
+    # Malhas das UFs simplificadas no build (src/geometria_uf.py), lidas uma
+    # vez por processo e indexadas pelo código IBGE. None: build não rodou.
+    return carrega_malha("uf")
+
+
+@st.cache_resource(max_entries=2)
+def cache_figuras(versao: str):
+    # Um cache por processo e versão dos dados, compartilhado entre as
+    # sessões (as chaves das figuras são só os filtros).
+    # Orçamento em MB configurável por NEUROPULSE_CACHE_FIGURAS_MB.
+    limite_mb = float(os.environ.get("NEUROPULSE_CACHE_FIGURAS_MB", LIMITE_PADRAO_MB))
+    return CacheFiguras(limite_bytes=int(limite_mb * 1024 * 1024))
 
 
 # ================================
@@ -67,6 +160,50 @@ st.set_page_config(
     page_icon="🧠",
 )
 
+# ================================
+# MODO DIAGNÓSTICO (OPCIONAL)
+# ================================
+# Ligado por NEUROPULSE_DIAGNOSTICO=1 ou por ?diagnostico=1 na URL:
+# tempos de cada fase e hits/misses de cache na sidebar e no log (JSON)
+
+def novo_diagnostico(evento: str = "rerun") -> Diagnostico:
+    ctx = get_script_run_ctx()
+    return Diagnostico(
+        ativo=DASHBOARD_DIAGNOSTICO
+        or st.query_params.get("diagnostico", "").lower() in ("1", "true", "sim"),
+        sessao=ctx.session_id if ctx is not None else None,
+        evento=evento,
+    )
+
+
+diag = novo_diagnostico()
+
+
+def mostra_diagnostico():
+    # Fim do rerun (inclusive nos st.stop): painel na sidebar + linha de log
+    if not diag.ativo:
+        return
+    dados = diag.emite_log()
+    with st.sidebar.expander("⏱️ Diagnóstico do rerun", expanded=True):
+        st.caption(f"Rerun completo: {dados['total_ms']:.1f} ms")
+        st.dataframe(
+            pd.DataFrame(list(dados["fases_ms"].items()), columns=["Fase", "ms"]),
+            hide_index=True,
+            width="stretch",
+        )
+        if dados["caches"]:
+            st.dataframe(
+                pd.DataFrame.from_dict(dados["caches"], orient="index").rename_axis("Cache"),
+                width="stretch",
+            )
+        estat = figuras.estatisticas()
+        st.caption(
+            f"Cache de figuras (processo): {estat['entradas']} figuras · "
+            f"{estat['bytes'] / 1024**2:.1f} MB · hit {estat['taxa_hit']:.0%}"
+        )
+        st.caption(f"Versão dos dados: {versao or 'sem carimbo'}")
+
+
 # ================================
 # ESTILO CUSTOMIZADO (SIDEBAR + APP)
 # ================================
@@ -260,13 +397,33 @@ def aplica_estilo_fig(fig):
 # CARREGA OS DADOS
 # ================================
 
-df = load_data()
+# Chave de cache de tudo que sai de data/processed: a versão do carimbo que
+# o ETL grava depois de partições, snapshot e cubo da versão e antes de
+# trocar o link do dataset (bases sem carimbo: a versão das partições; ""
+# sem dataset). Cada loader lê os dados dessa versão (pasta_versao, versão
+# gravada no snapshot e no cubo). Lida a cada rerun (um
+# JSON pequeno): quando o ETL publica, a chave muda e a sessão passa para os
+# dados novos sem reiniciar o Streamlit.
+versao = versao_publicada(CARIMBO_PATH, DATASET_PATH)
+anos = diag.cacheada("load_anos", load_anos, versao)
+figuras = cache_figuras(versao)
+
+
+def confere_versao():
+    # Sessão aberta sem interação: se o ETL publicou outra versão desde este
+    # rerun, reexecuta o app inteiro (as caches já mudam de chave sozinhas)
+    if versao_publicada(CARIMBO_PATH, DATASET_PATH) != versao:
+        st.rerun()
+
+
+if DASHBOARD_RECARGA_S > 0:
+    st.fragment(confere_versao, run_every=DASHBOARD_RECARGA_S)()
 
 st.title("🧠 NeuroPulse – Painel de Saúde Mental (PNS/IBGE)")
 
 # Badge / descrição inicial
 st.markdown(
-    """
+    f"""
     <div style="
         display:flex;
         flex-direction:column;
@@ -282,7 +439,7 @@ st.markdown(
         text-transform:uppercase;
         color:#b4c0ff;
       ">
-        <span>●</span> Painel PNS 2019 · IBGE
+        <span>●</span> Painel PNS {" · ".join(map(str, anos))} · IBGE
       </span>
       <span style="font-size:0.95rem; color:#d4ddff;">
         Análise da <strong>prevalência de depressão diagnosticada</strong> por profissional de saúde mental,
@@ -299,19 +456,29 @@ st.markdown(
 
 st.sidebar.header("Filtros")
 
-ufs = sorted(df["UF"].unique())
-sexo_opts = sorted(df["sexo"].unique())
-faixa_opts = sorted(df["faixa_idade"].unique())
+# Ano primeiro: define quais partições do dataset são lidas
+anos_sel = st.sidebar.multiselect("Ano", anos, default=anos[-1:])
+if not anos_sel:
+    st.info(
+        "🚫 **NENHUM ANO SELECIONADO**\n\n"
+        "Use o painel de filtros à esquerda e selecione pelo menos uma edição da PNS."
+    )
+    mostra_diagnostico()
+    st.stop()
+anos_sel = tuple(sorted(anos_sel))
+
+store = load_store(anos_sel, versao, diag)
+
+ufs = store.opcoes("UF")
+sexo_opts = store.opcoes("sexo")
+faixa_opts = store.opcoes("faixa_idade")
 
 ufs_sel = st.sidebar.multiselect("Estados (UF)", ufs, default=ufs)
 sexo_sel = st.sidebar.selectbox("Sexo", sexo_opts, index=0)
 faixa_sel = st.sidebar.selectbox("Faixa de idade", faixa_opts, index=0)
 
-df_filt = df[
-    (df["UF"].isin(ufs_sel))
-    & (df["sexo"] == sexo_sel)
-    & (df["faixa_idade"] == faixa_sel)
-]
+with diag.fase("filtro"):
+    df_filt = store.filter(ufs=ufs_sel, sexo=sexo_sel, faixa_idade=faixa_sel)
 
 # ===== Caso sem estados selecionados / sem dados =====
 if df_filt.empty:
@@ -320,6 +487,7 @@ if df_filt.empty:
         "Use o painel de filtros à esquerda e selecione pelo menos um estado (UF) "
         "para visualizar os indicadores."
     )
+    mostra_diagnostico()
     st.stop()
 
 # ================================
@@ -328,12 +496,33 @@ if df_filt.empty:
 
 col_kpi1, col_kpi2, col_kpi3 = st.columns(3)
 
-# Média Brasil (nos UFs filtrados)
-media_brasil = df_filt["valor"].mean()
-
-# Maior e menor valor
-uf_max = df_filt.loc[df_filt["valor"].idxmax()]
-uf_min = df_filt.loc[df_filt["valor"].idxmin()]
+# Com um só ano e todas as UFs selecionadas, KPIs e ranking saem prontos do cubo do ETL
+cubo = diag.cacheada("load_cubo", load_cubo, versao)
+with diag.fase("kpis"):
+    resumo_cubo = None
+    if cubo is not None and len(anos_sel) == 1 and set(ufs_sel) == set(ufs):
+        cubo_uf, cubo_resumo = cubo
+        ano_cubo = anos_sel[0]
+        resumo_cubo = consulta_cubo(cubo_resumo, year=ano_cubo, sexo=sexo_sel, faixa_idade=faixa_sel)
+        # Mais de uma linha (ex.: vários anos/indicadores): calcula pelos dados
+        if len(resumo_cubo) != 1:
+            resumo_cubo = None
+
+    if resumo_cubo is not None:
+        linha = resumo_cubo.iloc[0]
+        media_brasil = linha["media"]
+        uf_max = {"UF": linha["uf_max"], "valor": linha["valor_max"]}
+        uf_min = {"UF": linha["uf_min"], "valor": linha["valor_min"]}
+        df_ranking = consulta_cubo(
+            cubo_uf, year=ano_cubo, sexo=sexo_sel, faixa_idade=faixa_sel
+        ).reset_index()
+    else:
+        # Média, maior e menor valor nos UFs filtrados (só as linhas selecionadas)
+        agregado = store.aggregate(ufs=ufs_sel, sexo=sexo_sel, faixa_idade=faixa_sel)
+        media_brasil = agregado["media"]
+        uf_max = {"UF": agregado["uf_max"], "valor": agregado["valor_max"]}
+        uf_min = {"UF": agregado["uf_min"], "valor": agregado["valor_min"]}
+        df_ranking = df_filt.sort_values("valor", ascending=False, kind="stable")
 
 col_kpi1.metric(
     "Média de depressão (%) nos estados selecionados",
@@ -353,147 +542,297 @@ col_kpi3.metric(
 st.markdown("---")
 
 # ================================
-# GRÁFICO DE BARRAS POR UF
+# SEÇÕES DO PAINEL
 # ================================
+# Cada seção é uma função que recebe só os filtros de que depende, e a
+# chave do cache de figuras sai desses mesmos argumentos. Uma mudança na
+# sidebar reexecuta o script inteiro; tabela e mapa ficam num fragmento
+# (st.fragment) com seletor próprio: trocar de um para o outro reexecuta só
+# o fragmento (sem CSS, carga, KPIs e gráficos de cima), e só a visão
+# escolhida é montada.
+
+
+def secao_barras(df_ranking, ufs_sel, sexo_sel, faixa_sel, anos_sel):
+    st.subheader("📊 Percentual de depressão por UF")
+
+    # Vários anos: uma linha por UF e ano, então cada ano ganha o seu painel
+    varios_anos = len(anos_sel) > 1
+
+    def monta_fig_bar():
+        import plotly.express as px
+
+        fig = px.bar(
+            df_ranking,
+            x="UF",
+            y="valor",
+            labels={"valor": "% de depressão", "UF": "Unidade da Federação", "year": "Ano"},
+            color="valor",
+            color_continuous_scale="Reds",
+            text="valor",
+            facet_row="year" if varios_anos else None,
+        )
+
+        fig.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
+        fig.update_layout(yaxis_title="% de pessoas com diagnóstico de depressão")
+        return aplica_estilo_fig(fig)
+
+    fig_bar = diag.figura(
+        "bar", figuras, chave_filtros("bar", ufs_sel, sexo_sel, faixa_sel, anos_sel), monta_fig_bar
+    )
 
-st.subheader("📊 Percentual de depressão por UF")
-
-fig_bar = px.bar(
-    df_filt.sort_values("valor", ascending=False),
-    x="UF",
-    y="valor",
-    labels={"valor": "% de depressão", "UF": "Unidade da Federação"},
-    color="valor",
-    color_continuous_scale="Reds",
-    text="valor",
-)
-
-fig_bar.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
-fig_bar.update_layout(yaxis_title="% de pessoas com diagnóstico de depressão")
-fig_bar = aplica_estilo_fig(fig_bar)
+    with diag.fase("render_bar"):
+        st.plotly_chart(fig_bar, width="stretch")
 
-st.plotly_chart(fig_bar, use_container_width=True)
 
 # ================================
 # 👥 COMPARAÇÃO POR SEXO (MÉDIA)
 # ================================
 
-df_sexo_comp = df[
-    (df["UF"].isin(ufs_sel))
-    & (df["faixa_idade"] == faixa_sel)
-]
-
-df_sexo_comp = df_sexo_comp[df_sexo_comp["sexo"].isin(["Masculino", "Feminino"])]
-
-if not df_sexo_comp.empty and df_sexo_comp["sexo"].nunique() > 1:
-    df_sexo_media = (
-        df_sexo_comp.groupby("sexo", as_index=False)["valor"].mean()
-    )
+def secao_sexo(ufs_sel, faixa_sel, anos_sel, cubo_resumo=None):
+    # Não depende do sexo escolhido na sidebar. `cubo_resumo` só vem quando o
+    # cubo vale para a seleção (um ano, todas as UFs)
+    with diag.fase("comparacao_sexo"):
+        if cubo_resumo is not None:
+            # Médias por sexo já agregadas no cubo (todas as UFs selecionadas)
+            df_sexo_media = (
+                consulta_cubo(cubo_resumo, year=anos_sel[0], faixa_idade=faixa_sel)
+                .reset_index()
+                .query("sexo in ['Masculino', 'Feminino']")
+                .rename(columns={"media": "valor"})[["sexo", "valor"]]
+            )
+        else:
+            df_sexo_media = store.aggregate(
+                ufs=ufs_sel,
+                sexo=["Masculino", "Feminino"],
+                faixa_idade=faixa_sel,
+                by="sexo",
+            )
+
+    if df_sexo_media["sexo"].nunique() <= 1:
+        return
 
     st.subheader("👥 Comparação da prevalência por sexo\n(média nos estados selecionados)")
-    fig_sexo = px.bar(
-        df_sexo_media,
-        x="sexo",
-        y="valor",
-        labels={"sexo": "Sexo", "valor": "% com diagnóstico de depressão"},
-        text="valor",
+
+    def monta_fig_sexo():
+        import plotly.express as px
+
+        fig = px.bar(
+            df_sexo_media,
+            x="sexo",
+            y="valor",
+            labels={"sexo": "Sexo", "valor": "% com diagnóstico de depressão"},
+            text="valor",
+        )
+        fig.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
+        fig.update_layout(yaxis_title="% de pessoas com diagnóstico de depressão")
+        return aplica_estilo_fig(fig)
+
+    fig_sexo = diag.figura(
+        "sexo", figuras, chave_filtros("sexo", ufs_sel, None, faixa_sel, anos_sel), monta_fig_sexo
     )
-    fig_sexo.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
-    fig_sexo.update_layout(yaxis_title="% de pessoas com diagnóstico de depressão")
-    fig_sexo = aplica_estilo_fig(fig_sexo)
 
-    st.plotly_chart(fig_sexo, use_container_width=True)
+    with diag.fase("render_sexo"):
+        st.plotly_chart(fig_sexo, width="stretch")
 
-st.markdown("---")
 
 # ================================
 # 📋 TABELA DETALHADA DOS DADOS
 # ================================
 
-st.subheader("📋 Tabela completa dos dados filtrados")
+# Rótulo na tela -> coluna do store
+COLUNAS_TABELA = {
+    "Ano": "year",
+    "UF": "UF",
+    "Sexo": "sexo",
+    "Faixa de idade": "faixa_idade",
+    "% de depressão": "valor",
+}
+BUSCA_TABELA = {"UF": "UF", "Sexo": "sexo", "Faixa de idade": "faixa_idade"}
+TAMANHOS_PAGINA = [25, 50, 100, 500]
+
+
+def secao_tabela(ufs_sel, sexo_sel, faixa_sel, anos_sel, diag):
+    # Paginada no servidor: busca, ordenação e página correm no store
+    # (numpy ou SQL) e só as linhas da página vão para o navegador
+    st.subheader("📋 Tabela completa dos dados filtrados")
+
+    varios_anos = len(anos_sel) > 1
+    rotulos = [r for r in COLUNAS_TABELA if varios_anos or r != "Ano"]
+
+    col_ordem, col_direcao, col_busca, col_texto = st.columns([2, 1, 2, 3])
+    ordem = col_ordem.selectbox("Ordenar por", rotulos, index=rotulos.index("% de depressão"))
+    decrescente = col_direcao.toggle("Decrescente", value=True)
+    coluna_busca = col_busca.selectbox("Buscar em", list(BUSCA_TABELA))
+    texto_busca = col_texto.text_input("Contém", placeholder="ex.: Rio")
+
+    col_tamanho, col_pagina, col_total = st.columns([1, 1, 4])
+    tamanho = col_tamanho.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1)
+
+    # Consulta nova (filtro, ordem, busca ou tamanho): volta para a 1ª página
+    consulta = (ufs_sel, sexo_sel, faixa_sel, anos_sel, ordem, decrescente,
+                coluna_busca, texto_busca, tamanho)
+    if st.session_state.get("tabela_consulta") != consulta:
+        st.session_state["tabela_consulta"] = consulta
+        st.session_state["tabela_pagina"] = 1
+
+    pagina = col_pagina.number_input("Página", min_value=1, step=1, key="tabela_pagina")
+
+    def consulta_pagina(pagina):
+        return store.pagina(
+            ufs=ufs_sel,
+            sexo=sexo_sel,
+            faixa_idade=faixa_sel,
+            ordenar_por=COLUNAS_TABELA[ordem],
+            decrescente=decrescente,
+            busca=(BUSCA_TABELA[coluna_busca], texto_busca.strip()),
+            inicio=(pagina - 1) * tamanho,
+            tamanho=tamanho,
+        )
+
+    with diag.fase("tabela"):
+        pagina = int(pagina)
+        df_pagina, total = consulta_pagina(pagina)
+        paginas = max(1, -(-total // tamanho))
+        if pagina > paginas:
+            # Página digitada além do fim: mostra a última
+            pagina = paginas
+            df_pagina, total = consulta_pagina(pagina)
+        col_total.caption(f"{total} linhas · página {pagina} de {paginas}")
+
+        df_tabela = (
+            df_pagina[[COLUNAS_TABELA[r] for r in rotulos]]
+            .rename(columns={"valor": "% de depressão"})
+        )
+
+        st.dataframe(df_tabela, width="stretch")
 
-df_tabela = (
-    df_filt[["UF", "sexo", "faixa_idade", "valor"]]
-    .sort_values("valor", ascending=False)
-    .rename(columns={"valor": "% de depressão"})
-)
 
-st.dataframe(df_tabela, use_container_width=True)
+# ================================
+# MAPA DO BRASIL (CHOROPLETH)
+# ================================
+
+def secao_mapa(df_filt, ufs_sel, sexo_sel, faixa_sel, anos_sel, diag):
+    st.subheader("🗺️ Mapa da prevalência de depressão por estado")
+
+    malha_uf = diag.cacheada("load_malha", load_malha)
+    varios_anos = len(anos_sel) > 1
+
+    def monta_fig_map():
+        import plotly.express as px
+
+        if malha_uf is None:
+            return monta_fig_bolhas()
+
+        # Só as UFs filtradas vão no payload, na tolerância que cabe no zoom delas
+        geojson = malha_uf.geojson(df_filt["cod_uf"].dropna().unique())
+
+        fig = px.choropleth(
+            df_filt,
+            geojson=geojson,
+            locations="cod_uf",   # código IBGE = id da feição
+            color="valor",
+            hover_name="UF",
+            hover_data={"cod_uf": False},
+            color_continuous_scale="Reds",
+            labels={"valor": "% de depressão", "year": "Ano"},
+            animation_frame="year" if varios_anos else None,
+        )
+
+        fig.update_traces(marker_line_color="rgba(255,255,255,0.4)", marker_line_width=0.5)
+        fig.update_geos(fitbounds="locations", visible=False)
+
+        fig.update_layout(
+            margin=dict(l=0, r=0, t=0, b=0),
+            height=550,
+        )
+
+        return aplica_estilo_fig(fig)
+
+    def monta_fig_bolhas():
+        import plotly.express as px
+
+        # Sem as malhas do build (python src/geometria_uf.py): uma bolha por UF,
+        # na capital (coordenadas da dimensão compartilhada, join pelo código IBGE)
+        df_mapa = df_filt.merge(DIM_UF[["cod_uf", "lat", "lon"]], on="cod_uf", how="inner")
+
+        fig = px.scatter_geo(
+            df_mapa,
+            lat="lat",
+            lon="lon",
+            color="valor",
+            hover_name="UF",
+            size="valor",
+            color_continuous_scale="Reds",
+            labels={"valor": "% de depressão", "year": "Ano"},
+            animation_frame="year" if varios_anos else None,
+        )
+
+        fig.update_geos(
+            projection_type="mercator",
+            showcountries=True,
+            countrycolor="rgba(255,255,255,0.3)",
+            lataxis_range=[-35, 6],
+            lonaxis_range=[-75, -34],
+        )
+
+        fig.update_layout(
+            margin=dict(l=0, r=0, t=0, b=0),
+            height=550,
+        )
+
+        return aplica_estilo_fig(fig)
+
+    fig_map = diag.figura(
+        "mapa", figuras, chave_filtros("mapa", ufs_sel, sexo_sel, faixa_sel, anos_sel), monta_fig_map
+    )
+
+    with diag.fase("render_mapa"):
+        st.plotly_chart(fig_map, width="stretch")
+
+    if malha_uf is None:
+        st.caption(
+            "Malha das UFs não encontrada em data/geo/: mapa em bolhas por capital. "
+            "Rode `python src/geometria_uf.py` para gerar o mapa por estado."
+        )
 
-st.markdown("---")
 
 # ================================
-# MAPA DO BRASIL (SCATTER GEO)
+# FRAGMENTO: MAPA OU TABELA
 # ================================
 
-st.subheader("🗺️ Mapa da prevalência de depressão por estado")
-
-coords_uf = {
-    "Rondônia": (-8.76, -63.90),
-    "Acre": (-9.97, -67.81),
-    "Amazonas": (-3.13, -60.02),
-    "Roraima": (2.82, -60.67),
-    "Pará": (-1.46, -48.49),
-    "Amapá": (0.03, -51.07),
-    "Tocantins": (-10.25, -48.32),
-    "Maranhão": (-2.53, -44.30),
-    "Piauí": (-5.09, -42.80),
-    "Ceará": (-3.72, -38.54),
-    "Rio Grande do Norte": (-5.81, -35.21),
-    "Paraíba": (-7.12, -34.86),
-    "Pernambuco": (-8.05, -34.90),
-    "Alagoas": (-9.66, -35.74),
-    "Sergipe": (-10.91, -37.07),
-    "Bahia": (-12.97, -38.50),
-    "Minas Gerais": (-19.92, -43.94),
-    "Espírito Santo": (-20.32, -40.34),
-    "Rio de Janeiro": (-22.91, -43.17),
-    "São Paulo": (-23.55, -46.63),
-    "Paraná": (-25.43, -49.27),
-    "Santa Catarina": (-27.59, -48.55),
-    "Rio Grande do Sul": (-30.03, -51.23),
-    "Mato Grosso do Sul": (-20.44, -54.65),
-    "Mato Grosso": (-15.60, -56.10),
-    "Goiás": (-16.68, -49.25),
-    "Distrito Federal": (-15.78, -47.93),
-}
+VISOES_DETALHE = ["🗺️ Mapa", "📋 Tabela"]
 
-df_mapa = df_filt.copy()
-df_mapa["lat"] = df_mapa["UF"].map(lambda uf: coords_uf.get(uf, (None, None))[0])
-df_mapa["lon"] = df_mapa["UF"].map(lambda uf: coords_uf.get(uf, (None, None))[1])
-
-df_mapa = df_mapa.dropna(subset=["lat", "lon"])
-
-fig_map = px.scatter_geo(
-    df_mapa,
-    lat="lat",
-    lon="lon",
-    color="valor",
-    hover_name="UF",
-    size="valor",
-    color_continuous_scale="Reds",
-    labels={"valor": "% de depressão"},
-)
 
-fig_map.update_geos(
-    projection_type="mercator",
-    showcountries=True,
-    countrycolor="rgba(255,255,255,0.3)",
-    lataxis_range=[-35, 6],
-    lonaxis_range=[-75, -34],
-)
+@st.fragment
+def secao_detalhe(df_filt, ufs_sel, sexo_sel, faixa_sel, anos_sel):
+    # Rerun só do fragmento (troca de visão): o diagnóstico do rerun completo
+    # já foi emitido, então este mede à parte e vai só para o log
+    ctx = get_script_run_ctx()
+    so_fragmento = bool(ctx is not None and ctx.fragment_ids_this_run)
+    diag_detalhe = novo_diagnostico("rerun_fragmento") if so_fragmento else diag
 
-fig_map.update_layout(
-    margin=dict(l=0, r=0, t=0, b=0),
-    height=550,
-)
+    visao = st.radio("Visualização", VISOES_DETALHE, horizontal=True, key="visao_detalhe")
+
+    if visao == "📋 Tabela":
+        secao_tabela(ufs_sel, sexo_sel, faixa_sel, anos_sel, diag_detalhe)
+    else:
+        secao_mapa(df_filt, ufs_sel, sexo_sel, faixa_sel, anos_sel, diag_detalhe)
 
-fig_map = aplica_estilo_fig(fig_map)
+    if so_fragmento:
+        diag_detalhe.emite_log()
 
-st.plotly_chart(fig_map, use_container_width=True)
+
+secao_barras(df_ranking, ufs_sel, sexo_sel, faixa_sel, anos_sel)
+secao_sexo(ufs_sel, faixa_sel, anos_sel, cubo_resumo if resumo_cubo is not None else None)
+
+st.markdown("---")
+
+secao_detalhe(df_filt, ufs_sel, sexo_sel, faixa_sel, anos_sel)
 
 st.markdown("---")
 st.info(
     "Este é o **painel inicial do NeuroPulse**. "
     "Sobre indicadores de depressão, temos informações sobre a prevalência, tendência e evolução nos estados brasileiros."
 )
+
+mostra_diagnostico()
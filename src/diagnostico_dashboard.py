@@ -0,0 +1,116 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+
+# ===============================
+# MODO DIAGNÓSTICO DO DASHBOARD
+# ===============================
+# Opcional (env NEUROPULSE_DIAGNOSTICO=1 ou ?diagnostico=1 na URL). A cada
+# rerun, mede o tempo de cada fase do script (carga, filtro, KPIs, montagem
+# de cada figura no px, envio de cada st.plotly_chart...) e conta hits/misses
+# dos caches. O resultado vai para um painel na sidebar e para uma linha de
+# log JSON por rerun (logger "neuropulse.diagnostico"), fácil de raspar.
+#
+# Desligado, fase()/cacheada()/figura() só repassam a chamada.
+
+_log = logging.getLogger("neuropulse.diagnostico")
+if not _log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _log.addHandler(_handler)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+
+# Execuções do corpo das funções com st.cache_* (por thread: cada sessão
+# roda o script na sua thread, e um miss executa o corpo nessa mesma thread)
+_execucoes = threading.local()
+
+
+def registra_execucao(nome: str) -> None:
+    """Chamada no corpo de uma função cacheada: se rodou, foi miss."""
+    contagem = getattr(_execucoes, "contagem", None)
+    if contagem is None:
+        contagem = _execucoes.contagem = {}
+    contagem[nome] = contagem.get(nome, 0) + 1
+
+
+def _execucoes_de(nome: str) -> int:
+    return getattr(_execucoes, "contagem", {}).get(nome, 0)
+
+
+class Diagnostico:
+    """Tempos por fase e hits/misses de cache de um rerun."""
+
+    def __init__(self, ativo: bool, sessao: str = None, evento: str = "rerun"):
+        self.ativo = ativo
+        self.sessao = sessao
+        self.evento = evento  # "rerun" ou "rerun_fragmento" (só um st.fragment)
+        self.fases = {}   # nome -> ms (somados, se a fase se repetir)
+        self.caches = {}  # nome -> {"hits", "misses"}
+        self._inicio = time.perf_counter()
+
+    @contextlib.contextmanager
+    def fase(self, nome: str):
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] = self.fases.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def _conta(self, cache: str, hit: bool) -> None:
+        contagem = self.caches.setdefault(cache, {"hits": 0, "misses": 0})
+        contagem["hits" if hit else "misses"] += 1
+
+    def cacheada(self, nome: str, fn, *args, **kwargs):
+        """
+        Chama uma função com st.cache_data/st.cache_resource medindo o tempo
+        e registrando hit ou miss (o corpo dela chama registra_execucao(nome)).
+        """
+        if not self.ativo:
+            return fn(*args, **kwargs)
+        antes = _execucoes_de(nome)
+        with self.fase(nome):
+            resultado = fn(*args, **kwargs)
+        self._conta(nome, hit=_execucoes_de(nome) == antes)
+        return resultado
+
+    def figura(self, nome: str, cache, chave: tuple, constroi):
+        """
+        CacheFiguras.obtem medindo a consulta (fig_<nome>) e, em miss, a
+        montagem no px (px_<nome>).
+        """
+        if not self.ativo:
+            return cache.obtem(chave, constroi)
+
+        montou = []
+
+        def constroi_medido():
+            montou.append(True)
+            with self.fase(f"px_{nome}"):
+                return constroi()
+
+        with self.fase(f"fig_{nome}"):
+            fig = cache.obtem(chave, constroi_medido)
+        self._conta("cache_figuras", hit=not montou)
+        return fig
+
+    def como_dict(self) -> dict:
+        return {
+            "evento": self.evento,
+            "sessao": self.sessao,
+            "total_ms": round((time.perf_counter() - self._inicio) * 1000, 3),
+            "fases_ms": {nome: round(ms, 3) for nome, ms in self.fases.items()},
+            "caches": self.caches,
+        }
+
+    def emite_log(self) -> dict:
+        """Uma linha JSON por rerun no logger neuropulse.diagnostico."""
+        dados = self.como_dict()
+        if self.ativo:
+            _log.info(json.dumps(dados, ensure_ascii=False))
+        return dados
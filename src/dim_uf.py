@@ -0,0 +1,116 @@
+import unicodedata  # para remover acentos
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# DIMENSÃO DE UNIDADES DA FEDERAÇÃO
+# ===============================
+# Fonte única para ETL e dashboard: código IBGE, nome canônico,
+# sigla/ISO 3166-2, região e coordenadas usadas no mapa (capital).
+
+_UFS = [
+    # (código IBGE, nome canônico, sigla, região, lat, lon)
+    (11, "Rondônia", "RO", "Norte", -8.76, -63.90),
+    (12, "Acre", "AC", "Norte", -9.97, -67.81),
+    (13, "Amazonas", "AM", "Norte", -3.13, -60.02),
+    (14, "Roraima", "RR", "Norte", 2.82, -60.67),
+    (15, "Pará", "PA", "Norte", -1.46, -48.49),
+    (16, "Amapá", "AP", "Norte", 0.03, -51.07),
+    (17, "Tocantins", "TO", "Norte", -10.25, -48.32),
+    (21, "Maranhão", "MA", "Nordeste", -2.53, -44.30),
+    (22, "Piauí", "PI", "Nordeste", -5.09, -42.80),
+    (23, "Ceará", "CE", "Nordeste", -3.72, -38.54),
+    (24, "Rio Grande do Norte", "RN", "Nordeste", -5.81, -35.21),
+    (25, "Paraíba", "PB", "Nordeste", -7.12, -34.86),
+    (26, "Pernambuco", "PE", "Nordeste", -8.05, -34.90),
+    (27, "Alagoas", "AL", "Nordeste", -9.66, -35.74),
+    (28, "Sergipe", "SE", "Nordeste", -10.91, -37.07),
+    (29, "Bahia", "BA", "Nordeste", -12.97, -38.50),
+    (31, "Minas Gerais", "MG", "Sudeste", -19.92, -43.94),
+    (32, "Espírito Santo", "ES", "Sudeste", -20.32, -40.34),
+    (33, "Rio de Janeiro", "RJ", "Sudeste", -22.91, -43.17),
+    (35, "São Paulo", "SP", "Sudeste", -23.55, -46.63),
+    (41, "Paraná", "PR", "Sul", -25.43, -49.27),
+    (42, "Santa Catarina", "SC", "Sul", -27.59, -48.55),
+    (43, "Rio Grande do Sul", "RS", "Sul", -30.03, -51.23),
+    (50, "Mato Grosso do Sul", "MS", "Centro-Oeste", -20.44, -54.65),
+    (51, "Mato Grosso", "MT", "Centro-Oeste", -15.60, -56.10),
+    (52, "Goiás", "GO", "Centro-Oeste", -16.68, -49.25),
+    (53, "Distrito Federal", "DF", "Centro-Oeste", -15.78, -47.93),
+]
+
+# Agregado nacional (nível territorial 1 do SIDRA)
+COD_BRASIL = 1
+NOME_BRASIL = "Brasil"
+
+DIM_UF = pd.DataFrame(_UFS, columns=["cod_uf", "UF", "sigla", "regiao", "lat", "lon"])
+DIM_UF["cod_uf"] = DIM_UF["cod_uf"].astype("int8")
+DIM_UF["uf_iso"] = "BR-" + DIM_UF["sigla"]
+
+# Lookups prontos (dicionários pequenos, montados uma vez por processo)
+NOME_POR_CODIGO = dict(zip(DIM_UF["cod_uf"], DIM_UF["UF"]))
+ISO_POR_CODIGO = dict(zip(DIM_UF["cod_uf"], DIM_UF["uf_iso"]))
+CODIGO_POR_NOME = dict(zip(DIM_UF["UF"], DIM_UF["cod_uf"]))
+
+
+def chave_uf(nome: str) -> str:
+    """
+    Chave de comparação de um nome de UF: sem espaços nas pontas, sem
+    acentos e em maiúsculas. Nomes com mojibake (UTF-8 lido como latin1,
+    ex.: "RondÃ´nia") são corrigidos antes.
+    """
+    nome = str(nome).strip()
+    if "Ã" in nome:
+        try:
+            nome = nome.encode("latin1").decode("utf-8")
+        except UnicodeError:
+            pass
+
+    return (
+        unicodedata.normalize("NFKD", nome)
+        .encode("ascii", "ignore")
+        .decode("ascii")
+        .upper()
+    )
+
+
+# Chave sem acento -> código IBGE
+_CODIGO_POR_CHAVE = {chave_uf(nome): cod for nome, cod in CODIGO_POR_NOME.items()}
+_CODIGO_POR_CHAVE[chave_uf(NOME_BRASIL)] = COD_BRASIL
+
+
+def canonicaliza_uf(serie_uf: pd.Series):
+    """
+    Padroniza nomes de UF e devolve (nomes canônicos, códigos IBGE),
+    alinhados ao índice da série.
+
+    A normalização Unicode roda só nos valores distintos (factorize) e o
+    resultado é espalhado de volta pelos códigos, então o custo por linha é
+    só um take. Nomes fora da dimensão ficam com o texto original (sem
+    espaços nas pontas) e código nulo.
+    """
+    codigos_linha, distintos = pd.factorize(serie_uf, use_na_sentinel=False)
+
+    nomes_distintos = []
+    cods_distintos = []
+    for valor in distintos:
+        cod = _CODIGO_POR_CHAVE.get(chave_uf(valor))
+        if cod == COD_BRASIL:
+            nomes_distintos.append(NOME_BRASIL)
+        elif cod is not None:
+            nomes_distintos.append(NOME_POR_CODIGO[cod])
+        else:
+            nomes_distintos.append(str(valor).strip())
+        cods_distintos.append(cod)
+
+    nomes = pd.Series(
+        np.array(nomes_distintos, dtype=object)[codigos_linha],
+        index=serie_uf.index,
+        dtype=object,
+    )
+    codigos = pd.Series(
+        pd.array(cods_distintos, dtype="Int8").take(codigos_linha),
+        index=serie_uf.index,
+    )
+    return nomes, codigos
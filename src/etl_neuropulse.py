@@ -1,6 +1,45 @@
+import argparse
+import cProfile
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from pathlib import Path
-import unicodedata  # para remover acentos
+
+from cubo_neuropulse import COLUNAS_CUBO, escreve_cubo, escreve_cubo_lotes
+from dim_uf import canonicaliza_uf
+from particoes_neuropulse import (
+    CARIMBO_FILE,
+    SCHEMA_NEUROPULSE,
+    SNAPSHOT_FILE,
+    ConstantesBlocos,
+    constantes_tabela,
+    escreve_particoes,
+    escreve_snapshot,
+    grava_carimbo,
+    grava_metadados,
+    itera_particoes,
+    pasta_versao,
+    prepara_versao,
+    publica_particoes,
+    versao_publicada,
+)
+from relatorio_etl import RelatorioETL, arquivo, estagio, relatorio_ativo
+from validacao_neuropulse import (
+    POLITICA_PADRAO,
+    POLITICAS_CONFLITO,
+    ValidadorBlocos,
+    escreve_quarentena,
+    resumo_contagens,
+    valida,
+)
 
 # ===============================
 # CONFIGURAÇÕES DE DIRETÓRIOS
@@ -12,122 +51,292 @@ DATA_PROCESSED = BASE_DIR / "data" / "processed"
 
 DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
 
+# Store colunar particionado por ano/indicador (lido pelo dashboard)
+# + CSV (apenas exportação)
+OUT_DATASET = DATA_PROCESSED / "neuropulse_pns_depressao"
+OUT_CSV = DATA_PROCESSED / "neuropulse_pns_depressao.csv"
 
-# ===============================
-# HELPER: PADRONIZA UFs
-# ===============================
+# Snapshot Arrow IPC do dataset para a partida rápida do dashboard
+SNAPSHOT_PATH = DATA_PROCESSED / SNAPSHOT_FILE
 
-def _padroniza_uf(serie_uf: pd.Series) -> pd.Series:
-    """
-    Padroniza nomes de UF para evitar duplicação:
-    - remove espaços extras
-    - remove acentos para comparar
-    - mapeia para um nome canônico (com acento correto)
-    """
-    s = serie_uf.astype(str).str.strip()
+# Carimbo da versão publicada: gravado por último em cada build (o
+# dashboard usa a versão dele como chave de cache)
+CARIMBO_PATH = DATA_PROCESSED / CARIMBO_FILE
 
-    # remove acentos e deixa maiúsculo para chave do dicionário
-    chave = (
-        s.str.normalize("NFKD")
-         .str.encode("ascii", "ignore")
-         .str.decode("ascii")
-         .str.upper()
-    )
+# Linhas barradas pela validação (ver validacao_neuropulse), com o motivo
+QUARENTENA_CSV = DATA_PROCESSED / "neuropulse_quarentena.csv"
 
-    mapa_uf = {
-        "ACRE": "Acre",
-        "ALAGOAS": "Alagoas",
-        "AMAPA": "Amapá",
-        "AMAZONAS": "Amazonas",
-        "BAHIA": "Bahia",
-        "CEARA": "Ceará",
-        "DISTRITO FEDERAL": "Distrito Federal",
-        "ESPIRITO SANTO": "Espírito Santo",
-        "GOIAS": "Goiás",
-        "MARANHAO": "Maranhão",
-        "MATO GROSSO": "Mato Grosso",
-        "MATO GROSSO DO SUL": "Mato Grosso do Sul",
-        "MINAS GERAIS": "Minas Gerais",
-        "PARA": "Pará",
-        "PARAIBA": "Paraíba",
-        "PARANA": "Paraná",
-        "PERNAMBUCO": "Pernambuco",
-        "PIAUI": "Piauí",
-        "RIO DE JANEIRO": "Rio de Janeiro",
-        "RIO GRANDE DO NORTE": "Rio Grande do Norte",
-        "RIO GRANDE DO SUL": "Rio Grande do Sul",
-        "RONDONIA": "Rondônia",
-        "RORAIMA": "Roraima",
-        "SANTA CATARINA": "Santa Catarina",
-        "SAO PAULO": "São Paulo",
-        "SERGIPE": "Sergipe",
-        "TOCANTINS": "Tocantins",
-        "BRASIL": "Brasil",
-    }
+# ETL incremental: manifesto dos arquivos brutos + intermediários já limpos
+MANIFEST_PATH = DATA_PROCESSED / "manifest.json"
+CACHE_DIR = DATA_PROCESSED / "cache"
+
+# Relatório da última execução (tempo, CPU, linhas e memória por estágio)
+# e, com --perfil, o dump do cProfile
+RELATORIO_PATH = DATA_PROCESSED / "etl_relatorio.json"
+PERFIL_PATH = DATA_PROCESSED / "etl_perfil.prof"
+
+# Suba este número sempre que a limpeza dos loaders mudar:
+# invalida todos os intermediários gravados com a versão anterior.
+CACHE_VERSION = 4
 
-    return chave.map(mapa_uf).fillna(s)
+# Entra na versão do dataset junto com CACHE_VERSION: suba quando a
+# validação ou a escrita do store mudarem a saída para as mesmas entradas.
+VERSAO_DATASET = 1
+
+# Modo streaming: teto de células (linhas × colunas) lidas do CSV bruto por
+# bloco. Define o pico de memória, independente do tamanho do arquivo.
+CELULAS_POR_BLOCO = 250_000
 
 
 # ===============================
-# FUNÇÃO BASE PARA CSV DO SIDRA (TRANSPOSTO)
+# MOTOR ÚNICO PARA CSVs DO SIDRA
 # ===============================
 
-def _load_sidra_transposto(csv_path: Path) -> pd.DataFrame:
+# Símbolos do SIDRA para célula sem valor numérico
+# ("-" zero absoluto, ".." não se aplica, "..." não disponível, "X" suprimido)
+SIDRA_SIMBOLOS = ["-", "..", "...", "X"]
+
+# Ordem padrão das colunas do dataset final
+COLUNAS_PADRAO = [
+    "year",
+    "cod_uf",
+    "UF",
+    "sexo",
+    "faixa_idade",
+    "domicilio",
+    "transtorno",
+    "indicador",
+    "valor",
+]
+
+
+# Níveis geográficos das entidades de uma tabela (coluna UF do dataset)
+NIVEIS_GEOGRAFICOS = ("uf", "municipio")
+
+
+@dataclass(frozen=True)
+class SidraSpec:
     """
-    Lê CSV exportado do SIDRA no formato 'transposto':
-    - primeiras linhas = metadados
-    - cabeçalho com UFs nas colunas
-    - última linha (Fonte) removida
+    Descrição declarativa de uma tabela exportada do SIDRA:
+    - layout "transposto": UFs nas colunas (coluna_grupo opcional preserva a 1ª coluna)
+    - layout "longo": uma linha por célula, colunas nomeadas em `colunas`
+    - skiprows: linhas de metadados antes do cabeçalho
+    - fixas: dimensões constantes da tabela (ex.: year, sexo)
+    - remove_ufs: linhas agregadas a descartar (ex.: "Brasil")
+    - nivel: nível geográfico das entidades (NIVEIS_GEOGRAFICOS); só no
+      nível "uf" a validação exige uma UF da dim_uf
+    """
+    layout: str
+    skiprows: int
+    coluna_grupo: str = None
+    colunas: tuple = ()
+    fixas: dict = field(default_factory=dict)
+    remove_ufs: tuple = ()
+    nivel: str = "uf"
+
+    def __post_init__(self):
+        if self.nivel not in NIVEIS_GEOGRAFICOS:
+            raise ValueError(
+                f"Nível geográfico desconhecido: {self.nivel!r} "
+                f"(use {', '.join(NIVEIS_GEOGRAFICOS)})"
+            )
+
+
+def _le_sidra(csv_path: Path, spec: SidraSpec, **kwargs):
+    """read_csv com o dialeto do SIDRA (latin1, ";", vírgula decimal já na leitura)."""
+    return pd.read_csv(
+        csv_path,
+        sep=";",
+        encoding="latin1",
+        skiprows=spec.skiprows,
+        decimal=",",
+        na_values=SIDRA_SIMBOLOS,
+        **kwargs,
+    )
 
-    Retorna um DataFrame longo com colunas:
-    UF | valor
+
+def _linhas_texto(df: pd.DataFrame, texto: str) -> np.ndarray:
     """
+    Máscara das linhas com `texto` em alguma célula. Vetorizada e só nas
+    colunas de texto (colunas numéricas não podem conter rodapé).
+    """
+    mascara = np.zeros(len(df), dtype=bool)
+    # dtypes de uma vez: df[col] por coluna custa caro em tabelas com
+    # centenas de milhares de colunas (nível municipal)
+    for col in df.select_dtypes(include="object").columns:
+        mascara |= df[col].str.contains(texto, na=False, regex=False).to_numpy()
+    return mascara
 
-    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=6)
 
-    # Remove linha da fonte (geralmente começa com "Fonte:")
+def _para_numero(serie: pd.Series) -> pd.Series:
+    """
+    Garante coluna numérica. A vírgula decimal já foi tratada no read_csv;
+    só colunas que vieram como texto (espaços, símbolos novos) passam pela
+    limpeza manual.
+    """
+    if not pd.api.types.is_object_dtype(serie):
+        return pd.to_numeric(serie, errors="coerce")
+    serie = serie.str.replace(",", ".", regex=False).str.replace(" ", "", regex=False)
+    return pd.to_numeric(serie, errors="coerce")
+
+
+def _limpa_bloco(df: pd.DataFrame, spec: SidraSpec) -> pd.DataFrame:
+    """
+    Uma passada sobre um bloco lido do CSV:
+    rodapés -> colunas extras -> conversão numérica -> formato longo -> UF -> dimensões fixas
+    """
     primeira_col = df.columns[0]
-    df = df[~df[primeira_col].astype(str).str.contains("Fonte:", na=False)]
 
-    # Remove colunas indesejadas, como "Notas" ou vazias
-    colunas_remover = [
-        c for c in df.columns
-        if isinstance(c, str) and ("Notas" in c or c.strip() == "")
-    ]
-    if colunas_remover:
-        print("Removendo colunas extras:", colunas_remover)
-        df = df.drop(columns=colunas_remover, errors="ignore")
+    with estagio("rodape", len(df)) as medida:
+        # Remove linha da fonte ("Fonte: IBGE - ...") e qualquer linha de
+        # "Notas" (vetorizado). Só o prefixo "Fonte:": um rótulo de grupo
+        # com "Fonte" no meio é dado, não rodapé.
+        if pd.api.types.is_object_dtype(df[primeira_col]):
+            df = df[~df[primeira_col].str.lstrip().str.startswith("Fonte:", na=False)]
+        df = df[~_linhas_texto(df, "Notas")]
+
+        if spec.layout == "transposto":
+            # Remove colunas indesejadas, como "Notas" ou vazias
+            colunas_remover = [
+                c for c in df.columns
+                if isinstance(c, str) and ("Notas" in c or c.strip() == "")
+            ]
+            if colunas_remover:
+                df = df.drop(columns=colunas_remover)
+        medida.saida(len(df))
+
+    if spec.layout == "transposto":
+        grupo = []
+        if spec.coluna_grupo:
+            df = df.rename(columns={primeira_col: spec.coluna_grupo})
+            grupo = [spec.coluna_grupo]
+
+        # Só colunas que não vieram numéricas do read_csv precisam de limpeza
+        with estagio("numerico", len(df)) as medida:
+            valores = df.drop(columns=grupo)
+            texto = valores.select_dtypes(include="object").columns
+            if len(texto):
+                valores[texto] = valores[texto].apply(_para_numero)
+            medida.saida(len(valores))
+
+        # UFs vêm do cabeçalho: padroniza só os nomes das colunas
+        n_linhas, n_ufs = valores.shape
+        with estagio("uf", n_ufs) as medida:
+            nomes_uf, cods_uf = canonicaliza_uf(pd.Series(valores.columns, dtype=object))
+            medida.saida(len(nomes_uf))
+
+        # "melt" direto em numpy: matriz linhas × UFs lida coluna a coluna
+        # (mesma ordem do DataFrame.melt, sem o custo por coluna dele)
+        with estagio("melt", n_linhas) as medida:
+            long_df = pd.DataFrame(
+                {
+                    **{g: np.tile(df[g].to_numpy(), n_ufs) for g in grupo},
+                    "cod_uf": cods_uf.array.repeat(n_linhas),
+                    "UF": np.repeat(nomes_uf.to_numpy(), n_linhas),
+                    "valor": valores.to_numpy(dtype=float).T.ravel(),
+                }
+            )
+            long_df = long_df.dropna(subset=["valor"])
+            medida.saida(len(long_df))
+
+    elif spec.layout == "longo":
+        cols = df.columns.tolist()
+        if len(cols) < len(spec.colunas):
+            raise ValueError(f"CSV tem menos de {len(spec.colunas)} colunas: {cols}")
+
+        # Já vem longo: só renomeia/seleciona as colunas do spec
+        with estagio("melt", len(df)) as medida:
+            long_df = df.rename(columns=dict(zip(cols, spec.colunas)))[list(spec.colunas)]
+            grupo = [c for c in spec.colunas if c not in ("UF", "valor")]
+            for col in grupo:
+                long_df[col] = long_df[col].astype(str).str.strip()
+            medida.saida(len(long_df))
+
+        with estagio("numerico", len(long_df)) as medida:
+            long_df["valor"] = _para_numero(long_df["valor"])
+            long_df = long_df.dropna(subset=["valor"])
+            medida.saida(len(long_df))
+
+        with estagio("uf", len(long_df)) as medida:
+            long_df["UF"], long_df["cod_uf"] = canonicaliza_uf(long_df["UF"])
+            medida.saida(len(long_df))
+
+    else:
+        raise ValueError(f"Layout SIDRA desconhecido: {spec.layout!r}")
+
+    with estagio("dimensoes", len(long_df)) as medida:
+        if spec.remove_ufs:
+            long_df = long_df[~long_df["UF"].isin(spec.remove_ufs)]
+
+        for col, valor in spec.fixas.items():
+            long_df[col] = valor
+
+        if set(COLUNAS_PADRAO).issubset(long_df.columns):
+            long_df = long_df[COLUNAS_PADRAO]
+        medida.saida(len(long_df))
 
-    # Remove qualquer linha que contenha "Notas"
-    df = df[~df.apply(lambda row: row.astype(str).str.contains("Notas").any(), axis=1)]
+    return long_df
 
-    # Derrete colunas de UF em linhas
-    long_df = df.melt(var_name="UF", value_name="valor")
 
-    # PADRONIZA UFs
-    long_df["UF"] = _padroniza_uf(long_df["UF"])
+def parse_sidra(csv_path: Path, spec: SidraSpec) -> pd.DataFrame:
+    """Lê e limpa uma tabela do SIDRA inteira, conforme o spec (uma única passada)."""
+    with estagio("leitura") as medida:
+        df = _le_sidra(csv_path, spec)
+        medida.saida(len(df))
+    return _limpa_bloco(df, spec)
 
-    # Limpa vírgula decimal → ponto, espaços, etc.
-    long_df["valor"] = (
-        long_df["valor"]
-        .astype(str)
-        .str.replace(",", ".", regex=False)
-        .str.replace(" ", "")
-    )
 
-    # Converte para número, ignorando erros
-    long_df["valor"] = pd.to_numeric(long_df["valor"], errors="coerce")
+def _conta_colunas(csv_path: Path, spec: SidraSpec) -> int:
+    """
+    Número de colunas do cabeçalho, lido direto da linha de texto.
+    (read_csv com nrows=0 trava em cabeçalhos com centenas de milhares de
+    colunas, como as exportações em nível municipal.)
+    """
+    with open(csv_path, encoding="latin1", newline="") as f:
+        for _ in range(spec.skiprows):
+            f.readline()
+        return len(next(csv.reader([f.readline()], delimiter=";"), []))
 
-    # Remove linhas sem valor numérico
-    long_df = long_df.dropna(subset=["valor"])
 
-    return long_df
+def iter_sidra(csv_path: Path, spec: SidraSpec, celulas_por_bloco: int = CELULAS_POR_BLOCO):
+    """
+    Versão em streaming de parse_sidra: lê o CSV em blocos de no máximo
+    `celulas_por_bloco` células (linhas × colunas) e devolve, bloco a bloco,
+    o mesmo formato longo já limpo. Só um bloco fica em memória.
+    """
+    n_colunas = _conta_colunas(csv_path, spec)
+    linhas = max(1, celulas_por_bloco // max(1, n_colunas))
+
+    with _le_sidra(csv_path, spec, chunksize=linhas) as leitor:
+        while True:
+            with estagio("leitura") as medida:
+                bloco = next(leitor, None)
+                medida.saida(0 if bloco is None else len(bloco))
+            if bloco is None:
+                break
+
+            long_df = _limpa_bloco(bloco, spec)
+            if not long_df.empty:
+                yield long_df
 
 
 # ===============================
-# VARIAÇÃO: COM GRUPO (NÃO USADA EM IDADE AGORA, MAS MANTIDA)
+# FUNÇÕES BASE PARA CSV DO SIDRA (TRANSPOSTO)
 # ===============================
 
+def _load_sidra_transposto(csv_path: Path) -> pd.DataFrame:
+    """
+    Lê CSV exportado do SIDRA no formato 'transposto':
+    - primeiras linhas = metadados
+    - cabeçalho com UFs nas colunas
+    - última linha (Fonte) removida
+
+    Retorna um DataFrame longo com colunas:
+    UF | valor
+    """
+    return parse_sidra(csv_path, SidraSpec(layout="transposto", skiprows=6))
+
+
 def _load_sidra_transposto_com_grupo(csv_path: Path, nome_col_grupo: str) -> pd.DataFrame:
     """
     Versão do loader que preserva a 1ª coluna como um 'grupo'
@@ -136,213 +345,704 @@ def _load_sidra_transposto_com_grupo(csv_path: Path, nome_col_grupo: str) -> pd.
     Retorna um DataFrame longo com colunas:
     nome_col_grupo | UF | valor
     """
+    spec = SidraSpec(layout="transposto", skiprows=6, coluna_grupo=nome_col_grupo)
+    return parse_sidra(csv_path, spec)
 
-    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=6)
-
-    # Remove linha da fonte (geralmente começa com "Fonte:")
-    primeira_col = df.columns[0]
-    df = df[~df[primeira_col].astype(str).str.contains("Fonte:", na=False)]
 
-    # Remove colunas indesejadas, como "Notas" ou vazias
-    colunas_remover = [
-        c for c in df.columns
-        if isinstance(c, str) and ("Notas" in c or c.strip() == "")
-    ]
-    if colunas_remover:
-        print("Removendo colunas extras:", colunas_remover)
-        df = df.drop(columns=colunas_remover, errors="ignore")
+# ===============================
+# TABELAS DA PNS (SPECS POR EDIÇÃO)
+# ===============================
 
-    # Remove qualquer linha que contenha "Notas"
-    df = df[~df.apply(lambda row: row.astype(str).str.contains("Notas").any(), axis=1)]
+def dimensoes_pns(ano: int = 2019) -> dict:
+    """Dimensões comuns a todas as tabelas de uma edição da PNS usadas no projeto."""
+    return {
+        "year": ano,
+        "domicilio": "Total",
+        "indicador": "depressao_diagnosticada_percentual",
+        "transtorno": "Depressão",
+    }
 
-    # Renomeia a 1ª coluna para o nome do grupo (ex.: "faixa_idade")
-    df = df.rename(columns={primeira_col: nome_col_grupo})
 
-    # Derrete as UFs em linhas, preservando o grupo
-    long_df = df.melt(
-        id_vars=[nome_col_grupo],
-        var_name="UF",
-        value_name="valor"
-    )
+DIMENSOES_PNS_2019 = dimensoes_pns(2019)
 
-    # PADRONIZA UFs
-    long_df["UF"] = _padroniza_uf(long_df["UF"])
 
-    # Limpa vírgula decimal → ponto, espaços, etc.
-    long_df["valor"] = (
-        long_df["valor"]
-        .astype(str)
-        .str.replace(",", ".", regex=False)
-        .str.replace(" ", "")
+def spec_pns_sexo(sexo_rotulo: str, ano: int = 2019, nivel: str = "uf") -> SidraSpec:
+    """
+    Tabela 4694 — SEXO × UF (transposta, um arquivo por sexo). Exportada
+    em nível municipal (nivel="municipio"), traz um município por coluna.
+    """
+    return SidraSpec(
+        layout="transposto",
+        skiprows=6,
+        fixas={**dimensoes_pns(ano), "sexo": sexo_rotulo, "faixa_idade": "Total"},
+        nivel=nivel,
     )
 
-    # Converte para número, ignorando erros
-    long_df["valor"] = pd.to_numeric(long_df["valor"], errors="coerce")
 
-    # Remove linhas sem valor numérico
-    long_df = long_df.dropna(subset=["valor"])
+def spec_pns_idade(ano: int = 2019) -> SidraSpec:
+    """
+    Tabela 4695 — IDADE × UF (formato longo):
+    "Grupo de idade";"Unidade da Federação";""
+    "18 a 29 anos";"Rondônia";"7,2"
+    """
+    return SidraSpec(
+        layout="longo",
+        skiprows=4,
+        colunas=("faixa_idade", "UF", "valor"),
+        fixas={**dimensoes_pns(ano), "sexo": "Total"},   # tabela já é agregada (Total)
+        remove_ufs=("Brasil",),
+    )
 
-    return long_df
 
+SPEC_PNS_IDADE = spec_pns_idade(2019)
 
-# ===============================
-# TABELA 4694 — SEXO × UF
-# ===============================
 
-def _load_pns_sexo(csv_path: Path, sexo_rotulo: str) -> pd.DataFrame:
+def _load_pns_sexo(csv_path: Path, sexo_rotulo: str, ano: int = 2019) -> pd.DataFrame:
     """
     Lê um CSV da Tabela 4694 (já filtrado por 1 sexo)
     e devolve no formato padrão do projeto.
     """
-    df_long = _load_sidra_transposto(csv_path)
-
-    df_long["year"] = 2019
-    df_long["sexo"] = sexo_rotulo      # "Total", "Masculino" ou "Feminino"
-    df_long["faixa_idade"] = "Total"
-    df_long["domicilio"] = "Total"
-    df_long["indicador"] = "depressao_diagnosticada_percentual"
-    df_long["transtorno"] = "Depressão"
-
-    df_long = df_long[
-        [
-            "year",
-            "UF",
-            "sexo",
-            "faixa_idade",
-            "domicilio",
-            "transtorno",
-            "indicador",
-            "valor",
-        ]
-    ]
-
-    return df_long
+    return parse_sidra(csv_path, spec_pns_sexo(sexo_rotulo, ano))
 
 
 def load_pns_depressao_sexo(
     csv_total: Path,
     csv_masc: Path,
     csv_fem: Path,
+    jobs: int = 1,
+    ano: int = 2019,
 ) -> pd.DataFrame:
     """
     Junta os três arquivos de sexo:
     - pns_depressao_sexo_total.csv      -> sexo = "Total"
     - pns_depressao_sexo_masculino.csv  -> sexo = "Masculino"
     - pns_depressao_sexo_feminino.csv   -> sexo = "Feminino"
+
+    Com jobs > 1, os três arquivos são lidos em paralelo.
     """
-    df_total = _load_pns_sexo(csv_total, "Total")
-    df_masc = _load_pns_sexo(csv_masc, "Masculino")
-    df_fem = _load_pns_sexo(csv_fem, "Feminino")
+    fontes = [
+        (csv_total, spec_pns_sexo("Total", ano)),
+        (csv_masc, spec_pns_sexo("Masculino", ano)),
+        (csv_fem, spec_pns_sexo("Feminino", ano)),
+    ]
 
-    df_sexo = pd.concat([df_total, df_masc, df_fem], ignore_index=True)
+    df_sexo = pd.concat(list(_executa_fontes(fontes, jobs)), ignore_index=True)
     return df_sexo
 
 
+def load_pns_depressao_idade(csv_path: Path, ano: int = 2019) -> pd.DataFrame:
+    """
+    Lê o CSV da tabela 4695 no formato longo e converte para o padrão do
+    projeto (remove a linha agregada "Brasil").
+    """
+    return parse_sidra(csv_path, spec_pns_idade(ano))
+
+
 # ===============================
-# TABELA 4695 — IDADE × UF (FORMATO LONGO)
+# LISTA DE FONTES BRUTAS (SIDRA)
 # ===============================
 
-def load_pns_depressao_idade(csv_path: Path) -> pd.DataFrame:
+# Edição cujos arquivos ficam direto em data/raw; as demais ficam em
+# data/raw/pns_<ano>/, com os mesmos nomes de arquivo
+ANO_PNS_RAIZ = 2019
+
+
+def edicoes_pns() -> list:
+    """Edições da PNS disponíveis em data/raw, como (ano, pasta), por ano."""
+    edicoes = {ANO_PNS_RAIZ: DATA_RAW}
+    for pasta in DATA_RAW.glob("pns_*"):
+        ano = pasta.name[len("pns_"):]
+        if pasta.is_dir() and ano.isdigit():
+            edicoes[int(ano)] = pasta
+    return sorted(edicoes.items())
+
+
+def _fontes_pns(nivel: str = "uf") -> list:
     """
-    Lê o CSV da tabela 4695 NO FORMATO LONGO, como você mostrou:
-    "Grupo de idade";"Unidade da Federação";""
-    "18 a 29 anos";"Rondônia";"7,2"
-    ...
+    Lista das tabelas brutas do SIDRA que compõem a base, como tuplas:
+    (arquivo em data/raw, SidraSpec)
 
-    Converte para o padrão do projeto.
+    Nas edições em subpasta, tabelas que não foram exportadas ficam de fora
+    (ex.: uma edição sem o recorte por idade). `nivel` é o nível geográfico
+    das tabelas por sexo; a de idade (4695) é sempre por UF.
     """
-    # pula as 4 primeiras linhas de metadados e usa a 5ª como cabeçalho
-    df = pd.read_csv(csv_path, sep=";", encoding="latin1", skiprows=4, header=0)
+    fontes = []
+    for ano, pasta in edicoes_pns():
+        tabelas = [
+            (pasta / "pns_depressao_sexo_total.csv", spec_pns_sexo("Total", ano, nivel)),
+            (pasta / "pns_depressao_sexo_masculino.csv", spec_pns_sexo("Masculino", ano, nivel)),
+            (pasta / "pns_depressao_sexo_feminino.csv", spec_pns_sexo("Feminino", ano, nivel)),
+            (pasta / "pns_depressao_uf_idade.csv", spec_pns_idade(ano)),
+        ]
+        fontes += [
+            (csv_path, spec)
+            for csv_path, spec in tabelas
+            if pasta == DATA_RAW or csv_path.exists()
+        ]
+    return fontes
+
+
+# ===============================
+# ETL INCREMENTAL (MANIFESTO + CACHE)
+# ===============================
+
+def _hash_arquivo(path: Path) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos de 1 MB."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _le_manifest() -> dict:
+    """Lê o manifesto do último build (ou devolve um vazio)."""
+    if not MANIFEST_PATH.exists():
+        return {"cache_version": CACHE_VERSION, "arquivos": {}}
+
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+    # Intermediários de outra versão da limpeza não servem mais
+    if manifest.get("cache_version") != CACHE_VERSION:
+        return {"cache_version": CACHE_VERSION, "arquivos": {}}
+
+    return manifest
 
-    # Garante nomes de colunas (independe do nome exato da terceira)
-    cols = df.columns.tolist()
-    # Esperado: [ "Grupo de idade", "Unidade da Federação", <valor> ]
-    if len(cols) < 3:
-        raise ValueError(f"CSV de idade tem menos de 3 colunas: {cols}")
 
-    df = df.rename(
-        columns={
-            cols[0]: "faixa_idade",
-            cols[1]: "UF",
-            cols[2]: "valor",
-        }
+def _grava_manifest(manifest: dict) -> None:
+    MANIFEST_PATH.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2),
+        encoding="utf-8",
     )
 
-    # Remove linha de Fonte, se existir
-    df = df[~df["faixa_idade"].astype(str).str.contains("Fonte", na=False)]
 
-    # Tira espaços e padroniza
-    df["faixa_idade"] = df["faixa_idade"].astype(str).str.strip()
-    df["UF"] = _padroniza_uf(df["UF"])
+def _chave_arquivo(csv_path: Path) -> str:
+    """
+    Nome do arquivo bruto no manifesto e no cache: caminho relativo a
+    data/raw, com "__" no lugar das pastas (edições em subpasta têm os
+    mesmos nomes de arquivo da edição da raiz).
+    """
+    try:
+        return "__".join(csv_path.relative_to(DATA_RAW).parts)
+    except ValueError:
+        return csv_path.name
+
+
+def _busca_cache(csv_path: Path, spec: SidraSpec, manifest: dict):
+    """
+    Procura o intermediário já limpo de um arquivo bruto.
+
+    - tamanho e mtime iguais ao manifesto -> usa o cache direto
+    - tamanho/mtime diferentes, mas hash igual -> usa o cache e atualiza o mtime
+    - qualquer outro caso -> cache inválido
 
-    # Limpa valor (vírgula → ponto)
-    df["valor"] = (
-        df["valor"]
-        .astype(str)
-        .str.replace(",", ".", regex=False)
-        .str.replace(" ", "")
+    Retorna (DataFrame ou None, sha256 já calculado ou None), para não
+    recalcular o hash ao registrar o novo intermediário.
+    """
+    stat = csv_path.stat()
+    chave = _chave_arquivo(csv_path)
+    cache_path = CACHE_DIR / f"{Path(chave).stem}.parquet"
+    entrada = manifest["arquivos"].get(chave)
+    cache_valido = (
+        entrada is not None
+        and entrada.get("spec") == repr(spec)
+        and cache_path.exists()
     )
-    df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
-    df = df.dropna(subset=["valor"])
-
-    # Remove linha agregada "Brasil", se tiver
-    df = df[df["UF"] != "Brasil"]
-
-    # Adiciona colunas fixas
-    df["year"] = 2019
-    df["sexo"] = "Total"      # tabela já é agregada (Total)
-    df["domicilio"] = "Total"
-    df["indicador"] = "depressao_diagnosticada_percentual"
-    df["transtorno"] = "Depressão"
-
-    df = df[
-        [
-            "year",
-            "UF",
-            "sexo",
-            "faixa_idade",
-            "domicilio",
-            "transtorno",
-            "indicador",
-            "valor",
-        ]
-    ]
+    if not cache_valido:
+        return None, None
 
-    return df
+    mesmo_stat = (
+        entrada["size"] == stat.st_size
+        and entrada["mtime_ns"] == stat.st_mtime_ns
+    )
+    sha256 = None if mesmo_stat else _hash_arquivo(csv_path)
+
+    if mesmo_stat or entrada["sha256"] == sha256:
+        print(f"Cache (sem mudanças):      {chave}")
+        entrada["size"] = stat.st_size
+        entrada["mtime_ns"] = stat.st_mtime_ns
+        return pd.read_parquet(cache_path), sha256
+
+    return None, sha256
+
+
+def _registra_cache(
+    csv_path: Path,
+    spec: SidraSpec,
+    df_long: pd.DataFrame,
+    manifest: dict,
+    sha256: str = None,
+) -> None:
+    """Grava o intermediário limpo e atualiza a entrada do manifesto (em memória)."""
+    stat = csv_path.stat()
+    chave = _chave_arquivo(csv_path)
+    cache_path = CACHE_DIR / f"{Path(chave).stem}.parquet"
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    df_long.to_parquet(cache_path, index=False)
+
+    manifest["arquivos"][chave] = {
+        "sha256": sha256 or _hash_arquivo(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "spec": repr(spec),
+        "cache": cache_path.name,
+    }
 
 
 # ===============================
-# FUNÇÃO PRINCIPAL (MASTER)
+# EXECUÇÃO DOS LOADERS (SERIAL OU EM PARALELO)
 # ===============================
 
-def build_neuropulse_base():
-    # Arquivos de sexo (como você salvou na pasta data/raw)
-    csv_sexo_total = DATA_RAW / "pns_depressao_sexo_total.csv"
-    csv_sexo_masc  = DATA_RAW / "pns_depressao_sexo_masculino.csv"
-    csv_sexo_fem   = DATA_RAW / "pns_depressao_sexo_feminino.csv"
+def _executa_loader(fonte: tuple) -> pd.DataFrame:
+    """Lê uma fonte (csv, spec) — função de topo para poder ir ao pool."""
+    csv_path, spec = fonte
+    print(f"Lendo:                     {csv_path}")
+    with arquivo(_chave_arquivo(csv_path)):
+        return parse_sidra(csv_path, spec)
 
-    # Arquivo de idade
-    csv_idade = DATA_RAW / "pns_depressao_uf_idade.csv"
 
-    print(f"Lendo (sexo - total):      {csv_sexo_total}")
-    print(f"Lendo (sexo - masculino):  {csv_sexo_masc}")
-    print(f"Lendo (sexo - feminino):   {csv_sexo_fem}")
-    df_sexo = load_pns_depressao_sexo(csv_sexo_total, csv_sexo_masc, csv_sexo_fem)
+def _executa_loader_medido(fonte: tuple):
+    """_executa_loader num processo do pool, devolvendo também as medições dos estágios."""
+    with RelatorioETL("pool") as relatorio:
+        df_long = _executa_loader(fonte)
+    return df_long, relatorio.registros()
 
-    print(f"Lendo (idade):             {csv_idade}")
-    df_idade = load_pns_depressao_idade(csv_idade)
 
-    # Junta tudo
-    base = pd.concat([df_sexo, df_idade], ignore_index=True)
+def _executa_fontes(fontes: list, jobs: int = 1):
+    """
+    Gera os DataFrames longos das fontes NA MESMA ORDEM da lista.
+
+    - jobs <= 1: roda em série, no próprio processo
+    - jobs > 1: distribui os loaders num pool de processos
+      (o parse do SIDRA é trabalho de CPU em pandas, então threads não ajudam)
+
+    Como o pool devolve os resultados em ordem, a saída é idêntica à
+    execução serial, linha por linha.
+    """
+    if jobs <= 1 or len(fontes) <= 1:
+        yield from map(_executa_loader, fontes)
+        return
 
-    # Só por segurança, remove qualquer duplicata exata
-    base = base.drop_duplicates()
+    workers = min(jobs, len(fontes))
+    # Lotes maiores diminuem o overhead de IPC quando há centenas de tabelas
+    chunksize = max(1, len(fontes) // (workers * 4))
 
-    out_path = DATA_PROCESSED / "neuropulse_pns_depressao.csv"
-    base.to_csv(out_path, index=False, encoding="utf-8")
+    # Com relatório aberto, cada processo mede os seus estágios e devolve
+    # os totais junto com o DataFrame
+    relatorio = relatorio_ativo()
 
-    print(f"\n✅ Dataset final salvo em:\n{out_path}\n")
-    print(base.head())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if relatorio is None:
+            yield from pool.map(_executa_loader, fontes, chunksize=chunksize)
+            return
+        for df_long, registros in pool.map(_executa_loader_medido, fontes, chunksize=chunksize):
+            relatorio.incorpora(registros)
+            yield df_long
+
+
+# ===============================
+# ESCRITA DO STORE COLUNAR
+# ===============================
+
+def _tabela_colunar(df: pd.DataFrame) -> pa.Table:
+    """
+    Linhas no SCHEMA_NEUROPULSE:
+    - tipos explícitos (year int16, valor float64)
+    - colunas de texto como dicionário
+    """
+    return pa.Table.from_pandas(
+        df[SCHEMA_NEUROPULSE.names],
+        schema=SCHEMA_NEUROPULSE,
+        preserve_index=False,
+    )
+
+
+def _pasta_tmp(pasta: Path) -> Path:
+    """Pasta vazia ao lado de `pasta`, para escrever antes de publicar."""
+    tmp = pasta.with_name(pasta.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    return tmp
+
+
+def _versao_entradas(shas: dict, politica_conflitos: str, nivel: str = "uf") -> str:
+    """
+    Versão do dataset derivada do conteúdo: sha256 de cada arquivo bruto
+    ({chave no manifesto: sha256}), política de conflitos, nível geográfico,
+    versões da limpeza/validação e schema do store. Um build sem mudanças nas entradas
+    dá a mesma versão, então os caches do dashboard, as ETags da API e o
+    cache de figuras continuam valendo.
+    """
+    cabecalho = f"{CACHE_VERSION}|{VERSAO_DATASET}|{politica_conflitos}|{nivel}|{SCHEMA_NEUROPULSE}"
+    h = hashlib.sha256(f"{cabecalho}\n".encode())
+    for chave in sorted(shas):
+        h.update(f"{chave}|{shas[chave]}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def _ja_publicada(versao: str) -> bool:
+    """A `versao` é a publicada (carimbo) e a pasta dela ainda existe."""
+    return (
+        versao == versao_publicada(CARIMBO_PATH, OUT_DATASET)
+        and pasta_versao(OUT_DATASET, versao) != OUT_DATASET
+    )
+
+
+def _sem_mudancas(relatorio: RelatorioETL, versao: str) -> None:
+    """Build sem nada a publicar: fica registrado no relatório e no terminal."""
+    relatorio.anota("sem_mudancas", {"versao": versao})
+    print(f"\nSem mudanças: a versão {versao} já está publicada.")
+
+
+def _escreve_store_colunar(base: pd.DataFrame, out_path: Path, versao: str) -> str:
+    """
+    Grava o dataset final particionado por ano e indicador
+    (out_path/year=AAAA/indicador=X/), em Parquet zstd no SCHEMA_NEUROPULSE,
+    na pasta da `versao`, e devolve a versão (ainda não publicada: ver
+    _publica_versao).
+
+    O dashboard lê só as partições dos anos escolhidos, sem reparsear texto.
+    As dimensões que saíram constantes ficam nos metadados do dataset.
+    """
+    tmp = _pasta_tmp(out_path)
+    tabela = _tabela_colunar(base)
+    escreve_particoes(tabela, tmp)
+    grava_metadados(tmp, constantes_tabela(tabela))
+    return prepara_versao(tmp, out_path, versao)
+
+
+def _escreve_snapshot(versao: str, linhas: int) -> None:
+    """
+    Snapshot de partida rápida (ver particoes_neuropulse.escreve_snapshot)
+    do dataset de OUT_DATASET na `versao`, lido batch a batch.
+    """
+    with estagio("snapshot", linhas) as medida:
+        escreve_snapshot(pasta_versao(OUT_DATASET, versao), SNAPSHOT_PATH, versao)
+        medida.saida(linhas)
+
+
+def _publica_versao(versao: str, linhas: int, anos) -> None:
+    """
+    Último passo do build, com snapshot, CSV e cubo da `versao` já gravados:
+    carimbo novo (quem lê passa para a nova versão) e depois a troca do link
+    de OUT_DATASET. Quem ainda lê pelo link não vê dados mais novos que o
+    carimbo, e quem lê pelo carimbo usa pasta_versao.
+    """
+    anos = sorted(int(ano) for ano in set(anos))
+    grava_carimbo(CARIMBO_PATH, versao, linhas=int(linhas), anos=anos)
+    publica_particoes(OUT_DATASET, versao)
+    print(f"Versão publicada:          {versao}")
+
+
+# ===============================
+# FUNÇÃO PRINCIPAL (MASTER)
+# ===============================
+
+def build_neuropulse_base(
+    usar_cache: bool = True,
+    jobs: int = 1,
+    politica_conflitos: str = POLITICA_PADRAO,
+    nivel: str = "uf",
+):
+    """
+    Monta a base final a partir das tabelas do SIDRA.
+
+    Com usar_cache=True (padrão), só os arquivos brutos que mudaram desde o
+    último build (ver manifest.json) são reprocessados; os demais vêm dos
+    intermediários em data/processed/cache.
+
+    Com jobs > 1, os arquivos a reprocessar são lidos num pool de processos;
+    o resultado é idêntico ao da execução serial.
+
+    Antes de gravar, a base passa pela validação (chave única, faixa de
+    valor, UF canônica, codificação); chaves em conflito são resolvidas por
+    `politica_conflitos` e as linhas barradas vão para QUARENTENA_CSV.
+
+    `nivel` é o nível geográfico das tabelas por sexo (ver _fontes_pns).
+    Em "municipio" as entidades delas não passam pela checagem de UF; as
+    das tabelas por UF continuam checadas.
+    """
+    with RelatorioETL(
+        "base",
+        usar_cache=usar_cache,
+        jobs=jobs,
+        politica_conflitos=politica_conflitos,
+        nivel=nivel,
+    ) as relatorio:
+        if usar_cache:
+            manifest = _le_manifest()
+        else:
+            manifest = {"cache_version": CACHE_VERSION, "arquivos": {}}
+
+        fontes = _fontes_pns(nivel)
+        partes = [None] * len(fontes)
+
+        # 1) O que não mudou sai direto do cache
+        pendentes = []  # (posição na lista de fontes, sha256 já calculado)
+        for i, (csv_path, spec) in enumerate(fontes):
+            with arquivo(_chave_arquivo(csv_path)), estagio("cache") as medida:
+                df_cache, sha256 = _busca_cache(csv_path, spec, manifest)
+                medida.saida(0 if df_cache is None else len(df_cache))
+            if df_cache is None:
+                pendentes.append((i, sha256))
+            else:
+                partes[i] = df_cache
+
+        # 2) O resto passa pelos loaders (em série ou no pool), na ordem original
+        resultados = _executa_fontes([fontes[i] for i, _ in pendentes], jobs)
+        for (i, sha256), df_long in zip(pendentes, resultados):
+            csv_path, spec = fontes[i]
+            with arquivo(_chave_arquivo(csv_path)), estagio("cache", len(df_long)):
+                _registra_cache(csv_path, spec, df_long, manifest, sha256)
+            partes[i] = df_long
+
+        _grava_manifest(manifest)
+
+        # Versão pelo conteúdo: entradas iguais às da versão publicada não
+        # publicam nada (--no-cache refaz tudo e republica a mesma versão)
+        versao = _versao_entradas(
+            {
+                _chave_arquivo(csv_path): manifest["arquivos"][_chave_arquivo(csv_path)]["sha256"]
+                for csv_path, _ in fontes
+            },
+            politica_conflitos,
+            nivel,
+        )
+        if usar_cache and _ja_publicada(versao):
+            _sem_mudancas(relatorio, versao)
+            base = None
+        else:
+            checa_uf = np.repeat(
+                np.array([spec.nivel == "uf" for _, spec in fontes], dtype=bool),
+                [len(parte) for parte in partes],
+            )
+            base = _grava_base(partes, versao, politica_conflitos, relatorio, checa_uf)
+
+    _grava_relatorio(relatorio)
+
+    if base is not None:
+        print(f"\n✅ Dataset final salvo em:\n{OUT_DATASET}\n{OUT_CSV}\n{SNAPSHOT_PATH}\n")
+        print(base.head())
+
+
+def _grava_base(
+    partes: list,
+    versao: str,
+    politica_conflitos: str,
+    relatorio: RelatorioETL,
+    checa_uf: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Fim de build_neuropulse_base: junta e valida as partes, grava store,
+    snapshot, CSV e cubo na `versao` e publica. Devolve a base gravada.
+    `checa_uf`: linhas (da base juntada) cuja entidade tem de ser uma UF.
+    """
+    # Junta tudo
+    with estagio("concat", sum(len(parte) for parte in partes)) as medida:
+        base = pd.concat(partes, ignore_index=True)
+        medida.saida(len(base))
+
+    # Validação: daqui para frente cada chave aparece uma vez só
+    with estagio("validacao", len(base)) as medida:
+        resultado = valida(base, politica_conflitos, checa_uf)
+        base = resultado.validas
+        escreve_quarentena(resultado.quarentena, QUARENTENA_CSV)
+        medida.saida(len(base))
+    _registra_validacao(relatorio, resultado.contagens, len(resultado.quarentena))
+
+    # Store principal: Parquet tipado, com dicionário e compressão
+    with estagio("escrita", len(base)) as medida:
+        _escreve_store_colunar(base, OUT_DATASET, versao)
+        medida.saida(len(base))
+
+    # Snapshot na ordem em que o dashboard lê as partições
+    _escreve_snapshot(versao, len(base))
+
+    # CSV mantido só como exportação (planilhas, conferência manual)
+    with estagio("csv", len(base)) as medida:
+        tmp_csv = OUT_CSV.with_suffix(".csv.tmp")
+        base.to_csv(tmp_csv, index=False, encoding="utf-8")
+        os.replace(tmp_csv, OUT_CSV)
+        medida.saida(len(base))
+
+    # Cubo pré-agregado para os KPIs e comparações do dashboard
+    with estagio("cubo", len(base)):
+        escreve_cubo(base, DATA_PROCESSED, versao)
+
+    _publica_versao(versao, len(base), base["year"].unique())
+    return base
+
+
+def build_neuropulse_stream(
+    celulas_por_bloco: int = CELULAS_POR_BLOCO,
+    politica_conflitos: str = POLITICA_PADRAO,
+    nivel: str = "uf",
+):
+    """
+    Variante de build_neuropulse_base para exportações grandes do SIDRA
+    (ex.: nível municipal, vários GB).
+
+    Cada tabela é lida em blocos (ver iter_sidra) e cada bloco
+    limpo vai direto para o Parquet e para o CSV de exportação, sem montar a
+    base inteira em memória. A memória de trabalho é definida por
+    `celulas_por_bloco`, não pelo tamanho dos arquivos.
+
+    A validação roda bloco a bloco (ValidadorBlocos): duplicatas e conflitos
+    contra o que já foi gravado são achados pelo hash de 64 bits da chave e
+    da linha, então a saída é a mesma do build em memória. Esse índice é a
+    única parte que cresce com a saída: 16 bytes por linha gravada, somados
+    ao teto do bloco (ver ValidadorBlocos). Como os blocos já gravados não
+    voltam atrás, aqui só valem as políticas "primeiro" e "erro".
+
+    Exportações municipais: a checagem de UF da validação manda para a
+    quarentena toda entidade fora da dim_uf. Com nivel="municipio" as
+    tabelas por sexo são lidas como municipais e essa checagem vale só
+    para as tabelas por UF (ver SidraSpec.nivel).
+    """
+    with RelatorioETL(
+        "stream",
+        celulas_por_bloco=celulas_por_bloco,
+        politica_conflitos=politica_conflitos,
+        nivel=nivel,
+    ) as relatorio:
+        # Versão pelo conteúdo dos arquivos brutos (lidos em blocos de 1 MB):
+        # entradas iguais às da versão publicada não publicam nada
+        fontes = _fontes_pns(nivel)
+        with estagio("versao"):
+            versao = _versao_entradas(
+                {_chave_arquivo(csv_path): _hash_arquivo(csv_path) for csv_path, _ in fontes},
+                politica_conflitos,
+                nivel,
+            )
+        if _ja_publicada(versao):
+            _sem_mudancas(relatorio, versao)
+            total_linhas = None
+        else:
+            total_linhas = _grava_stream(
+                fontes, versao, celulas_por_bloco, politica_conflitos, relatorio
+            )
+
+    _grava_relatorio(relatorio)
+
+    if total_linhas is not None:
+        print(
+            f"\n✅ Dataset final salvo em ({total_linhas} linhas):\n"
+            f"{OUT_DATASET}\n{OUT_CSV}\n{SNAPSHOT_PATH}\n"
+        )
+
+
+def _grava_stream(
+    fontes: list,
+    versao: str,
+    celulas_por_bloco: int,
+    politica_conflitos: str,
+    relatorio: RelatorioETL,
+) -> int:
+    """
+    Corpo de build_neuropulse_stream: lê as `fontes` em blocos, valida e
+    grava store, CSV, snapshot, quarentena e cubo na `versao` e publica.
+    Devolve o número de linhas gravadas.
+    """
+    validador = ValidadorBlocos(politica_conflitos)
+    constantes = ConstantesBlocos()
+    anos = set()
+    tmp_dataset = _pasta_tmp(OUT_DATASET)
+    tmp_csv = OUT_CSV.with_suffix(".csv.tmp")
+    tmp_quarentena = QUARENTENA_CSV.with_suffix(".csv.tmp")
+    n_quarentena = 0
+
+    total_linhas = 0
+    n_blocos = 0
+
+    for csv_path, spec in fontes:
+        print(f"Lendo (streaming):         {csv_path}")
+
+        with arquivo(_chave_arquivo(csv_path)):
+            for bloco in iter_sidra(csv_path, spec, celulas_por_bloco=celulas_por_bloco):
+                # Validação do bloco, também contra tudo que já foi gravado
+                with estagio("validacao", len(bloco)) as medida:
+                    resultado = validador.valida(bloco, checa_uf=spec.nivel == "uf")
+                    bloco = resultado.validas
+                    if len(resultado.quarentena):
+                        escreve_quarentena(
+                            resultado.quarentena, tmp_quarentena, anexar=n_quarentena > 0
+                        )
+                        n_quarentena += len(resultado.quarentena)
+                    medida.saida(len(bloco))
+                if bloco.empty:
+                    continue
+
+                # Um arquivo por bloco em cada partição que o bloco toca
+                # (e as dimensões constantes e os anos, acumulados bloco a bloco)
+                with estagio("escrita", len(bloco)) as medida:
+                    tabela_bloco = _tabela_colunar(bloco)
+                    escreve_particoes(tabela_bloco, tmp_dataset, prefixo=f"part-{n_blocos:06d}")
+                    constantes.atualiza(tabela_bloco)
+                    anos.update(bloco["year"].unique().tolist())
+                    medida.saida(len(bloco))
+                n_blocos += 1
+
+                with estagio("csv", len(bloco)) as medida:
+                    bloco.to_csv(
+                        tmp_csv,
+                        mode="w" if total_linhas == 0 else "a",
+                        header=total_linhas == 0,
+                        index=False,
+                        encoding="utf-8",
+                    )
+                    medida.saida(len(bloco))
+                total_linhas += len(bloco)
+
+    grava_metadados(tmp_dataset, constantes.constantes())
+
+    # Só substitui os arquivos publicados quando tudo foi escrito (o link
+    # do dataset por último, em _publica_versao)
+    prepara_versao(tmp_dataset, OUT_DATASET, versao)
+    os.replace(tmp_csv, OUT_CSV)
+    _escreve_snapshot(versao, total_linhas)
+    if n_quarentena:
+        os.replace(tmp_quarentena, QUARENTENA_CSV)
+    else:
+        escreve_quarentena(pd.DataFrame(columns=COLUNAS_PADRAO + ["motivo"]), QUARENTENA_CSV)
+    _registra_validacao(relatorio, validador.contagens, n_quarentena)
+
+    # Cubo em lotes de um bloco, relendo só as colunas dele (a base
+    # inteira nunca vai para o pandas)
+    with estagio("cubo", total_linhas):
+        linhas_por_lote = max(1, celulas_por_bloco // len(COLUNAS_CUBO))
+        escreve_cubo_lotes(
+            itera_particoes(
+                pasta_versao(OUT_DATASET, versao), COLUNAS_CUBO, linhas_por_lote
+            ),
+            DATA_PROCESSED,
+            versao,
+            n_lotes=max(1, -(-total_linhas // linhas_por_lote)),
+        )
+
+    _publica_versao(versao, total_linhas, anos)
+    return total_linhas
+
+
+def _registra_validacao(relatorio: RelatorioETL, contagens: dict, n_quarentena: int) -> None:
+    """Contagens da validação no relatório e no terminal."""
+    relatorio.anota("validacao", {**contagens, "quarentena": n_quarentena})
+    print(f"Validação:                 {resumo_contagens(contagens)}")
+    if n_quarentena:
+        print(f"Quarentena ({n_quarentena} linhas):   {QUARENTENA_CSV}")
+
+
+def _grava_relatorio(relatorio: RelatorioETL) -> None:
+    """Grava o relatório JSON e mostra os estágios mais lentos."""
+    relatorio.grava(RELATORIO_PATH)
+
+    print(f"\nRelatório da execução:     {RELATORIO_PATH}")
+    mais_lentos = sorted(relatorio.resumo(), key=lambda reg: reg["segundos"], reverse=True)
+    for reg in mais_lentos[:5]:
+        print(
+            f"  {reg['estagio']:<12}{reg['segundos']:>9.3f} s  "
+            f"(CPU {reg['cpu_segundos']:.3f} s, {reg['chamadas']}×)"
+        )
 
 
 # ===============================
@@ -350,6 +1050,85 @@ def build_neuropulse_base():
 # ===============================
 
 if __name__ == "__main__":
-    build_neuropulse_base()
-
-    print("\n✅ Tudo certo!\n")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ETL NeuroPulse (PNS/SIDRA)")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignora o manifesto e reprocessa todos os arquivos brutos",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="processos para ler as tabelas em paralelo (0 = um por CPU)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="lê os arquivos brutos em blocos, com memória limitada (exportações grandes)",
+    )
+    parser.add_argument(
+        "--celulas-por-bloco",
+        type=int,
+        default=CELULAS_POR_BLOCO,
+        metavar="N",
+        help="teto de células por bloco no modo --stream",
+    )
+    parser.add_argument(
+        "--conflitos",
+        choices=list(POLITICAS_CONFLITO),
+        default=POLITICA_PADRAO,
+        help="o que fazer com chave repetida com valores diferentes "
+        "(no modo --stream: primeiro ou erro)",
+    )
+    parser.add_argument(
+        "--nivel",
+        choices=list(NIVEIS_GEOGRAFICOS),
+        default="uf",
+        help="nível geográfico das tabelas por sexo (municipio: entidades fora da dim_uf "
+        "não vão para a quarentena)",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="mede também o pico de memória Python de cada estágio (mais lento)",
+    )
+    parser.add_argument(
+        "--perfil",
+        nargs="?",
+        const=PERFIL_PATH,
+        type=Path,
+        metavar="ARQUIVO",
+        help=f"grava o cProfile da execução (padrão: {PERFIL_PATH.name})",
+    )
+    cli = parser.parse_args()
+
+    if cli.tracemalloc:
+        tracemalloc.start()
+
+    perfil = cProfile.Profile() if cli.perfil else None
+    if perfil is not None:
+        perfil.enable()
+
+    if cli.stream:
+        build_neuropulse_stream(
+            celulas_por_bloco=cli.celulas_por_bloco,
+            politica_conflitos=cli.conflitos,
+            nivel=cli.nivel,
+        )
+    else:
+        jobs = cli.jobs if cli.jobs > 0 else (os.cpu_count() or 1)
+        build_neuropulse_base(
+            usar_cache=not cli.no_cache,
+            jobs=jobs,
+            politica_conflitos=cli.conflitos,
+            nivel=cli.nivel,
+        )
+
+    if perfil is not None:
+        perfil.disable()
+        perfil.dump_stats(cli.perfil)
+        print(f"Perfil (cProfile):         {cli.perfil}")
+
+    print("\n✅ Tudo certo!\n")
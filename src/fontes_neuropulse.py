@@ -0,0 +1,393 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import CDC_FILE, MIN_SAUDE_FILE, OPTIONAL_COLUMNS, SOURCES_STORE, STANDARD_COLUMNS
+from dim_uf import canonicaliza_uf
+from etl_neuropulse import SIDRA_SIMBOLOS, _fontes_pns, _hash_arquivo, parse_sidra
+from validacao_neuropulse import (
+    POLITICA_PADRAO,
+    POLITICAS_CONFLITO,
+    ResultadoValidacao,
+    escreve_quarentena,
+    resumo_contagens,
+    valida,
+)
+
+# ===============================
+# ADAPTADORES DE FONTES -> SCHEMA PADRÃO (config.STANDARD_COLUMNS)
+# ===============================
+# Cada fonte sabe ler os seus arquivos brutos e devolver um DataFrame com
+# STANDARD_COLUMNS + OPTIONAL_COLUMNS. O build roda os adaptadores em
+# paralelo (com teto de processos) e grava um store Parquet particionado
+# por fonte: data/processed/fontes/source=<FONTE>/part-0.parquet.
+#
+# Cada partição guarda o hash dos arquivos que a geraram (_fonte.json), então
+# uma fonte que não mudou não é relida: incluir fontes novas só custa o tempo
+# delas, e elas rodam em paralelo com as outras.
+#
+# Fontes com validação (carrega_validado; hoje a PNS, no schema do ETL)
+# passam pelas mesmas checagens do ETL, com a mesma política de conflitos, e
+# as linhas barradas ficam ao lado da partição, em _quarentena.csv (o "_"
+# deixa o arquivo fora da leitura do dataset, como o carimbo).
+
+COLUNAS_FONTES = STANDARD_COLUMNS + OPTIONAL_COLUMNS
+
+STAMP_FILE = "_fonte.json"
+QUARENTENA_FILE = "_quarentena.csv"
+
+# Suba quando _padroniza mudar: entra na assinatura de todas as partições
+VERSAO_PADRONIZACAO = 2
+
+
+def _padroniza(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """Ordem, tipos e quebras opcionais do schema padrão."""
+    df = df.copy()
+    df["source"] = source
+    for col in OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = "Total"
+
+    df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int16")
+    df["value"] = pd.to_numeric(df["value"], errors="coerce").astype("float64")
+    df = df.dropna(subset=["year", "value"])
+
+    # Texto como str, mas nulo continua nulo (astype(str) viraria "nan")
+    texto = [c for c in COLUNAS_FONTES if c not in ("year", "value")]
+    df[texto] = df[texto].astype(str).where(df[texto].notna())
+    return df[COLUNAS_FONTES].reset_index(drop=True)
+
+
+class FonteAdapter:
+    """
+    Interface de uma fonte de dados.
+
+    Subclasses definem `nome` (valor da coluna `source` e da partição),
+    `arquivos()` (entradas brutas) e `carrega()` (DataFrame no schema padrão,
+    antes de _padroniza). `versao` muda quando a lógica do adaptador muda,
+    para invalidar a partição já gravada. Fontes que passam pela validação
+    do ETL sobrescrevem carrega_validado.
+    """
+
+    nome = ""
+    versao = 1
+
+    def arquivos(self) -> list:
+        raise NotImplementedError
+
+    def carrega(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def carrega_validado(self, politica: str = POLITICA_PADRAO) -> ResultadoValidacao:
+        """
+        carrega() com as linhas barradas pela validação à parte. Por padrão
+        a fonte não tem validação (ex.: CDC, com estados fora da dim_uf):
+        tudo é válido e a quarentena é None.
+        """
+        return ResultadoValidacao(self.carrega(), None)
+
+    def disponivel(self) -> bool:
+        arquivos = self.arquivos()
+        return bool(arquivos) and all(Path(p).exists() for p in arquivos)
+
+    def assinatura(self, politica: str = POLITICA_PADRAO) -> str:
+        """Hash das entradas + versão do adaptador e política (carimbo da partição)."""
+        h = hashlib.sha256(
+            f"{type(self).__name__}:{self.versao}:{VERSAO_PADRONIZACAO}:{politica}".encode()
+        )
+        for path in self.arquivos():
+            h.update(_hash_arquivo(Path(path)).encode())
+        return h.hexdigest()
+
+
+class FonteIBGEPNS(FonteAdapter):
+    """IBGE — PNS (todas as edições em data/raw) pelas tabelas do SIDRA (mesmos arquivos/specs do ETL)."""
+
+    nome = "IBGE_PNS"
+    versao = 2  # 2: validação do ETL (chave, faixa, UF, codificação)
+
+    def arquivos(self) -> list:
+        return [path for path, _ in _fontes_pns()]
+
+    def carrega(self) -> pd.DataFrame:
+        return self.carrega_validado().validas
+
+    def carrega_validado(self, politica: str = POLITICA_PADRAO) -> ResultadoValidacao:
+        # Mesma validação do ETL, no schema dele (antes de mudar os nomes)
+        base = pd.concat(
+            [parse_sidra(path, spec) for path, spec in _fontes_pns()], ignore_index=True
+        )
+        resultado = valida(base, politica)
+        resultado.validas = self._schema_padrao(resultado.validas)
+        return resultado
+
+    @staticmethod
+    def _schema_padrao(base: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "year": base["year"],
+                "region": base["UF"],
+                "indicator_name": base["indicador"],
+                "disorder_type": base["transtorno"],
+                "value": base["valor"],
+                "sex": base["sexo"],
+                "age_group": base["faixa_idade"],
+            }
+        )
+
+
+class FonteMinSaude(FonteAdapter):
+    """
+    Ministério da Saúde — CSV longo (";", latin1, vírgula decimal e os
+    mesmos símbolos de valor ausente do SIDRA) com as colunas ano, uf,
+    indicador, transtorno, valor e, opcionais, sexo e faixa_idade.
+    UFs passam pela dimensão compartilhada (dim_uf).
+    """
+
+    nome = "MIN_SAUDE"
+
+    COLUNAS = {
+        "ano": "year",
+        "uf": "region",
+        "indicador": "indicator_name",
+        "transtorno": "disorder_type",
+        "valor": "value",
+        "sexo": "sex",
+        "faixa_idade": "age_group",
+    }
+
+    def __init__(self, path: Path = MIN_SAUDE_FILE):
+        self.path = Path(path)
+
+    def arquivos(self) -> list:
+        return [self.path]
+
+    def carrega(self) -> pd.DataFrame:
+        df = pd.read_csv(
+            self.path, sep=";", encoding="latin1", decimal=",", na_values=SIDRA_SIMBOLOS
+        )
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        df = df.rename(columns=self.COLUNAS)
+        df = df[[c for c in self.COLUNAS.values() if c in df.columns]]
+        df["region"], _ = canonicaliza_uf(df["region"])
+        return df
+
+
+class FonteCDC(FonteAdapter):
+    """
+    CDC (EUA) — export do U.S. Chronic Disease Indicators (CSV, vírgula):
+    YearStart, LocationDesc, Topic, Question, DataValueType, DataValue e a
+    estratificação (StratificationCategory1/Stratification1). Só entram as
+    linhas gerais e as quebras por sexo e por idade, para a chave não repetir.
+    """
+
+    nome = "CDC"
+
+    def __init__(self, path: Path = CDC_FILE):
+        self.path = Path(path)
+
+    def arquivos(self) -> list:
+        return [self.path]
+
+    def carrega(self) -> pd.DataFrame:
+        df = pd.read_csv(
+            self.path,
+            usecols=[
+                "YearStart", "LocationDesc", "Topic", "Question", "DataValueType",
+                "DataValue", "StratificationCategory1", "Stratification1",
+            ],
+            low_memory=False,
+        )
+        categoria = df["StratificationCategory1"].fillna("Overall")
+        df = df[categoria.isin(["Overall", "Gender", "Sex", "Age"])]
+        categoria = categoria.loc[df.index]
+
+        return pd.DataFrame(
+            {
+                "year": df["YearStart"],
+                "region": df["LocationDesc"].str.strip(),
+                "indicator_name": df["Question"].str.strip() + " (" + df["DataValueType"].fillna("") + ")",
+                "disorder_type": df["Topic"],
+                "value": df["DataValue"],
+                "sex": np.where(categoria.isin(["Gender", "Sex"]), df["Stratification1"], "Total"),
+                "age_group": np.where(categoria == "Age", df["Stratification1"], "Total"),
+            }
+        )
+
+
+def fontes_registradas() -> list:
+    """Adaptadores conhecidos (para incluir uma fonte, basta acrescentá-la aqui)."""
+    return [FonteIBGEPNS(), FonteMinSaude(), FonteCDC()]
+
+
+# ===============================
+# BUILD DO STORE PARTICIONADO
+# ===============================
+
+def _pasta_particao(destino: Path, fonte: FonteAdapter) -> Path:
+    return destino / f"source={fonte.nome}"
+
+
+def _carimbo(pasta: Path):
+    stamp = pasta / STAMP_FILE
+    if not stamp.exists():
+        return None
+    return json.loads(stamp.read_text(encoding="utf-8")).get("assinatura")
+
+
+def _remove_particao(pasta: Path) -> bool:
+    """
+    Tira do store a partição de uma fonte que ficou sem entrada. A pasta é
+    renomeada antes de apagar: com o "_" na frente ela sai da leitura do
+    dataset de uma vez, e não arquivo por arquivo.
+    """
+    if not pasta.exists():
+        return False
+    lixo = pasta.with_name(f"_removida_{pasta.name}")
+    shutil.rmtree(lixo, ignore_errors=True)
+    os.replace(pasta, lixo)
+    shutil.rmtree(lixo)
+    return True
+
+
+def _processa_fonte(args):
+    """
+    Roda um adaptador e publica a sua partição (tmp + os.replace).
+    Executa no pool: devolve só (nome, linhas, contagens da validação), não
+    o DataFrame.
+    """
+    fonte, destino, assinatura, politica = args
+    pasta = _pasta_particao(destino, fonte)
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    resultado = fonte.carrega_validado(politica)
+    df = _padroniza(resultado.validas, fonte.nome)
+    if resultado.quarentena is not None:
+        tmp = pasta / f"{QUARENTENA_FILE}.tmp"
+        escreve_quarentena(resultado.quarentena, tmp)
+        os.replace(tmp, pasta / QUARENTENA_FILE)
+
+    # A coluna source vem do nome da partição (hive), não do arquivo
+    tmp = pasta / "part-0.parquet.tmp"
+    df.drop(columns=["source"]).to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, pasta / "part-0.parquet")
+
+    # Carimbo também com tmp + os.replace: nunca fica truncado
+    tmp = pasta / f"{STAMP_FILE}.tmp"
+    tmp.write_text(
+        json.dumps({"assinatura": assinatura, "linhas": len(df)}, indent=2),
+        encoding="utf-8",
+    )
+    os.replace(tmp, pasta / STAMP_FILE)
+    return fonte.nome, len(df), resultado.contagens
+
+
+def build_fontes(
+    fontes: list = None,
+    jobs: int = None,
+    usar_cache: bool = True,
+    destino: Path = SOURCES_STORE,
+    politica_conflitos: str = POLITICA_PADRAO,
+) -> None:
+    """
+    Gera/atualiza o store particionado com todas as fontes disponíveis.
+
+    - fontes sem arquivo bruto são puladas (com aviso) e, se já tinham
+      partição, ela é removida: o store não serve dados de entradas apagadas
+    - fontes cujas entradas não mudaram mantêm a partição atual
+    - as demais rodam em até `jobs` processos (padrão: uma por CPU)
+    - fontes com validação resolvem conflitos por `politica_conflitos`
+      (ver validacao_neuropulse) e gravam a quarentena ao lado da partição
+    """
+    fontes = fontes_registradas() if fontes is None else fontes
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    pendentes = []
+    for fonte in fontes:
+        if not fonte.disponivel():
+            if _remove_particao(_pasta_particao(destino, fonte)):
+                print(f"Fonte sem arquivo bruto (removida): {fonte.nome}")
+            else:
+                print(f"Fonte sem arquivo bruto (pulada): {fonte.nome}")
+            continue
+
+        assinatura = fonte.assinatura(politica_conflitos)
+        if usar_cache and _carimbo(_pasta_particao(destino, fonte)) == assinatura:
+            print(f"Fonte sem mudanças:               {fonte.nome}")
+            continue
+        pendentes.append((fonte, destino, assinatura, politica_conflitos))
+
+    if not pendentes:
+        print("\nNada a atualizar no store de fontes.")
+        return
+
+    jobs = min(len(pendentes), jobs or os.cpu_count() or 1)
+    if jobs <= 1:
+        resultados = map(_processa_fonte, pendentes)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        resultados = pool.map(_processa_fonte, pendentes)
+
+    try:
+        for nome, linhas, contagens in resultados:
+            print(f"Fonte atualizada:                 {nome} ({linhas} linhas)")
+            if contagens:
+                print(f"  Validação:                      {resumo_contagens(contagens)}")
+    finally:
+        if jobs > 1:
+            pool.shutdown()
+
+    print(f"\n✅ Store de fontes salvo em:\n{destino}\n")
+
+
+def le_fontes(destino: Path = SOURCES_STORE, **filtros) -> pd.DataFrame:
+    """
+    Lê o store de fontes (todas as partições) no schema padrão.
+    Filtros por igualdade (ex.: source="CDC") são empurrados para o Parquet,
+    então só as partições/row groups necessários são lidos.
+    """
+    filtros_pq = [(col, "==", valor) for col, valor in filtros.items()] or None
+    df = pd.read_parquet(destino, filters=filtros_pq)
+    df["source"] = df["source"].astype(str)
+    return df[COLUNAS_FONTES]
+
+
+# ===============================
+# EXECUÇÃO DIRETA
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store multi-fonte NeuroPulse (schema padrão)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        metavar="N",
+        help="máximo de fontes processadas ao mesmo tempo (0 = uma por CPU)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="reprocessa todas as fontes, mesmo as que não mudaram",
+    )
+    parser.add_argument(
+        "--conflitos",
+        choices=list(POLITICAS_CONFLITO),
+        default=POLITICA_PADRAO,
+        help="política para chave repetida com valores diferentes (ver etl_neuropulse)",
+    )
+    cli = parser.parse_args()
+
+    build_fontes(
+        jobs=cli.jobs or None, usar_cache=not cli.no_cache, politica_conflitos=cli.conflitos
+    )
+
+    print("\n✅ Tudo certo!\n")
@@ -0,0 +1,613 @@
+import argparse
+import json
+import math
+import os
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# ===============================
+# MALHAS PARA O MAPA (CHOROPLETH)
+# ===============================
+# Fonte: API de malhas do IBGE (GeoJSON, uma feição por área, com o código
+# IBGE em properties.codarea). O build baixa a malha uma vez e grava em
+# data/geo/, pasta feita para ser versionada junto com o código (o dashboard
+# nunca baixa nada):
+#   <nivel>_br.geojson            malha original (qualidade máxima)
+#   <nivel>_br_t<tolerância>.geojson   versões simplificadas (Douglas-Peucker
+#                                      por arco, ver TOPOLOGIA)
+# Cada feição sai com `id` = código IBGE (inteiro), a mesma chave do cod_uf
+# da base. O dashboard só lê as versões simplificadas, uma vez por processo.
+# Sem elas (pasta apagada), carrega_malha devolve None e o mapa cai nas
+# bolhas por capital, com um aviso no painel.
+#
+# A malha de UFs versionada veio da divisão municipal do IBGE de 2000/2003
+# (base do PNLT 2006, CENTRAN, datum SAD69, redistribuída no pacote
+# geo-data-br), agregada por UF com --de-municipios. Para as divisas atuais,
+# apague data/geo/uf_br.geojson e rode o build com acesso à API do IBGE.
+#
+# Uso (build):
+#     python src/geometria_uf.py                 # baixa a malha de UFs e simplifica
+#     python src/geometria_uf.py --origem x.json # simplifica um GeoJSON local
+#     python src/geometria_uf.py --origem municipios.json --de-municipios
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+GEO_DIR = BASE_DIR / "data" / "geo"
+
+_API_MALHAS = "https://servicodados.ibge.gov.br/api/v3/malhas/paises/BR"
+
+# Nível territorial -> parâmetro intrarregiao da API de malhas
+NIVEIS = {
+    "uf": "UF",
+    "municipio": "municipio",
+}
+
+# Tolerâncias de simplificação, em graus (0,01° ≈ 1,1 km no equador).
+# A mais fina serve para mapas de poucas UFs (zoom maior), a mais grossa
+# para o Brasil inteiro.
+TOLERANCIAS = (0.005, 0.02, 0.05)
+
+# Resolução aproximada do mapa: extensão (graus) / PIXELS_MAPA ≈ graus por pixel
+PIXELS_MAPA = 500
+
+
+def url_malha(nivel: str) -> str:
+    return (
+        f"{_API_MALHAS}?formato=application/vnd.geo%2Bjson"
+        f"&qualidade=maxima&intrarregiao={NIVEIS[nivel]}"
+    )
+
+
+def path_malha(nivel: str, tolerancia: float = None, pasta: Path = GEO_DIR) -> Path:
+    """Arquivo da malha original (sem tolerância) ou de uma versão simplificada."""
+    if tolerancia is None:
+        return pasta / f"{nivel}_br.geojson"
+    return pasta / f"{nivel}_br_t{tolerancia:g}.geojson"
+
+
+# ===============================
+# SIMPLIFICAÇÃO (DOUGLAS-PEUCKER)
+# ===============================
+
+def _douglas_peucker(pontos: np.ndarray, tolerancia: float) -> np.ndarray:
+    """Máscara dos pontos mantidos de uma linha aberta (extremos sempre ficam)."""
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[[0, -1]] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        ini, fim = pilha.pop()
+        if fim - ini < 2:
+            continue
+        a, b = pontos[ini], pontos[fim]
+        meio = pontos[ini + 1:fim]
+        ab = b - a
+        norma = math.hypot(*ab)
+        if norma == 0.0:
+            dist = np.hypot(*(meio - a).T)
+        else:
+            # distância de cada ponto à reta a-b (produto vetorial / |ab|)
+            dist = np.abs(ab[0] * (meio[:, 1] - a[1]) - ab[1] * (meio[:, 0] - a[0])) / norma
+        i = int(np.argmax(dist))
+        if dist[i] > tolerancia:
+            k = ini + 1 + i
+            manter[k] = True
+            pilha += [(ini, k), (k, fim)]
+    return manter
+
+
+def _mascara_anel(pontos: np.ndarray, tolerancia: float) -> np.ndarray:
+    """
+    Máscara dos pontos mantidos de um anel fechado. O anel é cortado no
+    ponto mais distante do primeiro e cada metade passa pelo Douglas-Peucker;
+    sobram sempre pelo menos 3 vértices distintos (+ o de fechamento).
+    """
+    if len(pontos) <= 4:
+        return np.ones(len(pontos), dtype=bool)
+    corte = int(np.argmax(np.hypot(*(pontos - pontos[0]).T)))
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[: corte + 1] |= _douglas_peucker(pontos[: corte + 1], tolerancia)
+    manter[corte:] |= _douglas_peucker(pontos[corte:], tolerancia)
+    if manter.sum() < 5:
+        # anel menor que a tolerância: guarda um vértice no meio de cada metade
+        manter[[corte // 2, (corte + len(pontos) - 1) // 2]] = True
+    return manter
+
+
+def simplifica_anel(anel, tolerancia: float, casas: int) -> list:
+    """Simplifica um anel fechado sozinho (ver _mascara_anel)."""
+    pontos = np.asarray(anel, dtype=float)[:, :2]
+    if len(pontos) <= 4:
+        return np.round(pontos, casas).tolist()
+    manter = _mascara_anel(pontos, tolerancia)
+    simplificado = np.round(pontos[manter], casas)
+    # pontos vizinhos iguais depois do arredondamento só aumentam o payload
+    repetido = np.r_[False, (np.diff(simplificado, axis=0) == 0).all(axis=1)]
+    simplificado = simplificado[~repetido]
+    if len(simplificado) < 5:
+        simplificado = np.round(pontos[manter], casas)
+    return simplificado.tolist()
+
+
+def _extensao(anel) -> float:
+    """Maior lado da caixa do anel, em graus."""
+    pontos = np.asarray(anel, dtype=float)[:, :2]
+    return float((pontos.max(axis=0) - pontos.min(axis=0)).max())
+
+
+def _area(pontos: np.ndarray) -> float:
+    """Área com sinal de um anel fechado (positiva no sentido anti-horário)."""
+    x, y = (pontos - pontos[0]).astype(float).T
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def _casas_decimais(tolerancia: float) -> int:
+    """Precisão das coordenadas: uma casa abaixo da tolerância basta."""
+    return max(0, math.ceil(-math.log10(tolerancia))) + 1
+
+
+def _poligonos(geometria: dict) -> list:
+    """Polígonos (listas de anéis) de um Polygon/MultiPolygon."""
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    if geometria["type"] == "MultiPolygon":
+        return geometria["coordinates"]
+    raise ValueError(f"Geometria não suportada: {geometria['type']}")
+
+
+def _geometria(tipo: str, poligonos: list) -> dict:
+    if tipo == "Polygon":
+        return {"type": "Polygon", "coordinates": poligonos[0]}
+    return {"type": "MultiPolygon", "coordinates": poligonos}
+
+
+def _visiveis(poligonos: list, tolerancia: float) -> list:
+    """
+    Índices dos polígonos que ficam: ilhas menores que a tolerância não
+    aparecem no mapa e saem do payload (a maior parte da feição sempre fica).
+    """
+    extensoes = [_extensao(poligono[0]) for poligono in poligonos]
+    maior = int(np.argmax(extensoes))
+    return [i for i, extensao in enumerate(extensoes) if i == maior or extensao >= tolerancia]
+
+
+def simplifica_geometria(geometria: dict, tolerancia: float) -> dict:
+    """Simplifica uma geometria sozinha, anel a anel (sem olhar os vizinhos)."""
+    casas = _casas_decimais(tolerancia)
+    poligonos = _poligonos(geometria)
+    simplificados = [
+        [simplifica_anel(anel, tolerancia, casas) for anel in poligonos[i]]
+        for i in _visiveis(poligonos, tolerancia)
+    ]
+    return _geometria(geometria["type"], simplificados)
+
+
+def _codigo_ibge(feicao: dict) -> int:
+    """Código IBGE da feição: `id` já normalizado ou properties.codarea da API."""
+    if feicao.get("id") is not None:
+        return int(feicao["id"])
+    return int(feicao["properties"]["codarea"])
+
+
+def _orienta(geometria: dict) -> dict:
+    """
+    Anéis no sentido que o Plotly (d3-geo, polígonos esféricos) espera:
+    externo horário e buraco anti-horário, o contrário da RFC 7946. No
+    sentido inverso o d3 pinta o globo inteiro menos a feição.
+    """
+    poligonos = []
+    for poligono in _poligonos(geometria):
+        aneis = []
+        for k, anel in enumerate(poligono):
+            pontos = np.asarray(anel, dtype=float)
+            aneis.append(anel if (_area(pontos) < 0) == (k == 0) else anel[::-1])
+        poligonos.append(aneis)
+    return _geometria(geometria["type"], poligonos)
+
+
+def normaliza_malha(geojson: dict) -> dict:
+    """
+    FeatureCollection com `id` = código IBGE (int), sem outras propriedades
+    e com os anéis orientados (ver _orienta).
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": _codigo_ibge(f),
+                "properties": {},
+                "geometry": _orienta(f["geometry"]),
+            }
+            for f in geojson["features"]
+        ],
+    }
+
+
+# ===============================
+# TOPOLOGIA: DIVISAS COMPARTILHADAS
+# ===============================
+# Simplificar cada feição sozinha abre frestas e sobreposições nas divisas:
+# o mesmo trecho é cortado em pontos diferentes de cada lado. Como no
+# mapshaper/topojson, a malha é quebrada em arcos (trechos entre junções,
+# os vértices em que muda o vizinho), cada arco é simplificado uma vez só
+# e os dois lados da divisa usam o mesmo resultado.
+
+# Coordenadas em inteiros (1e-7°) para casar os vértices dos dois lados
+ESCALA_TOPOLOGIA = 10**7
+
+
+def _quantiza(anel) -> np.ndarray:
+    """Anel em inteiros, aberto (sem o ponto de fechamento) e sem pontos repetidos."""
+    pontos = np.round(np.asarray(anel, dtype=float)[:, :2] * ESCALA_TOPOLOGIA).astype(np.int64)
+    repetido = np.r_[False, (np.diff(pontos, axis=0) == 0).all(axis=1)]
+    pontos = pontos[~repetido]
+    if len(pontos) > 1 and (pontos[0] == pontos[-1]).all():
+        pontos = pontos[:-1]
+    return pontos
+
+
+def _sem_repetidos(pontos: np.ndarray) -> np.ndarray:
+    repetido = np.r_[False, (np.diff(pontos, axis=0) == 0).all(axis=1)]
+    return pontos[~repetido]
+
+
+def _arcos(aneis: list, n_vertices: int) -> tuple:
+    """
+    Quebra os anéis (ids de vértice, abertos) em arcos. Devolve os arcos na
+    forma canônica (tupla de ids) e, por anel, a sequência de
+    (índice do arco, percorrido no sentido canônico?).
+    """
+    # Junção: vértice visto com mais de um par de vizinhos
+    ocorrencias = np.concatenate(
+        [
+            np.stack(
+                [
+                    ids,
+                    np.minimum(np.roll(ids, 1), np.roll(ids, -1)),
+                    np.maximum(np.roll(ids, 1), np.roll(ids, -1)),
+                ],
+                axis=1,
+            )
+            for ids in aneis
+        ]
+    )
+    distintas = np.unique(ocorrencias, axis=0)
+    juncao = np.bincount(distintas[:, 0], minlength=n_vertices) > 1
+
+    indice, arcos, usos = {}, [], []
+    for ids in aneis:
+        cortes = np.flatnonzero(juncao[ids])
+        if len(cortes) == 0:
+            # Sem junção (ilha, buraco, divisa com um vizinho só): um arco
+            # fechado, que começa no menor id para os dois lados concordarem
+            ids = np.roll(ids, -int(np.argmin(ids)))
+            trechos = [np.r_[ids, ids[:1]]]
+        else:
+            ids = np.r_[np.roll(ids, -cortes[0]), ids[cortes[0]]]
+            cortes = np.r_[cortes - cortes[0], len(ids) - 1]
+            trechos = [ids[a:b + 1] for a, b in zip(cortes[:-1], cortes[1:])]
+
+        uso = []
+        for trecho in trechos:
+            direto, inverso = tuple(trecho.tolist()), tuple(trecho[::-1].tolist())
+            chave = min(direto, inverso)
+            if chave not in indice:
+                indice[chave] = len(arcos)
+                arcos.append(chave)
+            uso.append((indice[chave], chave == direto))
+        usos.append(uso)
+    return arcos, usos
+
+
+def _simplifica_arco(
+    pontos: np.ndarray, tolerancia: float, casas: int, precisa_meio: bool
+) -> np.ndarray:
+    if len(pontos) > 3 and (pontos[0] == pontos[-1]).all():
+        manter = _mascara_anel(pontos, tolerancia)
+    else:
+        manter = _douglas_peucker(pontos, tolerancia)
+        if precisa_meio and manter.sum() == 2 and len(pontos) > 2:
+            # anel de dois arcos: sem um vértice no meio, viraria um segmento
+            manter[len(pontos) // 2] = True
+    return np.round(pontos[manter], casas)
+
+
+def _simplifica_aneis(aneis: list, tolerancia: float, casas: int) -> list:
+    """Simplifica os anéis de uma malha inteira, arco por arco."""
+    quantizados = [_quantiza(anel) for anel in aneis]
+    vertices, ids = np.unique(np.concatenate(quantizados), axis=0, return_inverse=True)
+    ids_aneis = np.split(ids.ravel(), np.cumsum([len(q) for q in quantizados])[:-1])
+    arcos, usos = _arcos(ids_aneis, len(vertices))
+
+    precisa_meio = {i for uso in usos if len(uso) == 2 for i, _ in uso}
+    coordenadas = vertices / ESCALA_TOPOLOGIA
+    simplificados = [
+        _simplifica_arco(coordenadas[list(arco)], tolerancia, casas, i in precisa_meio)
+        for i, arco in enumerate(arcos)
+    ]
+
+    saida = []
+    for anel, uso in zip(aneis, usos):
+        partes = [simplificados[i] if direto else simplificados[i][::-1] for i, direto in uso]
+        pontos = _sem_repetidos(np.concatenate([partes[0], *[p[1:] for p in partes[1:]]]))
+        if len(pontos) < 4:
+            # anel que encolheu demais com os arcos: só ele é simplificado sozinho
+            saida.append(simplifica_anel(anel, tolerancia, casas))
+        else:
+            saida.append(pontos.tolist())
+    return saida
+
+
+def simplifica_malha(geojson: dict, tolerancia: float) -> dict:
+    """
+    Simplifica todas as feições juntas, pelos arcos: as divisas continuam
+    iguais dos dois lados. Ilhas menores que a tolerância saem (ver
+    _visiveis).
+    """
+    casas = _casas_decimais(tolerancia)
+    feicoes = geojson["features"]
+    poligonos = [_poligonos(f["geometry"]) for f in feicoes]
+    visiveis = [_visiveis(p, tolerancia) for p in poligonos]
+    aneis = [anel for p, vis in zip(poligonos, visiveis) for i in vis for anel in p[i]]
+    simplificados = iter(_simplifica_aneis(aneis, tolerancia, casas))
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                **f,
+                "geometry": _geometria(
+                    f["geometry"]["type"], [[next(simplificados) for _ in p[i]] for i in vis]
+                ),
+            }
+            for f, p, vis in zip(feicoes, poligonos, visiveis)
+        ],
+    }
+
+
+# ===============================
+# AGREGAÇÃO (MUNICÍPIOS -> UF)
+# ===============================
+
+def _dentro(ponto: np.ndarray, anel: np.ndarray) -> bool:
+    """Ponto dentro do anel fechado (paridade de cruzamentos do raio para a direita)."""
+    x, y = anel.astype(float).T
+    x0, y0 = float(ponto[0]), float(ponto[1])
+    cruza = (y[:-1] > y0) != (y[1:] > y0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cruza = x[:-1] + (y0 - y[:-1]) * (x[1:] - x[:-1]) / (y[1:] - y[:-1])
+    return bool(np.count_nonzero(cruza & (x0 < x_cruza)) % 2)
+
+
+def _sem_pares(arestas: np.ndarray) -> np.ndarray:
+    """Arestas (x0, y0, x1, y1) cuja inversa não está no conjunto: o contorno."""
+    todas = np.concatenate([arestas, arestas[:, [2, 3, 0, 1]]])
+    _, inversa = np.unique(todas, axis=0, return_inverse=True)
+    inversa = inversa.ravel()
+    return arestas[~np.isin(inversa[: len(arestas)], inversa[len(arestas):])]
+
+
+def _encadeia(arestas: np.ndarray) -> list:
+    """Anéis fechados formados pelas arestas do contorno, seguidas ponta a ponta."""
+    seguintes = defaultdict(list)
+    for x0, y0, x1, y1 in arestas.tolist():
+        seguintes[(x0, y0)].append((x1, y1))
+
+    aneis = []
+    while seguintes:
+        inicio = next(iter(seguintes))
+        anel, atual = [inicio], inicio
+        while True:
+            saidas = seguintes.get(atual)
+            if not saidas:
+                raise ValueError("As divisas não fecham em anéis (vértices não coincidem)")
+            atual = saidas.pop()
+            if not saidas:
+                del seguintes[anel[-1]]
+            anel.append(atual)
+            if atual == inicio:
+                break
+        aneis.append(np.array(anel, dtype=np.int64))
+    return aneis
+
+
+def _monta_poligonos(aneis: list) -> dict:
+    """Externos (anti-horários) com os buracos (horários) que caem dentro deles."""
+    areas = [_area(anel) for anel in aneis]
+    externos = sorted((i for i, a in enumerate(areas) if a > 0), key=lambda i: areas[i])
+    poligonos = {i: [aneis[i]] for i in externos}
+    for i, area in enumerate(areas):
+        if area > 0:
+            continue
+        # o menor externo que contém o buraco
+        dono = next((e for e in externos if _dentro(aneis[i][0], aneis[e])), None)
+        if dono is None:
+            raise ValueError("Buraco fora de todos os anéis externos")
+        poligonos[dono].append(aneis[i])
+
+    coordenadas = [
+        [(anel / ESCALA_TOPOLOGIA).tolist() for anel in poligonos[e]] for e in reversed(externos)
+    ]
+    return _geometria("Polygon" if len(coordenadas) == 1 else "MultiPolygon", coordenadas)
+
+
+def agrega_malha(geojson: dict, grupo) -> dict:
+    """
+    Junta as feições de cada `grupo(código IBGE)` numa só (ex.: municípios
+    -> UF). Com os anéis orientados (externo anti-horário, buraco horário),
+    uma divisa interna aparece duas vezes, uma em cada sentido, e as duas
+    se cancelam; as arestas que sobram são encadeadas nos anéis da feição
+    nova. Exige vértices coincidentes nas divisas, como nas malhas do IBGE.
+    """
+    arestas = defaultdict(list)
+    for feicao in geojson["features"]:
+        chave = grupo(_codigo_ibge(feicao))
+        for poligono in _poligonos(feicao["geometry"]):
+            for k, anel in enumerate(poligono):
+                pontos = _quantiza(anel)
+                if len(pontos) < 3:
+                    continue
+                pontos = np.r_[pontos, pontos[:1]]
+                if (_area(pontos) > 0) != (k == 0):
+                    pontos = pontos[::-1]
+                arestas[chave].append(np.hstack([pontos[:-1], pontos[1:]]))
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": int(chave),
+                "properties": {},
+                "geometry": _monta_poligonos(
+                    _encadeia(_sem_pares(np.concatenate(arestas[chave])))
+                ),
+            }
+            for chave in sorted(arestas)
+        ],
+    }
+
+
+# ===============================
+# BUILD: BAIXA A MALHA E GRAVA AS VERSÕES SIMPLIFICADAS
+# ===============================
+
+def _grava_json(path: Path, dados: dict) -> None:
+    # separadores compactos: o arquivo vai quase igual para o navegador
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(dados, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def baixa_malha(nivel: str = "uf", pasta: Path = GEO_DIR) -> Path:
+    destino = path_malha(nivel, pasta=pasta)
+    print(f"🌐 Baixando malha '{nivel}' do IBGE: {url_malha(nivel)}")
+    with urllib.request.urlopen(url_malha(nivel), timeout=120) as resposta:
+        geojson = json.load(resposta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    _grava_json(destino, normaliza_malha(geojson))
+    return destino
+
+
+def uf_do_municipio(codigo: int) -> int:
+    """Código da UF: os 2 primeiros dígitos do código IBGE (7 dígitos) do município."""
+    return codigo // 10**5
+
+
+def constroi_malhas(
+    nivel: str = "uf", origem: Path = None, pasta: Path = GEO_DIR, de_municipios: bool = False
+) -> list:
+    """
+    Gera as versões simplificadas da malha de `nivel` em todas as TOLERANCIAS.
+    A malha original vem de `origem`, do arquivo já baixado ou da API do IBGE.
+    Com `de_municipios`, a origem é uma malha municipal, agregada por UF.
+    """
+    original = path_malha(nivel, pasta=pasta)
+    if origem is not None:
+        pasta.mkdir(parents=True, exist_ok=True)
+        geojson = json.loads(Path(origem).read_text(encoding="utf-8"))
+        if de_municipios:
+            geojson = agrega_malha(normaliza_malha(geojson), uf_do_municipio)
+        _grava_json(original, normaliza_malha(geojson))
+    elif not original.exists():
+        baixa_malha(nivel, pasta)
+
+    malha = normaliza_malha(json.loads(original.read_text(encoding="utf-8")))
+    print(f"📐 {len(malha['features'])} feições ({original.stat().st_size / 1024:.0f} KB)")
+
+    gerados = []
+    for tolerancia in TOLERANCIAS:
+        destino = path_malha(nivel, tolerancia, pasta)
+        _grava_json(destino, simplifica_malha(malha, tolerancia))
+        print(f"   tolerância {tolerancia:g}°: {destino.name} ({destino.stat().st_size / 1024:.0f} KB)")
+        gerados.append(destino)
+    return gerados
+
+
+# ===============================
+# LEITURA (DASHBOARD)
+# ===============================
+
+def _limites(geometria: dict) -> tuple:
+    """Caixa (lon_min, lat_min, lon_max, lat_max) de um Polygon/MultiPolygon."""
+    pontos = np.concatenate([np.asarray(p[0]) for p in _poligonos(geometria)])
+    return (*pontos.min(axis=0), *pontos.max(axis=0))
+
+
+class Malha:
+    """
+    Versões simplificadas de uma malha, indexadas pelo código IBGE.
+
+    Montada uma vez por processo (st.cache_resource no dashboard); geojson()
+    devolve só as feições pedidas, na tolerância que cabe na extensão delas.
+    """
+
+    def __init__(self, versoes: dict):
+        # tolerância -> {código IBGE -> feição}
+        self.versoes = {
+            tol: {f["id"]: f for f in geojson["features"]}
+            for tol, geojson in sorted(versoes.items())
+        }
+        mais_fina = next(iter(self.versoes.values()))
+        self.limites = {cod: _limites(f["geometry"]) for cod, f in mais_fina.items()}
+
+    def tolerancia_para(self, codigos) -> float:
+        """
+        Maior tolerância abaixo de ~1 pixel na extensão das feições pedidas:
+        Brasil inteiro fica com a mais grossa, uma ou duas UFs com a mais fina.
+        """
+        caixas = np.array([self.limites[c] for c in codigos if c in self.limites])
+        tolerancias = list(self.versoes)
+        if len(caixas) == 0:
+            return tolerancias[-1]
+        extensao = max(
+            caixas[:, 2].max() - caixas[:, 0].min(),
+            caixas[:, 3].max() - caixas[:, 1].min(),
+        )
+        cabe = [t for t in tolerancias if t <= extensao / PIXELS_MAPA]
+        return cabe[-1] if cabe else tolerancias[0]
+
+    def geojson(self, codigos, tolerancia: float = None) -> dict:
+        codigos = sorted({int(c) for c in codigos})
+        if tolerancia is None:
+            tolerancia = self.tolerancia_para(codigos)
+        feicoes = self.versoes[tolerancia]
+        return {
+            "type": "FeatureCollection",
+            "features": [feicoes[c] for c in codigos if c in feicoes],
+        }
+
+
+def carrega_malha(nivel: str = "uf", pasta: Path = GEO_DIR):
+    """Malha simplificada do build, ou None se ele ainda não rodou."""
+    versoes = {}
+    for tolerancia in TOLERANCIAS:
+        path = path_malha(nivel, tolerancia, pasta)
+        if path.exists():
+            versoes[tolerancia] = json.loads(path.read_text(encoding="utf-8"))
+    if not versoes:
+        return None
+    return Malha(versoes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Malhas simplificadas para o mapa")
+    parser.add_argument("--nivel", choices=sorted(NIVEIS), default="uf")
+    parser.add_argument(
+        "--origem",
+        type=Path,
+        help="GeoJSON local (em vez de baixar da API de malhas do IBGE)",
+    )
+    parser.add_argument(
+        "--de-municipios",
+        action="store_true",
+        help="a --origem é uma malha municipal: as feições são agregadas por UF",
+    )
+    cli = parser.parse_args()
+    if cli.de_municipios and (cli.origem is None or cli.nivel != "uf"):
+        parser.error("--de-municipios precisa de --origem e do nível uf")
+
+    constroi_malhas(cli.nivel, origem=cli.origem, de_municipios=cli.de_municipios)
+    print("✅ Malhas gravadas em", GEO_DIR)
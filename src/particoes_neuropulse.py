@@ -0,0 +1,425 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ===============================
+# SCHEMA DO STORE COLUNAR
+# ===============================
+
+# Colunas de texto com poucos valores distintos viram dicionário
+# (cada string é guardada uma única vez no arquivo e na memória)
+_TEXTO_DICIONARIO = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMA_NEUROPULSE = pa.schema(
+    [
+        pa.field("year", pa.int16(), nullable=False),
+        pa.field("cod_uf", pa.int8()),   # código IBGE (nulo se fora da dimensão)
+        pa.field("UF", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("sexo", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("faixa_idade", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("domicilio", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("transtorno", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("indicador", _TEXTO_DICIONARIO, nullable=False),
+        pa.field("valor", pa.float64(), nullable=False),
+    ]
+)
+
+# Dimensões que na base atual têm um único valor em todas as linhas. O ETL
+# registra as que de fato são constantes nos metadados do dataset, e o
+# store do dashboard/API não as guarda como coluna (ver NeuroPulseStore).
+DIMENSOES_CONSTANTES = ["domicilio", "transtorno", "indicador"]
+
+# Metadados do dataset inteiro (ignorado na leitura das partições: começa com "_")
+METADADOS_DATASET = "_common_metadata"
+_CHAVE_CONSTANTES = b"neuropulse.constantes"
+
+
+# ===============================
+# DATASET PARTICIONADO (HIVE: year=/indicador=)
+# ===============================
+# O ETL grava uma pasta por edição da PNS e por indicador:
+#   neuropulse_pns_depressao/year=2019/indicador=<nome>/part-*.parquet
+# Quem lê passa os anos que quer e só as pastas desses anos são abertas
+# (as colunas de partição não ficam dentro dos arquivos).
+
+PARTICOES = ["year", "indicador"]
+
+PARTICIONAMENTO = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("indicador", pa.string())]),
+    flavor="hive",
+)
+
+
+def escreve_particoes(tabela: pa.Table, pasta: Path, prefixo: str = "part-0") -> None:
+    """
+    Acrescenta as linhas de `tabela` (no SCHEMA_NEUROPULSE) às partições
+    em `pasta`. Arquivos com o mesmo `prefixo` são sobrescritos; prefixos
+    diferentes (ex.: um por bloco no modo streaming) se somam.
+    """
+    ds.write_dataset(
+        tabela,
+        pasta,
+        format="parquet",
+        partitioning=PARTICIONAMENTO,
+        basename_template=f"{prefixo}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        preserve_order=True,
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+
+
+def prepara_versao(tmp: Path, pasta: Path, versao: str) -> str:
+    """
+    Move o dataset recém-escrito em `tmp` para a pasta da `versao`
+    (<pasta>@<versão>, ao lado de `pasta`) e devolve a versão. A versão vem
+    do conteúdo (quem chama deriva das entradas do build). Ainda não
+    publica: `pasta` continua na atual.
+    """
+    tmp, pasta = Path(tmp), Path(pasta)
+    destino = pasta.with_name(f"{pasta.name}@{versao}")
+    if destino.exists():
+        shutil.rmtree(tmp)  # mesmas entradas, mesmo conteúdo: já está preparada
+    else:
+        tmp.rename(destino)
+    return versao
+
+
+def publica_particoes(pasta: Path, versao: str) -> None:
+    """
+    Publica a versão preparada (prepara_versao): `pasta` vira um link
+    simbólico para <pasta>@<versão>, trocado com os.replace. Quem abre
+    `pasta` vê a versão anterior inteira ou a nova inteira, nunca uma pasta
+    faltando ou pela metade. A versão anterior fica até a próxima publicação
+    (leituras que já estão nela terminam nela). Sem links simbólicos (ex.:
+    Windows sem permissão), a troca é por rename, como antes.
+    """
+    pasta = Path(pasta)
+    destino = pasta.with_name(f"{pasta.name}@{versao}")
+    anterior = Path(os.readlink(pasta)).name if pasta.is_symlink() else None
+    link = pasta.with_name(pasta.name + ".link")
+    try:
+        if link.is_symlink():
+            link.unlink()
+        os.symlink(destino.name, link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        _troca_por_rename(destino, pasta)
+        return
+
+    if pasta.exists() and not pasta.is_symlink():
+        # Layout antigo (pasta de verdade no lugar do link): sai do caminho uma vez
+        _troca_por_rename(None, pasta)
+    os.replace(link, pasta)
+
+    # Versões antigas: ficam só a atual e a anterior
+    manter = {destino.name, anterior}
+    for versao_antiga in pasta.parent.glob(f"{pasta.name}@*"):
+        if versao_antiga.name not in manter:
+            shutil.rmtree(versao_antiga, ignore_errors=True)
+
+
+def pasta_versao(pasta: Path, versao: str) -> Path:
+    """
+    Pasta de uma versão do dataset (<pasta>@<versão>), para ler exatamente a
+    versão de uma chave de cache, sem passar pelo link. Sem ela (versão já
+    removida, layout antigo, troca por rename), `pasta`.
+    """
+    pasta = Path(pasta)
+    candidata = pasta.with_name(f"{pasta.name}@{versao}")
+    return candidata if versao and candidata.is_dir() else pasta
+
+
+def _troca_por_rename(nova, pasta: Path) -> None:
+    """Troca `pasta` por `nova` (None: só remove); o antigo sai depois."""
+    antigo = pasta.with_name(pasta.name + ".old")
+    shutil.rmtree(antigo, ignore_errors=True)
+    if pasta.exists():
+        pasta.rename(antigo)
+    if nova is not None:
+        Path(nova).rename(pasta)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def _valores_distintos(coluna) -> pa.Array:
+    """Valores distintos de uma coluna (de dicionário: só os usados)."""
+    if isinstance(coluna, pa.ChunkedArray):
+        coluna = coluna.combine_chunks()
+    valores = pc.unique(coluna)
+    if isinstance(valores, pa.DictionaryArray):
+        valores = valores.dictionary.take(pc.unique(valores.indices))
+    return valores
+
+
+class ConstantesBlocos:
+    """
+    constantes_tabela acumulada bloco a bloco (modo streaming): guarda só o
+    valor de cada dimensão enquanto ele for o mesmo em todos os blocos.
+    """
+
+    def __init__(self):
+        self._valores = {}   # coluna -> único valor visto até aqui
+        self._variam = set()
+
+    def atualiza(self, tabela) -> None:
+        """Soma um bloco (pa.Table ou RecordBatch no SCHEMA_NEUROPULSE)."""
+        if tabela.num_rows == 0:
+            return
+        for coluna in DIMENSOES_CONSTANTES:
+            if coluna in self._variam:
+                continue
+            if coluna not in tabela.column_names:
+                self._variam.add(coluna)
+                continue
+            valores = _valores_distintos(tabela[coluna])
+            if len(valores) != 1 or valores.null_count:
+                self._variam.add(coluna)
+                continue
+            valor = valores[0].as_py()
+            if self._valores.setdefault(coluna, valor) != valor:
+                self._variam.add(coluna)
+
+    def constantes(self) -> dict:
+        return {c: v for c, v in self._valores.items() if c not in self._variam}
+
+
+def constantes_tabela(tabela: pa.Table) -> dict:
+    """{coluna: valor} das DIMENSOES_CONSTANTES com um único valor (não nulo)."""
+    acumulado = ConstantesBlocos()
+    acumulado.atualiza(tabela)
+    return acumulado.constantes()
+
+
+def grava_metadados(pasta: Path, constantes: dict) -> None:
+    """Schema + dimensões constantes em <pasta>/_common_metadata."""
+    metadados = {_CHAVE_CONSTANTES: json.dumps(constantes, ensure_ascii=False).encode("utf-8")}
+    pq.write_metadata(SCHEMA_NEUROPULSE.with_metadata(metadados), Path(pasta) / METADADOS_DATASET)
+
+
+def le_constantes(pasta: Path):
+    """Dimensões constantes registradas pelo ETL (None se o dataset não tem metadados)."""
+    path = Path(pasta) / METADADOS_DATASET
+    if not path.exists():
+        return None
+    metadados = pq.read_schema(path).metadata or {}
+    if _CHAVE_CONSTANTES not in metadados:
+        return None
+    return json.loads(metadados[_CHAVE_CONSTANTES].decode("utf-8"))
+
+
+def anos_disponiveis(pasta: Path) -> list:
+    """Edições gravadas (pastas year=AAAA), em ordem crescente."""
+    if not pasta.is_dir():
+        return []
+    return sorted(
+        int(p.name.split("=", 1)[1]) for p in pasta.glob("year=*") if p.is_dir()
+    )
+
+
+def le_particoes(pasta: Path, anos=None) -> pa.Table:
+    """
+    Lê o dataset particionado como uma tabela no SCHEMA_NEUROPULSE.
+
+    Com `anos`, o filtro vai para a descoberta dos arquivos: pastas de
+    outros anos nem são abertas. As linhas saem na ordem das partições
+    (ano, indicador) e, dentro de cada uma, na ordem em que foram gravadas.
+
+    O link da versão publicada é resolvido antes: se o ETL publicar outra
+    versão no meio da leitura, ela termina na versão em que começou.
+    """
+    pasta = Path(pasta).resolve()
+    dataset = ds.dataset(pasta, format="parquet", partitioning=PARTICIONAMENTO)
+    filtro = None if anos is None else ds.field("year").isin([int(a) for a in anos])
+    tabela = dataset.to_table(filter=filtro)
+    return tabela.select(SCHEMA_NEUROPULSE.names).cast(SCHEMA_NEUROPULSE)
+
+
+def itera_particoes(pasta: Path, colunas: list = None, linhas_por_batch: int = None):
+    """
+    le_particoes em record batches (mesmas linhas, mesma ordem), para
+    percorrer o dataset sem montá-lo em memória: só um batch por vez.
+    `colunas` restringe a leitura (tipos do SCHEMA_NEUROPULSE). Um batch
+    nunca mistura partições.
+    """
+    pasta = Path(pasta).resolve()
+    dataset = ds.dataset(pasta, format="parquet", partitioning=PARTICIONAMENTO)
+    nomes = SCHEMA_NEUROPULSE.names if colunas is None else list(colunas)
+    schema = pa.schema([SCHEMA_NEUROPULSE.field(nome) for nome in nomes])
+    opcoes = {} if linhas_por_batch is None else {"batch_size": linhas_por_batch}
+    for batch in dataset.to_batches(columns=nomes, **opcoes):
+        yield batch.cast(schema)
+
+
+def versao_dataset(pasta: Path) -> str:
+    """
+    Versão de um dataset sem carimbo (bases antigas): hash dos caminhos,
+    tamanhos e mtimes dos arquivos. "" se não existe. O ETL grava a versão
+    derivada das entradas no carimbo (ver versao_publicada).
+    """
+    pasta = Path(pasta)
+    if not pasta.is_dir():
+        return ""
+    h = hashlib.sha1()
+    for arquivo in sorted(pasta.rglob("*.parquet")):
+        info = arquivo.stat()
+        h.update(f"{arquivo.relative_to(pasta).as_posix()}|{info.st_size}|{info.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:16]
+
+
+# ===============================
+# SNAPSHOT DE PARTIDA RÁPIDA (ARROW IPC)
+# ===============================
+# O ETL grava, ao lado das partições, o dataset inteiro num só arquivo Arrow
+# IPC (Feather v2) sem compressão. O dashboard abre com memory map: nada de
+# descobrir partições nem descomprimir Parquet, e as colunas chegam no
+# layout do store (dicionário, year int16, cod_uf int8). Nenhum record batch
+# mistura anos, então escolher os anos é escolher batches. O snapshot guarda
+# a versão do dataset de onde saiu; se as partições mudarem sem um snapshot
+# novo, ele é ignorado e a leitura volta para as partições.
+
+SNAPSHOT_FILE = "neuropulse_snapshot.arrow"
+_CHAVE_VERSAO = b"neuropulse.versao"
+
+
+def _dicionarios_dataset(pasta: Path) -> dict:
+    """
+    {coluna: valores} das colunas de dicionário do dataset inteiro, na ordem
+    em que aparecem (só essas colunas são lidas, um batch por vez).
+    """
+    colunas = [f.name for f in SCHEMA_NEUROPULSE if pa.types.is_dictionary(f.type)]
+    dicionarios = {c: pa.array([], pa.string()) for c in colunas}
+    for batch in itera_particoes(pasta, colunas):
+        for coluna in colunas:
+            valores = _valores_distintos(batch.column(coluna))
+            novos = valores.filter(pc.invert(pc.is_in(valores, value_set=dicionarios[coluna])))
+            if len(novos):
+                dicionarios[coluna] = pa.concat_arrays([dicionarios[coluna], novos])
+    return dicionarios
+
+
+def _com_dicionarios(batch: pa.RecordBatch, dicionarios: dict) -> pa.RecordBatch:
+    """`batch` com as colunas de dicionário recodificadas nos `dicionarios` do dataset."""
+    colunas = []
+    for nome, coluna in zip(batch.schema.names, batch.columns):
+        if nome in dicionarios:
+            mapa = pc.index_in(coluna.dictionary, value_set=dicionarios[nome]).cast(pa.int32())
+            coluna = pa.DictionaryArray.from_arrays(mapa.take(coluna.indices), dicionarios[nome])
+        colunas.append(coluna)
+    return pa.RecordBatch.from_arrays(colunas, schema=batch.schema)
+
+
+def escreve_snapshot(pasta: Path, path: Path, versao: str) -> None:
+    """
+    Grava o snapshot do dataset em `pasta` (a pasta da `versao`), batch a
+    batch, na ordem de le_particoes: só um batch fica em memória. Uma
+    passada antes junta os dicionários do dataset inteiro (o formato de
+    arquivo IPC só aceita um dicionário por coluna) e cada batch é
+    recodificado neles. As dimensões constantes vêm dos metadados da pasta.
+    """
+    path = Path(path)
+    dicionarios = _dicionarios_dataset(pasta)
+
+    constantes = le_constantes(pasta) or {}
+    metadados = {
+        _CHAVE_CONSTANTES: json.dumps(constantes, ensure_ascii=False).encode("utf-8"),
+        _CHAVE_VERSAO: versao.encode("utf-8"),
+    }
+    schema = SCHEMA_NEUROPULSE.with_metadata(metadados)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as saida, pa.ipc.new_file(saida, schema) as escritor:
+        for batch in itera_particoes(pasta):
+            if batch.num_rows:
+                escritor.write_batch(_com_dicionarios(batch, dicionarios))
+    os.replace(tmp, path)
+
+
+def _abre_snapshot(path: Path, versao: str = None):
+    """Leitor do snapshot, ou None se não existe ou é de outra versão do dataset."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    leitor = pa.ipc.open_file(pa.memory_map(str(path)))
+    metadados = leitor.schema.metadata or {}
+    if versao is not None and metadados.get(_CHAVE_VERSAO, b"").decode() != versao:
+        return None
+    return leitor
+
+
+def _anos_batches(leitor) -> list:
+    """Ano de cada batch do snapshot (1ª linha; o memory map não copia nada)."""
+    return [leitor.get_batch(n)["year"][0].as_py() for n in range(leitor.num_record_batches)]
+
+
+def anos_snapshot(path: Path, versao: str = None) -> list:
+    """Edições no snapshot; [] se inválido."""
+    leitor = _abre_snapshot(path, versao)
+    if leitor is None:
+        return []
+    return sorted(set(_anos_batches(leitor)))
+
+
+def le_snapshot(path: Path, anos=None, versao: str = None):
+    """
+    (tabela, constantes) dos anos pedidos, sem cópia (memory map), nas
+    mesmas linhas e ordem de le_particoes; None se o snapshot não existe ou
+    não é da `versao` informada.
+    """
+    leitor = _abre_snapshot(path, versao)
+    if leitor is None:
+        return None
+    metadados = leitor.schema.metadata
+    anos = None if anos is None else {int(a) for a in anos}
+    batches = [
+        leitor.get_batch(n)
+        for n, ano in enumerate(_anos_batches(leitor))
+        if anos is None or ano in anos
+    ]
+    tabela = pa.Table.from_batches(batches, schema=leitor.schema.remove_metadata())
+    return tabela, json.loads(metadados[_CHAVE_CONSTANTES].decode("utf-8"))
+
+
+# ===============================
+# CARIMBO DE VERSÃO PUBLICADA
+# ===============================
+# Gravado pelo ETL (tmp + os.replace) depois da pasta da versão, do CSV, do
+# cubo e do snapshot, e antes da troca do link. Quem lê usa a versão do
+# carimbo como chave de cache e lê os dados dessa versão, não os do link:
+# pasta_versao para as partições, e cubo e snapshot só valem com a mesma
+# versão gravada neles. Uma chave nunca guarda dados de outra versão, e os
+# dados novos entram sem reiniciar nada.
+
+CARIMBO_FILE = "neuropulse_versao.json"
+
+
+def grava_carimbo(path: Path, versao: str, **extras) -> None:
+    """Grava o carimbo {versao, publicado_em, ...extras} de forma atômica."""
+    path = Path(path)
+    carimbo = {
+        "versao": versao,
+        "publicado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **extras,
+    }
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(carimbo, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def le_carimbo(path: Path):
+    """Carimbo da versão publicada (None se o ETL ainda não gravou um)."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def versao_publicada(carimbo: Path, pasta: Path) -> str:
+    """Versão do carimbo; sem ele (bases antigas), a das partições em `pasta`."""
+    dados = le_carimbo(carimbo)
+    return dados["versao"] if dados else versao_dataset(pasta)
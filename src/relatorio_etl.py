@@ -0,0 +1,258 @@
+import contextlib
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o relatório sai sem pico de RSS
+    resource = None
+
+# ===============================
+# INSTRUMENTAÇÃO DOS ESTÁGIOS DO ETL
+# ===============================
+# O build abre um RelatorioETL e cada estágio (leitura, rodapé, conversão
+# numérica, melt, UF, concat, validação, escrita...) roda dentro de
+# `with estagio("nome") as e:`. Para cada estágio ficam registrados tempo de
+# parede, tempo de CPU, linhas de entrada/saída e picos de memória: RSS do
+# processo (getrusage) sempre e tracemalloc quando ele estiver ligado
+# (ex.: `--tracemalloc` na linha de comando).
+#
+# Sem relatório aberto, estagio() não mede nada: parse_sidra chamado fora
+# do build (benchmarks, adaptadores de fontes) não paga o custo.
+
+_RELATORIO = None  # relatório ativo neste processo
+
+
+def _pico_rss_mb():
+    """Maior RSS do processo até agora (ru_maxrss: KB no Linux, bytes no macOS)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024**2 if platform.system() == "Darwin" else 1024
+    return round(pico / divisor, 3)
+
+
+_SOMADOS = ("chamadas", "segundos", "cpu_segundos", "linhas_entrada", "linhas_saida")
+_PICOS = ("pico_rss_mb", "pico_tracemalloc_mb")
+
+
+def _total_vazio(nome: str, arquivo: str) -> dict:
+    return {
+        "estagio": nome,
+        "arquivo": arquivo,
+        **{campo: None for campo in _SOMADOS + _PICOS},
+    }
+
+
+def _soma(total: dict, parcial: dict) -> None:
+    """Acumula `parcial` em `total`: contadores somam, picos ficam no máximo."""
+    for campo in _SOMADOS:
+        if parcial.get(campo) is not None:
+            total[campo] = (total[campo] or 0) + parcial[campo]
+    for campo in _PICOS:
+        if parcial.get(campo) is not None:
+            total[campo] = max(total[campo] or 0.0, parcial[campo])
+
+
+class Estagio:
+    """Medição de uma execução de um estágio (o que o `with` devolve)."""
+
+    def __init__(self, nome: str, arquivo: str, linhas_entrada: int = None):
+        self.nome = nome
+        self.arquivo = arquivo
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.segundos = 0.0
+        self.cpu_segundos = 0.0
+        self.pico_rss_mb = None
+        self.pico_tracemalloc_mb = None
+        self._mem_inicio = 0
+        self._pico = 0
+
+    def saida(self, linhas: int) -> None:
+        self.linhas_saida = int(linhas)
+
+
+class RelatorioETL:
+    """
+    Coleta as medições de uma execução do ETL e grava o relatório JSON.
+
+    Execuções repetidas de um estágio (um por arquivo, um por bloco no modo
+    streaming) são somadas por (estágio, arquivo); o resumo soma por estágio.
+    """
+
+    def __init__(self, modo: str, **parametros):
+        self.modo = modo
+        self.parametros = parametros
+        self.inicio = datetime.now(timezone.utc)
+        self._registros = {}   # (estágio, arquivo) -> totais
+        self._pilha = []       # estágios abertos (aninhados)
+        self._arquivo = None
+        self._anterior = None
+        self._t0 = self._cpu0 = 0.0
+        self.segundos = self.cpu_segundos = None
+        self._mem_inicio = self._pico = 0
+        self.anotacoes = {}    # resultados de estágios (ex.: contagens da validação)
+
+    # ---------- ativação ----------
+
+    def __enter__(self):
+        global _RELATORIO
+        self._anterior, _RELATORIO = _RELATORIO, self
+        self._t0, self._cpu0 = time.perf_counter(), time.process_time()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._mem_inicio = self._pico = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        global _RELATORIO
+        self.segundos = time.perf_counter() - self._t0
+        self.cpu_segundos = time.process_time() - self._cpu0
+        _RELATORIO = self._anterior
+        return False
+
+    # ---------- medição ----------
+
+    @contextlib.contextmanager
+    def estagio(self, nome: str, linhas_entrada: int = None):
+        medida = Estagio(nome, self._arquivo, linhas_entrada)
+        rastreando = tracemalloc.is_tracing()
+        if rastreando:
+            # reset_peak zera o pico de todos: os estágios de fora guardam o seu antes
+            atual, pico = tracemalloc.get_traced_memory()
+            for aberto in [self, *self._pilha]:
+                aberto._pico = max(aberto._pico, pico)
+            tracemalloc.reset_peak()
+            medida._mem_inicio = medida._pico = atual
+
+        self._pilha.append(medida)
+        inicio, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield medida
+        finally:
+            medida.segundos = time.perf_counter() - inicio
+            medida.cpu_segundos = time.process_time() - cpu
+            self._pilha.pop()
+            if rastreando:
+                _, pico = tracemalloc.get_traced_memory()
+                medida._pico = max(medida._pico, pico)
+                for aberto in [self, *self._pilha]:
+                    aberto._pico = max(aberto._pico, medida._pico)
+                medida.pico_tracemalloc_mb = (medida._pico - medida._mem_inicio) / 1024**2
+            medida.pico_rss_mb = _pico_rss_mb()
+            self._acumula(medida)
+
+    @contextlib.contextmanager
+    def arquivo(self, nome: str):
+        """Atribui os estágios de dentro do bloco a um arquivo bruto."""
+        anterior, self._arquivo = self._arquivo, nome
+        try:
+            yield
+        finally:
+            self._arquivo = anterior
+
+    def _acumula(self, medida: Estagio) -> None:
+        chave = (medida.nome, medida.arquivo)
+        total = self._registros.setdefault(chave, _total_vazio(*chave))
+        _soma(total, {**medida.__dict__, "estagio": medida.nome, "chamadas": 1})
+
+    def registros(self) -> list:
+        """Totais por (estágio, arquivo), para juntar os de outro processo."""
+        return list(self._registros.values())
+
+    def incorpora(self, registros: list) -> None:
+        """Soma registros vindos de um processo do pool (ver _executa_loader)."""
+        for reg in registros:
+            chave = (reg["estagio"], reg["arquivo"])
+            _soma(self._registros.setdefault(chave, _total_vazio(*chave)), reg)
+
+    def anota(self, nome: str, dados) -> None:
+        """Guarda um resultado (JSON) que vai para o relatório com a chave `nome`."""
+        self.anotacoes[nome] = dados
+
+    # ---------- relatório ----------
+
+    def resumo(self) -> list:
+        """Totais por estágio (todos os arquivos), na ordem em que apareceram."""
+        por_estagio = {}
+        for reg in self._registros.values():
+            _soma(por_estagio.setdefault(reg["estagio"], _total_vazio(reg["estagio"], None)), reg)
+        return [
+            {k: v for k, v in total.items() if k != "arquivo"} for total in por_estagio.values()
+        ]
+
+    def como_dict(self) -> dict:
+        def arredonda(reg):
+            return {
+                k: round(v, 6) if isinstance(v, float) else v for k, v in reg.items()
+            }
+
+        pico_tm = None
+        if tracemalloc.is_tracing():
+            pico_tm = max(self._pico, tracemalloc.get_traced_memory()[1]) - self._mem_inicio
+        return {
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "modo": self.modo,
+            "parametros": self.parametros,
+            "ambiente": {
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "plataforma": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "total": arredonda(
+                {
+                    "segundos": self.segundos,
+                    "cpu_segundos": self.cpu_segundos,
+                    "pico_rss_mb": _pico_rss_mb(),
+                    "pico_tracemalloc_mb": None if pico_tm is None else pico_tm / 1024**2,
+                }
+            ),
+            **self.anotacoes,
+            "resumo": [arredonda(reg) for reg in self.resumo()],
+            "estagios": [arredonda(reg) for reg in self._registros.values()],
+        }
+
+    def grava(self, path: Path) -> None:
+        """Grava o relatório (tmp + os.replace: quem lê nunca vê meio arquivo)."""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.como_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# ===============================
+# ATALHOS PARA O CÓDIGO DO ETL
+# ===============================
+
+def relatorio_ativo():
+    """RelatorioETL aberto neste processo (ou None)."""
+    return _RELATORIO
+
+
+@contextlib.contextmanager
+def estagio(nome: str, linhas_entrada: int = None):
+    """Mede o bloco no relatório ativo; sem relatório, não mede nada."""
+    if _RELATORIO is None:
+        yield Estagio(nome, None, linhas_entrada)
+        return
+    with _RELATORIO.estagio(nome, linhas_entrada) as medida:
+        yield medida
+
+
+@contextlib.contextmanager
+def arquivo(nome: str):
+    """Atribui os estágios de dentro do bloco a um arquivo (no relatório ativo)."""
+    if _RELATORIO is None:
+        yield
+        return
+    with _RELATORIO.arquivo(nome):
+        yield
@@ -0,0 +1,227 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from particoes_neuropulse import SCHEMA_NEUROPULSE
+from store_neuropulse import COLUNAS_BUSCA, FILTROS_STORE, _como_lista
+
+try:
+    import duckdb
+except ImportError:  # backend opcional: sem duckdb o painel usa o store em pandas
+    duckdb = None
+
+# ===============================
+# BACKEND DUCKDB DO DASHBOARD
+# ===============================
+# Mesma interface do NeuroPulseStore (opcoes/filter/aggregate), mas sem
+# carregar a base na memória: cada consulta vira SQL sobre o dataset
+# particionado do ETL (year=/indicador=). O filtro de ano poda as pastas das
+# outras edições e os da sidebar descem para o scan (estatísticas/dicionário
+# dos row groups). Só o resultado filtrado volta para o pandas.
+
+# Colunas na ordem do DataFrame do store em pandas (as de partição vêm por último no scan)
+COLUNAS = SCHEMA_NEUROPULSE.names
+
+
+class DuckDBStore:
+    """
+    Consulta o dataset processado (só as partições de `anos`) por uma
+    conexão DuckDB embutida.
+
+    Segue as regras do store em pandas: resultados saem na ordem do dataset
+    (partições, depois arquivo) e, em empate de maior/menor valor, vale a
+    primeira UF nessa ordem. Chaves repetidas já foram resolvidas na
+    validação do ETL (política de conflitos), então aqui cada chave aparece
+    uma vez só.
+    """
+
+    def __init__(self, dataset_path: Path, anos=None):
+        if duckdb is None:
+            raise ImportError("backend 'duckdb' requer o pacote duckdb (pip install duckdb)")
+
+        # Fixa a versão publicada agora (o link do ETL pode mudar depois)
+        self.dataset_path = Path(dataset_path).resolve()
+        self.anos = None if anos is None else [int(a) for a in anos]
+        self._con = duckdb.connect(database=":memory:")
+        self._lock = threading.Lock()  # cursores são criados a partir da conexão base
+        self._indexa_arquivos()
+
+        self._opcoes = {
+            col: [
+                linha[0]
+                for linha in self._executa(
+                    f'SELECT DISTINCT "{col}" FROM {self._fonte()} '
+                    f'WHERE "{col}" IS NOT NULL ORDER BY 1'
+                )
+            ]
+            for col in FILTROS_STORE
+        }
+        self._n_linhas = self._executa(f"SELECT count(*) FROM {self._fonte()}")[0][0]
+
+    # ---------- SQL ----------
+
+    def _scan(self) -> str:
+        caminho = str(self.dataset_path / "**" / "*.parquet").replace("'", "''")
+        return f"""read_parquet(
+                '{caminho}',
+                hive_partitioning = true,
+                hive_types = {{'year': SMALLINT, 'indicador': VARCHAR}},
+                filename = true,
+                file_row_number = true
+            )"""
+
+    def _anos(self) -> str:
+        # Predicado sobre a coluna de partição: o DuckDB nem abre os outros anos
+        if self.anos is None:
+            return "TRUE"
+        return f"year IN ({', '.join(map(str, self.anos)) or 'NULL'})"
+
+    def _indexa_arquivos(self) -> None:
+        """
+        Tabela pequena (arquivo, linha inicial): os arquivos dos anos
+        escolhidos em ordem de nome, com o total de linhas dos anteriores.
+        Sai dos metadados dos row groups, uma vez por store.
+        """
+        self._con.execute(
+            f"""
+            CREATE TABLE _arquivos AS
+            SELECT filename, (sum(n) OVER (ORDER BY filename) - n)::BIGINT AS inicio
+            FROM (
+                SELECT filename, count(*) AS n
+                FROM {self._scan()}
+                WHERE {self._anos()}
+                GROUP BY filename
+            )
+            """
+        )
+
+    def _fonte(self, where: str = "TRUE") -> str:
+        """
+        Linhas dos anos escolhidos que passam em `where`, com `_pos`, a
+        posição no dataset lido (a mesma do índice do DataFrame no store em
+        pandas): linha inicial do arquivo + posição dentro dele. Sem janela
+        sobre o dataset, os predicados descem para o scan e só as linhas
+        filtradas são lidas. O dataset sai validado do ETL (chave única),
+        então não há deduplicação por consulta.
+        """
+        return f"""(
+            SELECT * EXCLUDE (filename, file_row_number, inicio),
+                inicio + file_row_number AS _pos
+            FROM {self._scan()}
+            JOIN _arquivos USING (filename)
+            WHERE {self._anos()} AND ({where})
+        )"""
+
+    def _where(self, ufs, sexo, faixa_idade):
+        """Predicados da sidebar como SQL parametrizado."""
+        partes, params = [], []
+        for col, valor in (("UF", ufs), ("sexo", sexo), ("faixa_idade", faixa_idade)):
+            if valor is None:
+                continue
+            valores = [str(v) for v in _como_lista(valor, [])]
+            if not valores:
+                return "FALSE", []
+            partes.append(f'"{col}" IN ({", ".join("?" * len(valores))})')
+            params += valores
+        return (" AND ".join(partes) or "TRUE"), params
+
+    def _executa(self, sql: str, params=None, como_df: bool = False):
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            resultado = cursor.execute(sql, params or [])
+            return resultado.df() if como_df else resultado.fetchall()
+        finally:
+            cursor.close()
+
+    # ---------- interface do store ----------
+
+    def __len__(self) -> int:
+        return self._n_linhas
+
+    def opcoes(self, coluna: str) -> list:
+        """Valores distintos (ordenados) de sexo, faixa_idade ou UF."""
+        return self._opcoes[coluna]
+
+    def filter(self, ufs=None, sexo=None, faixa_idade=None) -> pd.DataFrame:
+        where, params = self._where(ufs, sexo, faixa_idade)
+        df = self._executa(
+            f"SELECT * FROM {self._fonte(where)} ORDER BY _pos",
+            params,
+            como_df=True,
+        )
+        # Índice = posição da linha no dataset, como no DataFrame lido pelo pandas
+        return df.set_index("_pos").rename_axis(None)[COLUNAS]
+
+    def aggregate(self, ufs=None, sexo=None, faixa_idade=None, by: str = None):
+        where, params = self._where(ufs, sexo, faixa_idade)
+        linhas = self._fonte(where)
+
+        if by is not None:
+            return self._executa(
+                f'SELECT "{by}", avg(valor) AS valor FROM {linhas} '
+                f'GROUP BY "{by}" ORDER BY "{by}"',
+                params,
+                como_df=True,
+            )
+
+        n, media, uf_max, valor_max, uf_min, valor_min = self._executa(
+            f"""
+            SELECT
+                count(valor),
+                avg(valor),
+                arg_max(UF, [valor, -_pos]),
+                max(valor),
+                arg_min(UF, [valor, _pos]),
+                min(valor)
+            FROM {linhas}
+            """,
+            params,
+        )[0]
+        if not n:
+            return None
+
+        return {
+            "n": n,
+            "media": float(media),
+            "uf_max": uf_max,
+            "valor_max": float(valor_max),
+            "uf_min": uf_min,
+            "valor_min": float(valor_min),
+        }
+
+    def pagina(
+        self,
+        ufs=None,
+        sexo=None,
+        faixa_idade=None,
+        ordenar_por: str = "valor",
+        decrescente: bool = True,
+        busca: tuple = None,
+        inicio: int = 0,
+        tamanho: int = 50,
+    ):
+        """Mesma página do store em pandas, com ORDER BY/LIMIT no DuckDB."""
+        where, params = self._where(ufs, sexo, faixa_idade)
+
+        if busca is not None and busca[1]:
+            coluna, texto = busca
+            if coluna not in COLUNAS_BUSCA:
+                raise ValueError(f"Busca não suportada na coluna {coluna!r}")
+            where += f' AND contains(lower("{coluna}"), lower(?))'
+            params = params + [str(texto)]
+
+        if ordenar_por not in COLUNAS:
+            raise ValueError(f"Coluna de ordenação desconhecida: {ordenar_por!r}")
+        direcao = "DESC" if decrescente else "ASC"
+
+        linhas = self._fonte(where)
+        total = self._executa(f"SELECT count(*) FROM {linhas}", params)[0][0]
+        df = self._executa(
+            f'SELECT * FROM {linhas} ORDER BY "{ordenar_por}" {direcao}, _pos '
+            f"LIMIT {int(tamanho)} OFFSET {int(inicio)}",
+            params,
+            como_df=True,
+        )
+        return df.set_index("_pos").rename_axis(None)[COLUNAS], total
@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+
+from particoes_neuropulse import DIMENSOES_CONSTANTES
+
+# ===============================
+# STORE DE CONSULTA DO DASHBOARD
+# ===============================
+
+# Colunas filtráveis pela sidebar (opções dos widgets)
+FILTROS_STORE = ["sexo", "faixa_idade", "UF"]
+
+# Ordem física das linhas no store (e chave do índice de offsets); dentro de
+# cada combinação as linhas ficam na ordem original da base
+ORDEM_STORE = ["sexo", "faixa_idade"]
+
+
+# Colunas de texto aceitas na busca da tabela detalhada
+COLUNAS_BUSCA = ["UF", "sexo", "faixa_idade"]
+
+
+def _como_lista(valor, todos):
+    """None -> todos os valores; escalar -> [escalar]; lista -> lista."""
+    if valor is None:
+        return list(todos)
+    if isinstance(valor, (list, tuple, set, np.ndarray, pd.Index)):
+        return list(valor)
+    return [valor]
+
+
+def tipos_compactos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipos enxutos para bases lidas do CSV (as do dataset colunar já chegam
+    assim): texto como categoria, year int16 e cod_uf int8.
+    """
+    tipos = {c: "category" for c in df.columns if df[c].dtype == object}
+    if "year" in df.columns:
+        tipos["year"] = "int16"
+    if "cod_uf" in df.columns and df["cod_uf"].notna().all():
+        tipos["cod_uf"] = "int8"
+    return df.astype(tipos)
+
+
+def _somente_leitura(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+class NeuroPulseStore:
+    """
+    Dataset do painel organizado para consulta por filtro.
+
+    As linhas ficam ordenadas por (sexo, faixa_idade) e, dentro de cada
+    combinação, na ordem original da base; um índice guarda o intervalo
+    [início, fim) de cada combinação. Assim filter() e aggregate() só tocam
+    as linhas selecionadas, em vez de montar máscaras booleanas sobre a
+    tabela inteira a cada interação.
+
+    O store é imutável e feito para ser compartilhado entre sessões
+    (st.cache_resource): os arrays internos são só leitura e, com uma única
+    combinação e todas as UFs, filter() devolve uma fatia do DataFrame
+    compartilhado, sem cópia. Quem for alterar um resultado faz .copy()
+    antes (o dashboard e a API só leem).
+
+    Os resultados mantêm a ordem original da base (mesmo índice, mesmos
+    desempates de maior/menor valor que o filtro por máscara).
+
+    A UF não entra na ordenação: com (sexo, faixa_idade, UF) a seleção de uma
+    UF seria um searchsorted, mas o caso comum (todas as UFs) deixaria de ser
+    uma fatia na ordem da base e passaria a exigir reordenar. O filtro de UF
+    é um np.isin sobre os códigos da fatia selecionada, O(linhas da fatia).
+
+    Dimensões com um único valor (DIMENSOES_CONSTANTES: domicílio,
+    transtorno, indicador na base atual) não viram coluna: ficam em
+    `constantes` e com_constantes() as devolve a um resultado. Sem
+    `constantes` (dataset sem metadados, CSV), o store detecta quais são.
+    """
+
+    def __init__(self, df: pd.DataFrame, constantes: dict = None):
+        if constantes is None:
+            constantes = {
+                c: df[c].iloc[0]
+                for c in DIMENSOES_CONSTANTES
+                if c in df.columns and len(df) and df[c].nunique(dropna=False) == 1
+            }
+        self.constantes = {c: str(v) for c, v in constantes.items() if c in df.columns}
+        df = df.drop(columns=list(self.constantes))
+
+        # Ordem estável: dentro de cada (sexo, faixa_idade) fica a ordem da base
+        ordem = np.lexsort(
+            [df[c].astype(str).to_numpy() for c in reversed(ORDEM_STORE)]
+        )
+        self.df = df.iloc[ordem]
+        self._pos_original = _somente_leitura(ordem.astype(np.int32 if len(ordem) < 2**31 else np.int64))
+
+        # Vista da coluna valor do próprio store (sem cópia)
+        self._valor = _somente_leitura(self.df["valor"].to_numpy(dtype=float))
+        # UF como códigos da categoria (1-2 bytes por linha, não um objeto str)
+        uf = self.df["UF"].astype("category")
+        self._uf_nomes = np.asarray(uf.cat.categories.astype(str), dtype=object)
+        self._uf = _somente_leitura(uf.cat.codes.to_numpy())
+        self._codigo_uf = {nome: i for i, nome in enumerate(self._uf_nomes)}
+
+        # Índice de offsets: (sexo, faixa_idade) -> (início, fim)
+        chaves = self.df[ORDEM_STORE].astype(str)
+        quebra = np.zeros(len(chaves), dtype=bool)
+        quebra[:1] = True
+        for col in ORDEM_STORE:
+            serie = chaves[col].to_numpy()
+            quebra[1:] |= serie[1:] != serie[:-1]
+        inicios = np.flatnonzero(quebra)
+        fins = np.append(inicios[1:], len(chaves))
+
+        colunas = [chaves[col].to_numpy()[inicios] for col in ORDEM_STORE]
+        self._offsets = {
+            chave: (int(i), int(f)) for chave, i, f in zip(zip(*colunas), inicios, fins)
+        }
+
+        # Opções de cada filtro, já ordenadas (para os widgets da sidebar)
+        self._opcoes = {
+            col: sorted(set(chave[n] for chave in self._offsets))
+            for n, col in enumerate(ORDEM_STORE)
+        }
+        self._opcoes["UF"] = sorted(self._uf_nomes[np.unique(self._uf)].tolist())
+        self._conjunto_ufs = frozenset(self._opcoes["UF"])
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def opcoes(self, coluna: str) -> list:
+        """Valores distintos (ordenados) de sexo, faixa_idade ou UF."""
+        return self._opcoes[coluna]
+
+    def bytes_memoria(self) -> int:
+        """Memória do store: DataFrame (deep) + arrays auxiliares."""
+        return int(
+            self.df.memory_usage(deep=True, index=True).sum()
+            + self._pos_original.nbytes
+            + self._uf.nbytes
+        )
+
+    def com_constantes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """`df` (resultado do store) com as dimensões constantes de volta, como categoria."""
+        extras = {
+            coluna: pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[valor])
+            for coluna, valor in self.constantes.items()
+        }
+        return df.assign(**extras)
+
+    def _intervalos(self, sexo=None, faixa_idade=None) -> list:
+        """Intervalos [início, fim) das combinações selecionadas, em ordem de store."""
+        intervalos = []
+        for s in _como_lista(sexo, self._opcoes["sexo"]):
+            for f in _como_lista(faixa_idade, self._opcoes["faixa_idade"]):
+                intervalo = self._offsets.get((str(s), str(f)))
+                if intervalo is not None:
+                    intervalos.append(intervalo)
+        return sorted(intervalos)
+
+    def _todas_ufs(self, ufs) -> bool:
+        return ufs is None or self._conjunto_ufs.issubset(map(str, _como_lista(ufs, [])))
+
+    def _posicoes(self, ufs=None, sexo=None, faixa_idade=None) -> np.ndarray:
+        """Posições (no store) das linhas selecionadas, na ordem original da base."""
+        intervalos = self._intervalos(sexo, faixa_idade)
+        if not intervalos:
+            return np.empty(0, dtype=np.intp)
+
+        pos = np.concatenate([np.arange(i, f) for i, f in intervalos])
+        if not self._todas_ufs(ufs):
+            codigos = [self._codigo_uf[str(u)] for u in _como_lista(ufs, []) if str(u) in self._codigo_uf]
+            pos = pos[np.isin(self._uf[pos], codigos)]
+
+        if len(intervalos) == 1:
+            return pos  # uma combinação: já está na ordem original
+        return pos[np.argsort(self._pos_original[pos], kind="stable")]
+
+    def filter(self, ufs=None, sexo=None, faixa_idade=None) -> pd.DataFrame:
+        """
+        Linhas que atendem aos filtros. Cada argumento aceita um valor, uma
+        lista de valores ou None (sem filtro nessa dimensão).
+        """
+        intervalos = self._intervalos(sexo, faixa_idade)
+        if len(intervalos) == 1 and self._todas_ufs(ufs):
+            # Caso mais comum no painel: fatia contígua, sem cópia
+            inicio, fim = intervalos[0]
+            return self.df.iloc[inicio:fim]
+        return self.df.iloc[self._posicoes(ufs, sexo, faixa_idade)]
+
+    def aggregate(self, ufs=None, sexo=None, faixa_idade=None, by: str = None):
+        """
+        Agregados do valor nas linhas selecionadas.
+
+        - by=None: dict com n, media, uf_max, valor_max, uf_min, valor_min
+          (em empate, vale a primeira UF na ordem da base, como idxmax/idxmin)
+          ou None se nada foi selecionado
+        - by="sexo" (ou outra coluna): DataFrame [by, valor] com a média por grupo
+        """
+        pos = self._posicoes(ufs, sexo, faixa_idade)
+        valores = self._valor[pos]
+
+        if by is not None:
+            grupos = self.df[by].to_numpy()[pos]
+            return (
+                pd.DataFrame({by: grupos, "valor": valores})
+                .groupby(by, as_index=False, observed=True)["valor"]
+                .mean()
+            )
+
+        if len(pos) == 0:
+            return None
+
+        i_max = int(np.argmax(valores))
+        i_min = int(np.argmin(valores))
+        return {
+            "n": len(pos),
+            "media": float(valores.mean()),
+            "uf_max": self._uf_nomes[self._uf[pos[i_max]]],
+            "valor_max": float(valores[i_max]),
+            "uf_min": self._uf_nomes[self._uf[pos[i_min]]],
+            "valor_min": float(valores[i_min]),
+        }
+
+    def pagina(
+        self,
+        ufs=None,
+        sexo=None,
+        faixa_idade=None,
+        ordenar_por: str = "valor",
+        decrescente: bool = True,
+        busca: tuple = None,
+        inicio: int = 0,
+        tamanho: int = 50,
+    ):
+        """
+        Uma página da tabela detalhada: (DataFrame da página, total de linhas).
+
+        Busca (`busca` = (coluna, texto): contém, sem diferenciar maiúsculas),
+        ordenação e paginação correm sobre as posições selecionadas; só as
+        linhas da página viram DataFrame. Empates na ordenação ficam na
+        ordem da base.
+        """
+        pos = self._posicoes(ufs, sexo, faixa_idade)
+
+        if busca is not None and busca[1]:
+            coluna, texto = busca
+            if coluna not in COLUNAS_BUSCA:
+                raise ValueError(f"Busca não suportada na coluna {coluna!r}")
+            serie = self.df[coluna].iloc[pos]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Compara o texto só com as categorias, não com cada linha
+                categorias = serie.cat.categories
+                achadas = categorias[categorias.astype(str).str.contains(texto, case=False, regex=False)]
+                mascara = serie.isin(achadas).to_numpy()
+            else:
+                mascara = serie.astype(str).str.contains(texto, case=False, regex=False).to_numpy()
+            pos = pos[mascara]
+
+        if ordenar_por in self.constantes:
+            codigos = np.zeros(len(pos), dtype=np.intp)  # coluna constante: só a ordem da base
+        elif ordenar_por in self.df.columns:
+            codigos = pd.factorize(self.df[ordenar_por].to_numpy()[pos], sort=True)[0]
+        else:
+            raise ValueError(f"Coluna de ordenação desconhecida: {ordenar_por!r}")
+        ordem = np.lexsort((self._pos_original[pos], -codigos if decrescente else codigos))
+
+        fatia = pos[ordem][inicio : inicio + tamanho]
+        return self.df.iloc[fatia], len(pos)
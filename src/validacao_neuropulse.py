@@ -0,0 +1,269 @@
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from dim_uf import CODIGO_POR_NOME
+
+# ===============================
+# VALIDAÇÃO DA BASE (ESTÁGIO DO ETL)
+# ===============================
+# Roda uma vez, no ETL, antes de gravar o dataset: quem lê o artefato
+# (dashboard, API, cubo) pode confiar que cada chave aparece uma vez só.
+#
+# Checagens, todas vetorizadas (nada roda linha a linha em Python):
+# - chave única em CHAVE_LINHA (conflito = mesma chave com valores diferentes)
+# - valor dentro de VALOR_MIN..VALOR_MAX (os indicadores são percentuais)
+# - UF dentro da dimensão canônica (dim_uf), nas tabelas em nível de UF
+# - texto sem sinais de codificação quebrada (mojibake, U+FFFD, controle)
+#
+# Duplicatas exatas (linha inteira repetida) são só descartadas. O resto
+# sai da base e vai para a quarentena, com o motivo.
+
+# Chave de uma linha do dataset
+CHAVE_LINHA = ["year", "UF", "sexo", "faixa_idade", "domicilio", "indicador"]
+
+# Colunas de texto checadas quanto à codificação
+COLUNAS_TEXTO = ["UF", "sexo", "faixa_idade", "domicilio", "transtorno", "indicador"]
+
+VALOR_MIN, VALOR_MAX = 0.0, 100.0
+
+# UTF-8 lido como latin1 ("RondÃ´nia": Ã/Â seguido de byte de continuação),
+# caractere de substituição e caracteres de controle
+_TEXTO_QUEBRADO = re.compile(r"[ÃÂ][\x80-\xbf]|\ufffd|[\x00-\x1f\x7f]")
+
+# Política para chave repetida com valores diferentes
+POLITICAS_CONFLITO = {
+    "primeiro": "fica a primeira linha da chave (ordem das fontes); as outras vão para a quarentena",
+    "ultimo": "fica a última linha da chave; as outras vão para a quarentena",
+    "descarta": "todas as linhas da chave vão para a quarentena",
+    "erro": "interrompe o ETL com ErroValidacao",
+}
+POLITICA_PADRAO = "primeiro"
+
+# Motivos gravados na coluna "motivo" da quarentena (na ordem de prioridade)
+MOTIVOS = ["uf_desconhecida", "valor_fora_faixa", "codificacao", "conflito"]
+
+
+class ErroValidacao(ValueError):
+    """Base com conflito de chave e política "erro"."""
+
+
+@dataclass
+class ResultadoValidacao:
+    validas: pd.DataFrame
+    quarentena: pd.DataFrame  # mesmas colunas + "motivo"
+    contagens: dict = field(default_factory=dict)
+
+
+def _confere_politica(politica: str) -> None:
+    if politica not in POLITICAS_CONFLITO:
+        raise ValueError(
+            f"Política de conflito desconhecida: {politica!r} "
+            f"(use {', '.join(POLITICAS_CONFLITO)})"
+        )
+
+
+def _texto_quebrado(serie: pd.Series) -> np.ndarray:
+    """Máscara das linhas com texto suspeito; a regex roda só nos valores distintos."""
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=False)
+    suspeitos = np.array(
+        [isinstance(v, str) and bool(_TEXTO_QUEBRADO.search(v)) for v in distintos],
+        dtype=bool,
+    )
+    return suspeitos[codigos] if len(distintos) else np.zeros(len(serie), dtype=bool)
+
+
+def motivos_linha(df: pd.DataFrame, checa_uf=True) -> np.ndarray:
+    """
+    Motivo de quarentena de cada linha pelas checagens que não dependem das
+    outras linhas (UF, faixa de valor, codificação); None nas linhas válidas.
+
+    `checa_uf` (bool ou máscara por linha) diz onde a entidade tem de ser
+    uma UF da dim_uf; linhas de tabelas em nível municipal ficam de fora.
+    """
+    uf_fora = ~df["UF"].isin(CODIGO_POR_NOME.keys()).to_numpy()
+    if "cod_uf" in df.columns:
+        uf_fora |= df["cod_uf"].isna().to_numpy()
+    uf_fora &= checa_uf
+
+    valor = df["valor"].to_numpy(dtype=float)
+    fora_faixa = ~((valor >= VALOR_MIN) & (valor <= VALOR_MAX))  # NaN também
+
+    quebrado = np.zeros(len(df), dtype=bool)
+    for col in COLUNAS_TEXTO:
+        if col in df.columns:
+            quebrado |= _texto_quebrado(df[col])
+
+    # Uma linha com mais de um problema fica com o primeiro de MOTIVOS
+    motivos = np.full(len(df), None, dtype=object)
+    for motivo, mascara in reversed(list(zip(MOTIVOS, [uf_fora, fora_faixa, quebrado]))):
+        motivos[mascara] = motivo
+    return motivos
+
+
+def _quarentena(df: pd.DataFrame, motivos: np.ndarray) -> pd.DataFrame:
+    return df.assign(motivo=motivos)
+
+
+def valida(
+    df: pd.DataFrame, politica: str = POLITICA_PADRAO, checa_uf=True
+) -> ResultadoValidacao:
+    """
+    Valida a base longa e resolve conflitos de chave conforme `politica`
+    (ver POLITICAS_CONFLITO). A ordem das linhas válidas é preservada.
+    `checa_uf`: ver motivos_linha.
+    """
+    _confere_politica(politica)
+
+    exatas = df.duplicated().to_numpy()
+    df = df[~exatas]
+    if np.ndim(checa_uf):
+        checa_uf = np.asarray(checa_uf)[~exatas]
+
+    motivos = motivos_linha(df, checa_uf)
+    ok = pd.isna(motivos)
+
+    # Conflitos só entre linhas que passaram nas checagens por linha
+    candidatas = df[ok]
+    keep = {"primeiro": "first", "ultimo": "last"}.get(politica, False)
+    conflito = candidatas.duplicated(CHAVE_LINHA, keep=keep).to_numpy()
+    if politica == "erro" and conflito.any():
+        repetidas = candidatas[candidatas.duplicated(CHAVE_LINHA, keep=False)]
+        n_chaves = len(repetidas.drop_duplicates(CHAVE_LINHA))
+        raise ErroValidacao(
+            f"{n_chaves} chave(s) com valores conflitantes, ex.:\n"
+            f"{repetidas.head(6).to_string(index=False)}"
+        )
+    motivos[np.flatnonzero(ok)[conflito]] = "conflito"
+
+    fora = ~pd.isna(motivos)
+    contagens = {"duplicatas_exatas": int(exatas.sum())}
+    contagens.update({m: int((motivos == m).sum()) for m in MOTIVOS})
+    return ResultadoValidacao(
+        validas=df[~fora],
+        quarentena=_quarentena(df[fora], motivos[fora]),
+        contagens=contagens,
+    )
+
+
+class ValidadorBlocos:
+    """
+    A mesma validação no modo streaming, bloco a bloco.
+
+    Cada bloco é validado sozinho e depois contra as chaves já gravadas,
+    guardadas como hashes de 64 bits (chave e linha inteira, alinhados e
+    ordenados pela chave). Linha igual à gravada é duplicata exata; mesma
+    chave com outro valor é conflito. Como os blocos anteriores já foram
+    escritos, só "primeiro" e "erro" valem aqui.
+
+    Memória: o índice cresce com a saída, 16 bytes por linha gravada (ex.:
+    100 milhões de linhas ≈ 1,6 GB), mais uma cópia temporária da maior
+    run durante uma mescla. É o único custo do streaming que não é limitado
+    pelo tamanho do bloco. As chaves ficam em runs ordenadas de tamanhos
+    decrescentes: cada bloco vira uma run nova, mesclada com as menores
+    enquanto elas não forem pelo menos o dobro dela (como numa LSM tree).
+    Há O(log N) runs e cada linha é copiada O(log N) vezes no total, em vez
+    de um np.insert O(N) por bloco.
+    """
+
+    POLITICAS = ("primeiro", "erro")
+
+    def __init__(self, politica: str = POLITICA_PADRAO):
+        _confere_politica(politica)
+        if politica not in self.POLITICAS:
+            raise ValueError(
+                f"Política {politica!r} não funciona no modo streaming "
+                f"(use {' ou '.join(self.POLITICAS)})"
+            )
+        self.politica = politica
+        self.contagens = dict.fromkeys(["duplicatas_exatas", *MOTIVOS], 0)
+        self._runs = []  # [(hashes de chave ordenados, hashes de linha alinhados)]
+
+    def _gravadas(self, h_chave: np.ndarray, h_linha: np.ndarray):
+        """Máscaras (chave já gravada, linha inteira já gravada)."""
+        chave = np.zeros(len(h_chave), dtype=bool)
+        linha = np.zeros(len(h_chave), dtype=bool)
+        # Cada chave gravada está em uma run só
+        for chaves, linhas in self._runs:
+            pos = np.searchsorted(chaves, h_chave)
+            achou = pos < len(chaves)
+            achou[achou] = chaves[pos[achou]] == h_chave[achou]
+            linha[achou] = linhas[pos[achou]] == h_linha[achou]
+            chave |= achou
+        return chave, linha
+
+    def _acrescenta(self, h_chave: np.ndarray, h_linha: np.ndarray) -> None:
+        """Guarda as chaves recém-gravadas como run nova (mesclando as menores)."""
+        if not len(h_chave):
+            return
+        chaves, linhas = h_chave, h_linha
+        while self._runs and len(self._runs[-1][0]) <= 2 * len(chaves):
+            chaves_run, linhas_run = self._runs.pop()
+            chaves = np.concatenate([chaves_run, chaves])
+            linhas = np.concatenate([linhas_run, linhas])
+        # Estável: runs já ordenadas concatenadas são mescladas em tempo linear
+        ordem = np.argsort(chaves, kind="stable")
+        self._runs.append((chaves[ordem], linhas[ordem]))
+
+    @staticmethod
+    def _hashes(df: pd.DataFrame):
+        return (
+            pd.util.hash_pandas_object(df[CHAVE_LINHA], index=False).to_numpy(),
+            pd.util.hash_pandas_object(df, index=False).to_numpy(),
+        )
+
+    def valida(self, bloco: pd.DataFrame, checa_uf=True) -> ResultadoValidacao:
+        # 1) Linhas idênticas a uma já gravada saem antes de tudo, como no
+        #    build em memória (lá a duplicata exata cai antes dos conflitos)
+        _, repetida = self._gravadas(*self._hashes(bloco))
+        bloco = bloco[~repetida]
+        if np.ndim(checa_uf):
+            checa_uf = np.asarray(checa_uf)[~repetida]
+
+        # 2) O bloco sozinho
+        resultado = valida(bloco, self.politica, checa_uf)
+        validas = resultado.validas
+
+        # 3) Contra o que já foi gravado: a linha gravada é sempre a primeira
+        h_chave, h_linha = self._hashes(validas)
+        conflito, _ = self._gravadas(h_chave, h_linha)
+        if self.politica == "erro" and conflito.any():
+            raise ErroValidacao(
+                f"{int(conflito.sum())} linha(s) com chave já gravada com outro valor, ex.:\n"
+                f"{validas[conflito].head(6).to_string(index=False)}"
+            )
+
+        novas = ~conflito
+        self._acrescenta(h_chave[novas], h_linha[novas])
+
+        quarentena = resultado.quarentena
+        if conflito.any():
+            quarentena = pd.concat(
+                [quarentena, _quarentena(validas[conflito], "conflito")], ignore_index=True
+            )
+
+        contagens = dict(resultado.contagens)
+        contagens["duplicatas_exatas"] += int(repetida.sum())
+        contagens["conflito"] += int(conflito.sum())
+        for nome, n in contagens.items():
+            self.contagens[nome] += n
+
+        return ResultadoValidacao(validas[novas], quarentena, contagens)
+
+
+def escreve_quarentena(quarentena: pd.DataFrame, path, anexar: bool = False) -> None:
+    """Grava (ou anexa a) o CSV de quarentena, com cabeçalho só na criação."""
+    quarentena.to_csv(
+        path,
+        mode="a" if anexar else "w",
+        header=not anexar,
+        index=False,
+        encoding="utf-8",
+    )
+
+
+def resumo_contagens(contagens: dict) -> str:
+    partes = [f"{nome}={n}" for nome, n in contagens.items() if n]
+    return ", ".join(partes) or "nenhum problema"
@@ -0,0 +1,238 @@
+import argparse
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import etl_neuropulse as etl
+from fontes_neuropulse import build_fontes, fontes_registradas
+from validacao_neuropulse import POLITICA_PADRAO, POLITICAS_CONFLITO
+
+try:  # opcional: eventos do sistema de arquivos em vez de varredura
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# ===============================
+# MODO WATCH (ETL CONTÍNUO SOBRE data/raw)
+# ===============================
+# Fica olhando data/raw e, quando um arquivo bruto muda, refaz só as saídas
+# que dependem dele:
+# - tabelas da PNS/SIDRA (raiz e pns_<ano>/) -> base do dashboard
+#   (build_neuropulse_base com cache: só o arquivo alterado é reprocessado)
+# - arquivos de cada adaptador de fontes_neuropulse -> partição dessa fonte
+#
+# Cada build publica uma versão nova de forma atômica (partições numa pasta
+# da versão, demais arquivos com tmp + os.replace, carimbo e troca do link
+# por último), então o dashboard nunca lê nada pela metade. Um build que falha
+# (ex.: arquivo copiado pela metade, conflito com --conflitos erro) só é
+# avisado: a versão publicada continua a anterior.
+#
+# Detecção: com o pacote watchdog, eventos do sistema de arquivos acordam o
+# laço; sem ele, varredura a cada --intervalo segundos. Nos dois casos o que
+# acorda é a comparação de (tamanho, mtime) dos arquivos, e um lote só vai
+# para o build depois de --espera segundos sem mudança (cópias em andamento).
+# Conteúdo igual (ex.: um touch) não é filtrado aqui: o build calcula a versão
+# das entradas e, se ela já está publicada, não grava nada.
+
+INTERVALO_PADRAO = 2.0  # segundos entre varreduras (sem watchdog)
+ESPERA_PADRAO = 1.0     # segundos sem mudança antes de reconstruir
+
+
+def estado_raw(pasta: Path) -> dict:
+    """{arquivo: (tamanho, mtime_ns)} de tudo que está em `pasta` (recursivo)."""
+    estado = {}
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            path = Path(raiz) / nome
+            try:
+                info = path.stat()
+            except FileNotFoundError:  # removido durante a varredura
+                continue
+            estado[path] = (info.st_size, info.st_mtime_ns)
+    return estado
+
+
+def alterados(antes: dict, depois: dict) -> set:
+    """Arquivos criados, removidos ou com tamanho/mtime diferente."""
+    return {path for path in antes.keys() | depois.keys() if antes.get(path) != depois.get(path)}
+
+
+def _arquivos_pns() -> set:
+    return {csv_path for csv_path, _ in etl._fontes_pns()}
+
+
+def saidas_afetadas(caminhos: set, pns_anteriores: set) -> tuple:
+    """
+    (refazer a base?, adaptadores a atualizar) para um lote de arquivos
+    alterados. `pns_anteriores`: tabelas da PNS na varredura anterior (um
+    arquivo removido não aparece mais em _fontes_pns, mas afeta a base).
+    """
+    # Se a base muda mesmo quem decide é o build: a versão vem do conteúdo
+    # das tabelas e da política, e com ela já publicada nada é regravado.
+    # (O manifesto não serve aqui: o build em streaming não o atualiza.)
+    base = bool(caminhos & (_arquivos_pns() | pns_anteriores))
+
+    fontes = [
+        fonte
+        for fonte in fontes_registradas()
+        if caminhos & {Path(path) for path in fonte.arquivos()}
+    ]
+    return base, fontes
+
+
+def reconstroi(base: bool, fontes: list, jobs: int = 1, stream: bool = False,
+               politica_conflitos: str = POLITICA_PADRAO) -> None:
+    """Roda os builds afetados; falha de um build não derruba o modo watch."""
+    if base:
+        print("\n🔄 Tabelas da PNS mudaram: refazendo a base")
+        try:
+            if stream:
+                etl.build_neuropulse_stream(politica_conflitos=politica_conflitos)
+            else:
+                etl.build_neuropulse_base(
+                    usar_cache=True, jobs=jobs, politica_conflitos=politica_conflitos
+                )
+        except Exception:
+            traceback.print_exc()
+            print("❌ Build da base falhou: a versão publicada continua a anterior")
+
+    if fontes:
+        print(f"\n🔄 Fontes afetadas: {', '.join(f.nome for f in fontes)}")
+        try:
+            build_fontes(fontes, jobs=jobs, politica_conflitos=politica_conflitos)
+        except Exception:
+            traceback.print_exc()
+            print("❌ Build de fontes falhou: as partições publicadas continuam as anteriores")
+
+
+class _Acorda:
+    """Handler do watchdog: qualquer evento em data/raw só acorda o laço."""
+
+    def __init__(self, evento: threading.Event):
+        self.evento = evento
+
+    def dispatch(self, event):
+        self.evento.set()
+
+
+def vigia(
+    intervalo: float = INTERVALO_PADRAO,
+    espera: float = ESPERA_PADRAO,
+    jobs: int = 1,
+    stream: bool = False,
+    politica_conflitos: str = POLITICA_PADRAO,
+    usar_watchdog: bool = True,
+) -> None:
+    """
+    Modo watch: confere o que mudou desde o último build (refaz se preciso)
+    e depois reconstrói a cada lote de mudanças em data/raw, até Ctrl+C.
+    """
+    pasta = etl.DATA_RAW
+    acordou = threading.Event()
+    observer = None
+    if usar_watchdog and Observer is not None:
+        observer = Observer()
+        observer.schedule(_Acorda(acordou), str(pasta), recursive=True)
+        observer.start()
+        modo = "eventos (watchdog)"
+    else:
+        modo = f"varredura a cada {intervalo:g}s"
+
+    # Partida: o que mudou enquanto ninguém olhava (o build confere pela versão)
+    estado = estado_raw(pasta)
+    pns = _arquivos_pns()
+    reconstroi(*saidas_afetadas(set(estado), pns), jobs, stream, politica_conflitos)
+    print(f"\n👀 Vigiando {pasta} ({modo}). Ctrl+C para sair.")
+
+    try:
+        while True:
+            acordou.wait(timeout=None if observer else intervalo)
+            acordou.clear()
+            novo = estado_raw(pasta)
+            if not alterados(estado, novo):
+                continue
+
+            # Espera o lote terminar: cópias grandes mudam por vários segundos
+            while True:
+                time.sleep(espera)
+                acordou.clear()
+                depois = estado_raw(pasta)
+                if not alterados(novo, depois):
+                    break
+                novo = depois
+
+            caminhos = alterados(estado, novo)
+            estado = novo
+            print(f"\n📂 {len(caminhos)} arquivo(s) alterado(s) em {pasta}")
+            base, fontes = saidas_afetadas(caminhos, pns)
+            pns = _arquivos_pns()
+            if not base and not fontes:
+                print("Nada a refazer (arquivo sem uso).")
+                continue
+            reconstroi(base, fontes, jobs, stream, politica_conflitos)
+            print(f"\n👀 Vigiando {pasta} ({modo}).")
+    except KeyboardInterrupt:
+        print("\nModo watch encerrado.")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+# ===============================
+# EXECUÇÃO DIRETA
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Modo watch do ETL NeuroPulse (refaz e publica ao mudar data/raw)"
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=INTERVALO_PADRAO,
+        metavar="S",
+        help="segundos entre varreduras de data/raw (quando não há watchdog)",
+    )
+    parser.add_argument(
+        "--espera",
+        type=float,
+        default=ESPERA_PADRAO,
+        metavar="S",
+        help="segundos sem mudança antes de reconstruir (agrupa cópias em lote)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="processos para ler as tabelas em paralelo (0 = um por CPU)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="refaz a base no modo streaming (memória limitada)",
+    )
+    parser.add_argument(
+        "--conflitos",
+        choices=list(POLITICAS_CONFLITO),
+        default=POLITICA_PADRAO,
+        help="política para chave repetida com valores diferentes (ver etl_neuropulse)",
+    )
+    parser.add_argument(
+        "--varredura",
+        action="store_true",
+        help="usa varredura periódica mesmo com o watchdog instalado",
+    )
+    cli = parser.parse_args()
+
+    vigia(
+        intervalo=cli.intervalo,
+        espera=cli.espera,
+        jobs=cli.jobs if cli.jobs > 0 else (os.cpu_count() or 1),
+        stream=cli.stream,
+        politica_conflitos=cli.conflitos,
+        usar_watchdog=not cli.varredura,
+    )
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "src"))
+sys.path.insert(0, str(RAIZ / "benchmarks"))
+
+import etl_neuropulse as etl  # noqa: E402
+from sidra_sintetico import escreve_fontes_pns  # noqa: E402
+
+# Caminhos do ETL redirecionados para a pasta temporária de cada teste
+_PATHS_PROCESSADOS = [
+    "OUT_DATASET", "OUT_CSV", "QUARENTENA_CSV", "SNAPSHOT_PATH", "CARIMBO_PATH",
+    "MANIFEST_PATH", "CACHE_DIR", "RELATORIO_PATH",
+]
+
+
+@pytest.fixture
+def etl_tmp(tmp_path, monkeypatch):
+    """
+    ETL apontado para tmp_path/raw e tmp_path/processed, com as tabelas
+    sintéticas de duas edições da PNS (a da raiz e pns_2013/).
+    """
+    raw, processed = tmp_path / "raw", tmp_path / "processed"
+    processed.mkdir()
+    escreve_fontes_pns(raw, escala=1)
+    escreve_fontes_pns(raw / "pns_2013", escala=1, seed=7)
+
+    monkeypatch.setattr(etl, "DATA_RAW", raw)
+    monkeypatch.setattr(etl, "DATA_PROCESSED", processed)
+    for nome in _PATHS_PROCESSADOS:
+        monkeypatch.setattr(etl, nome, processed / getattr(etl, nome).name)
+    return tmp_path
+
+
+@pytest.fixture
+def base_construida(etl_tmp, capsys):
+    """Base publicada pelo build em memória (saída do build descartada)."""
+    etl.build_neuropulse_base(usar_cache=True)
+    capsys.readouterr()
+    return etl_tmp
@@ -0,0 +1,87 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api_neuropulse as api
+import etl_neuropulse as etl
+from api_neuropulse import ErroConsulta, cria_servidor, normaliza_consulta
+
+
+def test_normaliza_consulta_mesma_chave_para_a_mesma_consulta():
+    a = normaliza_consulta({"UF": ["Bahia,Acre", " Acre "], "year": ["2019", "2013,2019"]})
+    b = normaliza_consulta({"year": ["2013", "2019"], "UF": ["Acre", "Bahia"]})
+
+    assert a == b
+    assert a["UF"] == ("Acre", "Bahia")
+    assert a["year"] == (2013, 2019)
+    assert a["sexo"] == () and a["por"] == ()
+
+
+def test_normaliza_consulta_por_mantem_a_ordem():
+    consulta = normaliza_consulta({"por": ["sexo,UF", "sexo"]})
+    assert consulta["por"] == ("sexo", "UF")
+
+
+@pytest.mark.parametrize(
+    "params, mensagem",
+    [
+        ({"estado": ["Acre"]}, "desconhecidos: estado"),
+        ({"year": ["2019,dois mil"]}, "inteiro"),
+        ({"por": ["valor"]}, "agrupar por valor"),
+    ],
+)
+def test_normaliza_consulta_recusa(params, mensagem):
+    with pytest.raises(ErroConsulta, match=mensagem):
+        normaliza_consulta(params)
+
+
+@pytest.fixture
+def servidor(base_construida, monkeypatch):
+    monkeypatch.setattr(api, "INTERVALO_VERSAO", 0.0)  # versão relida a cada pedido
+    servidor = cria_servidor(porta=0, pasta=etl.OUT_DATASET)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(servidor, caminho: str, etag: str = None):
+    pedido = urllib.request.Request(f"http://127.0.0.1:{servidor.server_port}{caminho}")
+    if etag is not None:
+        pedido.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(pedido) as resposta:
+            return resposta.status, resposta.headers.get("ETag"), resposta.read()
+    except urllib.error.HTTPError as erro:
+        return erro.code, erro.headers.get("ETag"), erro.read()
+
+
+def test_etag_304_e_versao_nova(servidor, capsys):
+    consultas = servidor.RequestHandlerClass.consultas
+    status, etag, corpo = _get(servidor, "/dados?UF=Acre&formato=csv")
+    assert status == 200 and etag and corpo
+
+    # Mesma consulta, escrita de outro jeito: mesma chave, mesmo ETag
+    assert _get(servidor, "/dados?formato=csv&UF=Acre,Acre")[1] == etag
+
+    misses = consultas.cache.misses
+    status, etag_304, corpo = _get(servidor, "/dados?UF=Acre&formato=csv", etag)
+    assert (status, etag_304, corpo) == (304, etag, b"")
+    assert consultas.cache.misses == misses  # 304 sem consulta
+
+    # Outro formato é outra resposta
+    assert _get(servidor, "/dados?UF=Acre&formato=json", etag)[0] == 200
+
+    # Versão nova publicada: o ETag antigo deixa de valer
+    tabela = etl.DATA_RAW / "pns_depressao_sexo_total.csv"
+    with open(tabela, "a", encoding="latin1") as f:
+        f.write("\n")
+    etl.build_neuropulse_base(usar_cache=True)
+    capsys.readouterr()
+
+    status, etag_novo, corpo = _get(servidor, "/dados?UF=Acre&formato=csv", etag)
+    assert status == 200 and corpo
+    assert etag_novo != etag
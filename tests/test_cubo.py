@@ -0,0 +1,86 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+import etl_neuropulse as etl
+from cubo_neuropulse import (
+    COLUNAS_CUBO,
+    DIMENSOES_CUBO,
+    consulta_cubo,
+    escreve_cubo,
+    escreve_cubo_lotes,
+    le_cubo,
+)
+from particoes_neuropulse import itera_particoes, le_carimbo, le_particoes
+
+
+@pytest.fixture
+def base(base_construida) -> pd.DataFrame:
+    return le_particoes(etl.OUT_DATASET).to_pandas()
+
+
+def _filtros(base: pd.DataFrame):
+    """Todas as combinações de ano/sexo/faixa, cada dimensão também omitida."""
+    opcoes = [
+        [None, *base[coluna].unique()]
+        for coluna in ("year", "sexo", "faixa_idade")
+    ]
+    for valores in itertools.product(*opcoes):
+        yield {
+            coluna: valor
+            for coluna, valor in zip(("year", "sexo", "faixa_idade"), valores)
+            if valor is not None
+        }
+
+
+def _filtra_base(base: pd.DataFrame, filtros: dict) -> pd.DataFrame:
+    mascara = pd.Series(True, index=base.index)
+    for coluna, valor in filtros.items():
+        mascara &= base[coluna] == valor
+    return base[mascara]
+
+
+def test_cubo_carimbado_com_a_versao(base_construida):
+    versao = le_carimbo(etl.CARIMBO_PATH)["versao"]
+    assert le_cubo(etl.DATA_PROCESSED, versao) is not None
+    assert le_cubo(etl.DATA_PROCESSED, "outra") is None
+
+
+def test_consulta_cubo_igual_a_filtrar_a_base(base):
+    cubo_uf, cubo_resumo = le_cubo(etl.DATA_PROCESSED)
+    for filtros in _filtros(base):
+        linhas = _filtra_base(base, filtros)
+        uf = consulta_cubo(cubo_uf, **filtros)
+        resumo = consulta_cubo(cubo_resumo, **filtros)
+
+        assert len(uf) == len(linhas), filtros
+        assert sorted(uf["valor"]) == sorted(linhas["valor"]), filtros
+        assert resumo["n_ufs"].sum() == len(linhas), filtros
+
+        for grupo, linhas_grupo in linhas.groupby(DIMENSOES_CUBO, observed=True):
+            uf_grupo = cubo_uf.loc[grupo]
+            # rank 1 = maior valor; empate: primeira UF na ordem da base
+            primeira = linhas_grupo.loc[linhas_grupo["valor"].idxmax(), "UF"]
+            assert uf_grupo.loc[uf_grupo["rank"] == 1, "UF"].item() == primeira
+            assert cubo_resumo.loc[grupo, "uf_max"] == primeira
+            assert cubo_resumo.loc[grupo, "media"] == pytest.approx(linhas_grupo["valor"].mean())
+
+
+def test_consulta_cubo_sem_linhas(base):
+    cubo_uf, _ = le_cubo(etl.DATA_PROCESSED)
+    assert consulta_cubo(cubo_uf, year=1900).empty
+    assert list(consulta_cubo(cubo_uf, year=1900).columns) == list(cubo_uf.columns)
+
+
+@pytest.mark.parametrize("n_lotes", [1, 3, 1000])
+def test_cubo_em_lotes_igual_ao_cubo_em_memoria(base, tmp_path, n_lotes):
+    em_memoria, em_lotes = tmp_path / "memoria", tmp_path / "lotes"
+    em_memoria.mkdir()
+    em_lotes.mkdir()
+    escreve_cubo(base, em_memoria, "v1")
+    batches = itera_particoes(etl.OUT_DATASET, COLUNAS_CUBO, linhas_por_batch=50)
+    escreve_cubo_lotes(batches, em_lotes, "v1", n_lotes=n_lotes)
+
+    for esperado, obtido in zip(le_cubo(em_memoria, "v1"), le_cubo(em_lotes, "v1")):
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
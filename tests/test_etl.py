@@ -0,0 +1,44 @@
+import json
+
+import etl_neuropulse as etl
+from particoes_neuropulse import le_carimbo
+
+
+def _versao() -> str:
+    return le_carimbo(etl.CARIMBO_PATH)["versao"]
+
+
+def _relatorio() -> dict:
+    return json.loads(etl.RELATORIO_PATH.read_text(encoding="utf-8"))
+
+
+def test_rebuild_sem_mudancas_nao_publica(base_construida, capsys):
+    carimbo = le_carimbo(etl.CARIMBO_PATH)
+
+    builds = {"base": etl.build_neuropulse_base, "stream": etl.build_neuropulse_stream}
+    for modo, build in builds.items():
+        etl.RELATORIO_PATH.unlink()
+        build()
+        assert "Sem mudanças" in capsys.readouterr().out
+        # O relatório é gravado mesmo assim, com o motivo
+        assert _relatorio()["modo"] == modo
+        assert _relatorio()["sem_mudancas"] == {"versao": carimbo["versao"]}
+    assert le_carimbo(etl.CARIMBO_PATH) == carimbo
+
+
+def test_versao_vem_das_entradas(base_construida, capsys):
+    versao = _versao()
+
+    # --no-cache refaz tudo e chega na mesma versão
+    etl.build_neuropulse_base(usar_cache=False)
+    assert _versao() == versao
+
+    etl.build_neuropulse_stream(politica_conflitos="erro")
+    assert _versao() != versao
+
+    tabela = etl.DATA_RAW / "pns_depressao_uf_idade.csv"
+    tabela.write_bytes(tabela.read_bytes() + b"\n")
+    etl.build_neuropulse_base(usar_cache=True)
+    nova = _versao()
+    assert nova not in (versao, "")
+    assert (etl.OUT_DATASET.parent / f"{etl.OUT_DATASET.name}@{nova}").is_dir()
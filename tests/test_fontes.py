@@ -0,0 +1,92 @@
+import pandas as pd
+
+from fontes_neuropulse import (
+    COLUNAS_FONTES,
+    FonteCDC,
+    FonteIBGEPNS,
+    FonteMinSaude,
+    _padroniza,
+    build_fontes,
+    le_fontes,
+)
+
+MIN_SAUDE = """\
+ano;uf;indicador;transtorno;valor;sexo
+2019;Sao Paulo;percentual;Depressão;10,5;Feminino
+2019;RIO DE JANEIRO ;percentual;Depressão;8,25;Masculino
+2019;Bahia;percentual;Depressão;-;Feminino
+"""
+
+CDC = """\
+YearStart,LocationDesc,Topic,Question,DataValueType,DataValue,StratificationCategory1,Stratification1
+2020, Ohio ,Mental Health,Depression among adults,Crude Prevalence,20.1,Overall,Overall
+2020,Ohio,Mental Health,Depression among adults,Crude Prevalence,25.3,Sex,Female
+2020,Ohio,Mental Health,Depression among adults,Crude Prevalence,18.7,Age,Age 18-44
+2020,Ohio,Mental Health,Depression among adults,Crude Prevalence,19.0,Race/Ethnicity,Hispanic
+2020,Ohio,Mental Health,Depression among adults,Crude Prevalence,,Overall,Overall
+"""
+
+
+def _fontes(tmp_path) -> list:
+    min_saude, cdc = tmp_path / "saude_ministerio.csv", tmp_path / "cdc_usa.csv"
+    min_saude.write_text(MIN_SAUDE, encoding="latin1")
+    cdc.write_text(CDC, encoding="utf-8")
+    return [FonteMinSaude(min_saude), FonteCDC(cdc)]
+
+
+def _linhas(df: pd.DataFrame, *colunas) -> list:
+    return list(df[list(colunas)].itertuples(index=False, name=None))
+
+
+def test_min_saude_no_schema_padrao(tmp_path):
+    fonte, _ = _fontes(tmp_path)
+    df = _padroniza(fonte.carrega(), fonte.nome)
+
+    assert list(df.columns) == COLUNAS_FONTES
+    # "-" é valor ausente (linha descartada); UF pela dim_uf; sem faixa -> Total
+    assert _linhas(df, "region", "value", "sex", "age_group") == [
+        ("São Paulo", 10.5, "Feminino", "Total"),
+        ("Rio de Janeiro", 8.25, "Masculino", "Total"),
+    ]
+    assert (df["source"] == "MIN_SAUDE").all()
+    assert str(df["year"].dtype) == "Int16"
+
+
+def test_cdc_no_schema_padrao(tmp_path):
+    _, fonte = _fontes(tmp_path)
+    df = _padroniza(fonte.carrega(), fonte.nome)
+
+    assert list(df.columns) == COLUNAS_FONTES
+    # Raça/etnia fica de fora (repetiria a chave); sem valor, linha descartada
+    assert _linhas(df, "region", "value", "sex", "age_group") == [
+        ("Ohio", 20.1, "Total", "Total"),
+        ("Ohio", 25.3, "Female", "Total"),
+        ("Ohio", 18.7, "Total", "Age 18-44"),
+    ]
+    assert df["indicator_name"].unique().tolist() == [
+        "Depression among adults (Crude Prevalence)"
+    ]
+
+
+def test_ibge_pns_no_schema_padrao(etl_tmp):
+    fonte = FonteIBGEPNS()
+    resultado = fonte.carrega_validado()
+    df = _padroniza(resultado.validas, fonte.nome)
+
+    assert list(df.columns) == COLUNAS_FONTES
+    assert len(df) == len(resultado.validas) > 0
+    assert df[COLUNAS_FONTES].notna().all().all()
+    assert resultado.quarentena is not None
+
+
+def test_build_fontes_remove_particao_sem_entrada(tmp_path, capsys):
+    fontes, destino = _fontes(tmp_path), tmp_path / "fontes"
+    build_fontes(fontes, jobs=1, destino=destino)
+    assert set(le_fontes(destino)["source"]) == {"MIN_SAUDE", "CDC"}
+
+    fontes[1].path.unlink()
+    build_fontes(fontes, jobs=1, destino=destino)
+
+    assert "Fonte sem arquivo bruto (removida): CDC" in capsys.readouterr().out
+    assert not (destino / "source=CDC").exists()
+    assert set(le_fontes(destino)["source"]) == {"MIN_SAUDE"}
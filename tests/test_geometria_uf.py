@@ -0,0 +1,218 @@
+import json
+import math
+
+import pytest
+
+from geometria_uf import (
+    TOLERANCIAS,
+    Malha,
+    agrega_malha,
+    carrega_malha,
+    constroi_malhas,
+    path_malha,
+    simplifica_malha,
+    uf_do_municipio,
+)
+
+
+def _circulo(lon, lat, raio, n=400) -> list:
+    """Anel fechado com `n` vértices (malha "de qualidade máxima")."""
+    anel = [
+        [lon + raio * math.cos(2 * math.pi * i / n), lat + raio * math.sin(2 * math.pi * i / n)]
+        for i in range(n)
+    ]
+    return anel + [anel[0]]
+
+
+def _n_vertices(geometria: dict) -> int:
+    poligonos = (
+        [geometria["coordinates"]] if geometria["type"] == "Polygon" else geometria["coordinates"]
+    )
+    return sum(len(anel) for poligono in poligonos for anel in poligono)
+
+
+@pytest.fixture
+def malha_ibge(tmp_path):
+    """GeoJSON no formato da API de malhas do IBGE (codarea em texto, sem `id`)."""
+    feicoes = [
+        # "Pará": grande, com uma ilha menor que a tolerância mais grossa
+        ("15", {"type": "MultiPolygon", "coordinates": [
+            [_circulo(-52.0, -4.0, 6.0)],
+            [_circulo(-48.0, 1.0, 0.01, n=20)],
+        ]}),
+        ("29", {"type": "Polygon", "coordinates": [_circulo(-41.5, -12.5, 4.0)]}),
+        ("43", {"type": "Polygon", "coordinates": [_circulo(-53.0, -30.0, 3.0)]}),
+        # "DF": bem menor que as outras
+        ("53", {"type": "Polygon", "coordinates": [_circulo(-47.8, -15.8, 0.3)]}),
+    ]
+    origem = tmp_path / "malha_ibge.json"
+    origem.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {"type": "Feature", "properties": {"codarea": cod}, "geometry": geometria}
+                    for cod, geometria in feicoes
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    return origem
+
+
+@pytest.fixture
+def malha(malha_ibge, tmp_path, capsys) -> Malha:
+    constroi_malhas("uf", origem=malha_ibge, pasta=tmp_path / "geo")
+    capsys.readouterr()
+    return carrega_malha("uf", pasta=tmp_path / "geo")
+
+
+def test_sem_build_nao_ha_malha(tmp_path):
+    assert carrega_malha("uf", pasta=tmp_path) is None
+
+
+def test_malha_versionada_tem_as_27_ufs():
+    malha = carrega_malha("uf")
+    assert list(malha.versoes) == list(TOLERANCIAS)
+    for feicoes in malha.versoes.values():
+        assert len(feicoes) == 27
+        assert {cod // 10 for cod in feicoes} == {1, 2, 3, 4, 5}
+
+
+def test_build_grava_original_e_versoes_simplificadas(malha_ibge, tmp_path, capsys):
+    pasta = tmp_path / "geo"
+    gerados = constroi_malhas("uf", origem=malha_ibge, pasta=pasta)
+    assert gerados == [path_malha("uf", t, pasta) for t in TOLERANCIAS]
+
+    original = json.loads(path_malha("uf", pasta=pasta).read_text(encoding="utf-8"))
+    assert [f["id"] for f in original["features"]] == [15, 29, 43, 53]
+    assert all(f["properties"] == {} for f in original["features"])
+
+    vertices = [
+        sum(
+            _n_vertices(f["geometry"])
+            for f in json.loads(path.read_text(encoding="utf-8"))["features"]
+        )
+        for path in [path_malha("uf", pasta=pasta), *gerados]
+    ]
+    # Cada tolerância maior deixa menos vértices
+    assert vertices == sorted(vertices, reverse=True)
+    assert vertices[-1] < vertices[0] / 10
+
+
+def test_aneis_continuam_validos(malha):
+    for feicoes in malha.versoes.values():
+        for feicao in feicoes.values():
+            geometria = feicao["geometry"]
+            poligonos = (
+                [geometria["coordinates"]]
+                if geometria["type"] == "Polygon"
+                else geometria["coordinates"]
+            )
+            for poligono in poligonos:
+                for anel in poligono:
+                    assert anel[0] == anel[-1]
+                    assert len(anel) >= 4
+
+
+def test_aneis_no_sentido_do_plotly(malha):
+    # d3-geo: externo horário (área com sinal negativa); a origem é anti-horária
+    for feicoes in malha.versoes.values():
+        for feicao in feicoes.values():
+            geometria = feicao["geometry"]
+            poligonos = (
+                [geometria["coordinates"]]
+                if geometria["type"] == "Polygon"
+                else geometria["coordinates"]
+            )
+            for poligono in poligonos:
+                anel = poligono[0]
+                area = sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(anel[:-1], anel[1:]))
+                assert area < 0
+
+
+def test_ilha_menor_que_a_tolerancia_sai(malha):
+    fina, grossa = min(TOLERANCIAS), max(TOLERANCIAS)
+    assert len(malha.versoes[fina][15]["geometry"]["coordinates"]) == 2
+    assert len(malha.versoes[grossa][15]["geometry"]["coordinates"]) == 1
+
+
+def test_tolerancia_pela_extensao_das_ufs(malha):
+    # Brasil inteiro: a mais grossa; uma UF pequena: a mais fina
+    assert malha.tolerancia_para([15, 29, 43, 53]) == max(TOLERANCIAS)
+    assert malha.tolerancia_para([53]) == min(TOLERANCIAS)
+    # Sem nenhuma UF conhecida: a mais grossa
+    assert malha.tolerancia_para([99]) == max(TOLERANCIAS)
+
+
+def test_geojson_so_com_as_ufs_pedidas(malha):
+    geojson = malha.geojson(["53", 29.0, 99])
+    assert geojson["type"] == "FeatureCollection"
+    assert [f["id"] for f in geojson["features"]] == [29, 53]
+
+    grossa = malha.geojson([15, 29, 53], tolerancia=max(TOLERANCIAS))
+    assert grossa["features"][0] is malha.versoes[max(TOLERANCIAS)][15]
+
+
+def _divisa(n=200) -> list:
+    """Divisa sinuosa de (0, 0) a (0, 4): muitos vértices abaixo e acima da tolerância."""
+    return [
+        [0.3 * math.sin(6 * math.pi * i / n) + 0.002 * (-1) ** i * (0 < i < n), 4 * i / n]
+        for i in range(n + 1)
+    ]
+
+
+def _vizinhos() -> dict:
+    """Duas feições que dividem a mesma divisa sinuosa (anéis em sentidos opostos)."""
+    divisa = _divisa()
+    oeste = [[-3.0, 4.0], [-3.0, 0.0], *divisa, [-3.0, 4.0]]
+    leste = [*divisa[::-1], [3.0, 0.0], [3.0, 4.0], [0.0, 4.0]]
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": id_, "properties": {}, "geometry": {
+                "type": "Polygon", "coordinates": [anel],
+            }}
+            for id_, anel in [(1100015, oeste), (1100023, leste)]
+        ],
+    }
+
+
+def _arestas(feicao: dict) -> set:
+    anel = feicao["geometry"]["coordinates"][0]
+    return {(tuple(a), tuple(b)) for a, b in zip(anel[:-1], anel[1:])}
+
+
+@pytest.mark.parametrize("tolerancia", TOLERANCIAS)
+def test_divisa_igual_dos_dois_lados(tolerancia):
+    oeste, leste = simplifica_malha(_vizinhos(), tolerancia)["features"]
+    # Cada aresta da divisa de um lado é a mesma aresta, invertida, do outro
+    comuns = {(b, a) for a, b in _arestas(oeste)} & _arestas(leste)
+    divisa = {tuple(p) for p in oeste["geometry"]["coordinates"][0] if abs(p[0]) < 1}
+    assert len(comuns) == len(divisa) - 1 > 1
+    assert len(divisa) < len(_divisa())
+
+
+def test_agrega_municipios_por_uf():
+    municipios = _vizinhos()
+    # Um terceiro município, de outra UF, encostado no leste
+    municipios["features"].append(
+        {"type": "Feature", "id": 1200013, "properties": {}, "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[3.0, 0.0], [5.0, 0.0], [5.0, 4.0], [3.0, 4.0], [3.0, 0.0]]],
+        }}
+    )
+    ufs = agrega_malha(municipios, uf_do_municipio)
+
+    assert [f["id"] for f in ufs["features"]] == [11, 12]
+    rondonia = ufs["features"][0]["geometry"]
+    assert rondonia["type"] == "Polygon"
+    # A divisa entre os dois municípios sumiu: sobra o retângulo, anti-horário
+    anel = rondonia["coordinates"][0]
+    assert anel[0] == anel[-1]
+    assert sorted(map(tuple, anel[:-1])) == sorted(
+        [(-3.0, 0.0), (0.0, 0.0), (3.0, 0.0), (3.0, 4.0), (0.0, 4.0), (-3.0, 4.0)]
+    )
+    area = sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(anel[:-1], anel[1:])) / 2
+    assert area == pytest.approx(24.0)
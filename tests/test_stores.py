@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl_neuropulse as etl
+from particoes_neuropulse import le_constantes, le_particoes
+from store_neuropulse import NeuroPulseStore
+
+COLUNAS_COMPARADAS = ["year", "UF", "sexo", "faixa_idade", "valor"]
+TEXTO = {"UF": str, "sexo": str, "faixa_idade": str}  # categorias x texto do DuckDB
+
+
+@pytest.fixture
+def base(base_construida) -> pd.DataFrame:
+    return le_particoes(etl.OUT_DATASET).to_pandas()
+
+
+@pytest.fixture
+def store(base) -> NeuroPulseStore:
+    return NeuroPulseStore(base, le_constantes(etl.OUT_DATASET))
+
+
+def _selecoes(store):
+    """Filtros do painel: todas as UFs e um subconjunto, cada sexo × faixa e sem filtro."""
+    ufs = store.opcoes("UF")
+    subconjuntos = [None, ufs, ufs[::3], [ufs[0]]]
+    for sexo in [None, *store.opcoes("sexo")]:
+        for faixa in [None, "Total", store.opcoes("faixa_idade")[:2]]:
+            for ufs_sel in subconjuntos:
+                yield {"ufs": ufs_sel, "sexo": sexo, "faixa_idade": faixa}
+
+
+def _mascara(base: pd.DataFrame, ufs=None, sexo=None, faixa_idade=None) -> pd.DataFrame:
+    mascara = np.ones(len(base), dtype=bool)
+    for coluna, valor in (("UF", ufs), ("sexo", sexo), ("faixa_idade", faixa_idade)):
+        if valor is not None:
+            mascara &= base[coluna].isin(valor if isinstance(valor, list) else [valor])
+    return base[mascara]
+
+
+def test_store_igual_ao_filtro_por_mascara(base, store):
+    for filtros in _selecoes(store):
+        esperado = _mascara(base, **filtros)
+        obtido = store.filter(**filtros)
+        assert obtido.index.tolist() == esperado.index.tolist(), filtros
+
+        agregado = store.aggregate(**filtros)
+        if esperado.empty:
+            assert agregado is None
+            continue
+        valores = esperado["valor"]
+        assert agregado["n"] == len(esperado)
+        assert agregado["media"] == pytest.approx(valores.mean())
+        assert agregado["uf_max"] == esperado.loc[valores.idxmax(), "UF"]
+        assert agregado["uf_min"] == esperado.loc[valores.idxmin(), "UF"]
+
+
+def test_duckdb_igual_ao_pandas(base_construida, store):
+    pytest.importorskip("duckdb")
+    from store_duckdb import DuckDBStore
+
+    duck = DuckDBStore(etl.OUT_DATASET)
+    assert len(duck) == len(store)
+    for coluna in ("UF", "sexo", "faixa_idade"):
+        assert duck.opcoes(coluna) == store.opcoes(coluna)
+
+    for filtros in _selecoes(store):
+        pd.testing.assert_frame_equal(
+            duck.filter(**filtros)[COLUNAS_COMPARADAS].astype(TEXTO),
+            store.filter(**filtros)[COLUNAS_COMPARADAS].astype(TEXTO),
+            check_dtype=False,
+            check_index_type=False,
+        )
+
+        esperado, obtido = store.aggregate(**filtros), duck.aggregate(**filtros)
+        if esperado is None:
+            assert obtido is None
+        else:
+            assert obtido == pytest.approx(esperado), filtros
+
+        por_sexo = store.aggregate(**filtros, by="sexo")
+        pd.testing.assert_frame_equal(
+            duck.aggregate(**filtros, by="sexo").astype({"sexo": str}).reset_index(drop=True),
+            por_sexo.astype({"sexo": str}).reset_index(drop=True),
+            check_dtype=False,
+        )
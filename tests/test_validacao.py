@@ -0,0 +1,160 @@
+import pandas as pd
+import pytest
+
+from validacao_neuropulse import CHAVE_LINHA, ErroValidacao, ValidadorBlocos, valida
+
+
+def _base(linhas) -> pd.DataFrame:
+    """Base longa com (UF, sexo, valor) por linha; o resto da chave é fixo."""
+    return pd.DataFrame(
+        [
+            {
+                "year": 2019,
+                "UF": uf,
+                "sexo": sexo,
+                "faixa_idade": "Total",
+                "domicilio": "Total",
+                "transtorno": "Depressão",
+                "indicador": "percentual",
+                "valor": valor,
+            }
+            for uf, sexo, valor in linhas
+        ]
+    )
+
+
+# Acre/Total aparece três vezes: 1ª e 3ª iguais (duplicata exata), 2ª em conflito
+CONFLITO = _base(
+    [
+        ("Acre", "Total", 10.0),
+        ("Bahia", "Total", 20.0),
+        ("Acre", "Total", 11.0),
+        ("Acre", "Total", 10.0),
+        ("Acre", "Masculino", 9.0),
+    ]
+)
+
+
+def _chaves(df: pd.DataFrame) -> list:
+    return list(zip(df["UF"], df["sexo"], df["valor"]))
+
+
+def test_primeiro_fica_com_a_primeira_linha():
+    r = valida(CONFLITO, "primeiro")
+    assert _chaves(r.validas) == [
+        ("Acre", "Total", 10.0), ("Bahia", "Total", 20.0), ("Acre", "Masculino", 9.0)
+    ]
+    assert _chaves(r.quarentena) == [("Acre", "Total", 11.0)]
+    assert r.quarentena["motivo"].tolist() == ["conflito"]
+    assert r.contagens["duplicatas_exatas"] == 1
+    assert r.contagens["conflito"] == 1
+
+
+def test_ultimo_fica_com_a_ultima_linha():
+    r = valida(CONFLITO, "ultimo")
+    assert _chaves(r.validas) == [
+        ("Bahia", "Total", 20.0), ("Acre", "Total", 11.0), ("Acre", "Masculino", 9.0)
+    ]
+    assert _chaves(r.quarentena) == [("Acre", "Total", 10.0)]
+
+
+def test_descarta_manda_a_chave_inteira_para_a_quarentena():
+    r = valida(CONFLITO, "descarta")
+    assert _chaves(r.validas) == [("Bahia", "Total", 20.0), ("Acre", "Masculino", 9.0)]
+    assert sorted(_chaves(r.quarentena)) == [("Acre", "Total", 10.0), ("Acre", "Total", 11.0)]
+    assert r.contagens["conflito"] == 2
+
+
+def test_erro_interrompe():
+    with pytest.raises(ErroValidacao, match="1 chave"):
+        valida(CONFLITO, "erro")
+    # Sem conflito (só duplicata exata), "erro" passa
+    assert len(valida(CONFLITO.drop(index=2), "erro").validas) == 3
+
+
+def test_politica_desconhecida():
+    with pytest.raises(ValueError, match="desconhecida"):
+        valida(CONFLITO, "maior")
+
+
+def test_motivos_por_linha_tem_prioridade_sobre_conflito():
+    base = _base(
+        [
+            ("Atlântida", "Total", 10.0),
+            ("Acre", "Total", 150.0),
+            ("RondÃ´nia", "Total", 5.0),
+            ("Acre", "Total", 12.0),
+        ]
+    )
+    r = valida(base)
+    assert r.quarentena["motivo"].tolist() == [
+        "uf_desconhecida", "valor_fora_faixa", "uf_desconhecida"
+    ]
+    # A linha fora da faixa não conta como a "primeira" da chave
+    assert _chaves(r.validas) == [("Acre", "Total", 12.0)]
+
+
+def test_motivo_codificacao():
+    base = _base([("Acre", "Ã©Total", 10.0)])
+    assert valida(base).quarentena["motivo"].tolist() == ["codificacao"]
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 3, 5])
+def test_validador_blocos_igual_a_valida(tamanho_bloco):
+    validador = ValidadorBlocos("primeiro")
+    validas, quarentena = [], []
+    for inicio in range(0, len(CONFLITO), tamanho_bloco):
+        r = validador.valida(CONFLITO.iloc[inicio:inicio + tamanho_bloco])
+        validas.append(r.validas)
+        quarentena.append(r.quarentena)
+
+    esperado = valida(CONFLITO, "primeiro")
+    assert _chaves(pd.concat(validas)) == _chaves(esperado.validas)
+    assert _chaves(pd.concat(quarentena)) == _chaves(esperado.quarentena)
+    assert validador.contagens == esperado.contagens
+
+
+def test_validador_blocos_muitas_runs():
+    # Blocos de uma linha forçam várias runs e mesclas no índice de chaves
+    base = _base([(uf, "Total", float(i)) for i, uf in enumerate(["Acre", "Bahia", "Pará"] * 20)])
+    validador = ValidadorBlocos()
+    validas = pd.concat([validador.valida(base.iloc[[i]]).validas for i in range(len(base))])
+    assert _chaves(validas) == _chaves(valida(base).validas)
+    assert validador.contagens["conflito"] == len(base) - 3
+    assert not validas.duplicated(CHAVE_LINHA).any()
+
+
+def test_validador_blocos_erro_entre_blocos():
+    validador = ValidadorBlocos("erro")
+    validador.valida(CONFLITO.iloc[:2])
+    # Duplicata exata de linha já gravada não é conflito
+    assert validador.valida(CONFLITO.iloc[[3]]).validas.empty
+    with pytest.raises(ErroValidacao, match="chave já gravada"):
+        validador.valida(CONFLITO.iloc[[2]])
+
+
+@pytest.mark.parametrize("politica", ["ultimo", "descarta"])
+def test_validador_blocos_recusa_politicas_que_reescrevem(politica):
+    with pytest.raises(ValueError, match="streaming"):
+        ValidadorBlocos(politica)
+
+
+def test_entidade_municipal_nao_passa_pela_checagem_de_uf():
+    # Tabelas em nível de município: a entidade não é uma UF
+    base = _base(
+        [
+            ("Município 00001", "Total", 10.0),
+            ("Atlântida", "Total", 11.0),
+            ("Acre", "Total", 12.0),
+            ("Município 00001", "Total", 10.0),
+        ]
+    )
+    assert valida(base, checa_uf=False).quarentena.empty
+
+    r = valida(base, checa_uf=[False, True, True, False])
+    assert _chaves(r.validas) == [("Município 00001", "Total", 10.0), ("Acre", "Total", 12.0)]
+    assert r.quarentena["motivo"].tolist() == ["uf_desconhecida"]
+
+    validador = ValidadorBlocos()
+    assert validador.valida(base.iloc[:1], checa_uf=False).quarentena.empty
+    assert validador.valida(base.iloc[1:2]).quarentena["motivo"].tolist() == ["uf_desconhecida"]
@@ -0,0 +1,76 @@
+import os
+
+import etl_neuropulse as etl
+from particoes_neuropulse import le_carimbo
+from vigia_neuropulse import _arquivos_pns, saidas_afetadas
+
+
+def _nomes(fontes) -> list:
+    return [fonte.nome for fonte in fontes]
+
+
+def test_touch_chama_o_build_que_nao_publica(base_construida, capsys):
+    carimbo = etl.CARIMBO_PATH.read_bytes()
+    tabela = etl.DATA_RAW / "pns_depressao_sexo_total.csv"
+    info = tabela.stat()
+    os.utime(tabela, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+    base, _ = saidas_afetadas({tabela}, _arquivos_pns())
+    assert base is True
+    # Quem descarta o evento é o build, pela versão das entradas
+    etl.build_neuropulse_base(usar_cache=True)
+    assert "Sem mudanças" in capsys.readouterr().out
+    assert etl.CARIMBO_PATH.read_bytes() == carimbo
+
+
+def test_stream_volta_ao_conteudo_anterior(etl_tmp, capsys):
+    # O build em streaming não grava manifesto: a decisão não pode depender dele
+    tabela = etl.DATA_RAW / "pns_depressao_sexo_total.csv"
+    original = tabela.read_bytes()
+    versoes = []
+    for conteudo in (original, original + b"\n", original):
+        tabela.write_bytes(conteudo)
+        base, _ = saidas_afetadas({tabela}, _arquivos_pns())
+        assert base is True
+        etl.build_neuropulse_stream()
+        versoes.append(le_carimbo(etl.CARIMBO_PATH)["versao"])
+    capsys.readouterr()
+
+    assert versoes[0] != versoes[1]
+    assert versoes[2] == versoes[0]
+
+
+def test_conteudo_novo_refaz_a_base(base_construida):
+    tabela = etl.DATA_RAW / "pns_2013" / "pns_depressao_uf_idade.csv"
+    with open(tabela, "a", encoding="latin1") as f:
+        f.write("\n")
+
+    base, fontes = saidas_afetadas({tabela}, _arquivos_pns())
+    assert base is True
+    assert "IBGE_PNS" in _nomes(fontes)
+
+
+def test_tabela_removida_refaz_a_base(base_construida):
+    anteriores = _arquivos_pns()
+    tabela = etl.DATA_RAW / "pns_2013" / "pns_depressao_sexo_feminino.csv"
+    tabela.unlink()
+
+    base, _ = saidas_afetadas({tabela}, anteriores)
+    assert base is True
+
+
+def test_edicao_nova_refaz_a_base(base_construida):
+    anteriores = _arquivos_pns()
+    nova = etl.DATA_RAW / "pns_2008" / "pns_depressao_sexo_total.csv"
+    nova.parent.mkdir()
+    nova.write_bytes((etl.DATA_RAW / "pns_depressao_sexo_total.csv").read_bytes())
+
+    base, _ = saidas_afetadas({nova}, anteriores)
+    assert base is True
+
+
+def test_arquivo_fora_das_fontes_nao_refaz_nada(base_construida):
+    notas = etl.DATA_RAW / "notas.txt"
+    notas.write_text("anotações", encoding="utf-8")
+
+    assert saidas_afetadas({notas}, _arquivos_pns()) == (False, [])